@@ -0,0 +1,63 @@
+"""Compara a leitura atual (read_excel + astype(str)) com a leitura tipada.
+
+Uso:
+    python benchmarks/bench_ingest.py [planilha.xlsx] [--repeat N]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from qtexpotool.ingest import available_engines, iter_excel_chunks, read_excel_typed  # noqa: E402
+
+DEFAULT_FILE = Path(__file__).resolve().parent.parent / "src" / "docs" / "planilha_3_decimal.xlsx"
+
+
+def read_current(file_path):
+    """Caminho antigo do f_import_excel."""
+    return pd.read_excel(file_path).astype(str)
+
+
+def read_stream(file_path):
+    return pd.concat(list(iter_excel_chunks(file_path)), ignore_index=True)
+
+
+def measure(func, file_path, repeat):
+    best = float("inf")
+    df = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = func(file_path)
+        best = min(best, time.perf_counter() - start)
+    return best, df.memory_usage(deep=True).sum(), len(df)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("file", nargs="?", default=DEFAULT_FILE)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    cases = [("atual (openpyxl + astype(str))", read_current)]
+    for engine in available_engines():
+        cases.append((f"tipada ({engine})", lambda f, e=engine: read_excel_typed(f, engine=e)))
+    cases.append(("tipada (openpyxl read_only, em lotes)", read_stream))
+
+    print(f"Planilha: {args.file}")
+    base_time = None
+    for name, func in cases:
+        elapsed, memory, rows = measure(func, args.file, args.repeat)
+        base_time = base_time or elapsed
+        print(
+            f"{name:<40} {elapsed:8.3f} s  {rows / elapsed:>10,.0f} linhas/s  "
+            f"{memory / 2**20:8.2f} MiB  x{base_time / elapsed:5.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""Mede cada etapa do fluxo importar -> formatar -> exportar, sem interface.
+
+Gera roteiros sintéticos (codFkxlsx.py, com semente) de cada tamanho e mede
+cada etapa num processo próprio, para que o pico de memória (RSS) de uma
+etapa não contamine a seguinte:
+
+    read     leitura tipada da planilha de uma vez (read_excel_typed, como na CLI)
+    import   leitura em lotes com compactação, como na interface (ImportWorker)
+    format   formatação vetorizada (render_frame)
+    preview  montagem do TableModel e da primeira tela da pré-visualização
+    docx     exportação DOCX em fluxo
+    xlsx     exportação XLSX em fluxo
+    pdf      exportação PDF
+
+O resultado (tempo, linhas/s e pico de RSS) vai para um JSON. Se houver uma
+linha de base, cada medida é comparada com ela e as regressões acima da
+tolerância são listadas (código de saída 1).
+
+Uso:
+    python benchmarks/bench_pipeline.py --sizes 1000 10000 100000
+    python benchmarks/bench_pipeline.py --sizes 1000000 --stages read format
+    python benchmarks/bench_pipeline.py --save-baseline
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_RESULTS = Path(__file__).resolve().parent / "results"
+TEMPLATE = ROOT / "src" / "docs" / "modelo.docx"
+STAGES = ("read", "import", "format", "preview", "docx", "xlsx", "pdf")
+
+
+def peak_rss_bytes():
+    """Pico de memória residente do processo atual (0 se não der para medir)."""
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class Counters(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = Counters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize
+        return 0
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KiB, macOS em bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _load_frame(data_dir):
+    import pandas as pd
+
+    return pd.read_pickle(Path(data_dir) / "typed.pkl")
+
+
+def _stage_read(workbook, data_dir, out_dir):
+    from qtexpotool.ingest import read_excel_typed
+
+    return lambda: read_excel_typed(workbook)
+
+
+def _stage_import(workbook, data_dir, out_dir):
+    from main import ImportWorker
+
+    def run():
+        # O mesmo caminho da interface (iter_excel_chunks + ChunkCompactor),
+        # sem a thread e sem o cache
+        worker = ImportWorker(workbook)
+        loaded = []
+        worker.loaded.connect(loaded.append)
+        worker.failed.connect(lambda message: loaded.append(RuntimeError(message)))
+        worker.read()
+        if not loaded or isinstance(loaded[0], Exception):
+            raise RuntimeError(loaded[0] if loaded else "nenhuma linha lida")
+        return loaded[0]
+
+    return run
+
+
+def _stage_format(workbook, data_dir, out_dir):
+    from qtexpotool.render import render_frame
+
+    df = _load_frame(data_dir)
+    return lambda: render_frame(df)
+
+
+def _stage_preview(workbook, data_dir, out_dir):
+    from PyQt5.QtCore import Qt
+
+    from main import TableModel
+
+    df = _load_frame(data_dir)
+
+    def run():
+        model = TableModel(df)
+        # Primeira tela (~40 linhas) e um salto para o fim, como no scroll
+        rows = list(range(min(40, model.rowCount()))) + [model.rowCount() - 1]
+        for row in rows:
+            for column in range(model.columnCount()):
+                model.data(model.index(row, column), Qt.DisplayRole)
+        return model
+
+    return run
+
+
+def _stage_docx(workbook, data_dir, out_dir):
+    from qtexpotool.docx_stream import export_docx_stream
+    from qtexpotool.render import render_frame
+
+    rendered = render_frame(_load_frame(data_dir))
+    return lambda: export_docx_stream(rendered, TEMPLATE, Path(out_dir) / "bench.docx")
+
+
+def _stage_xlsx(workbook, data_dir, out_dir):
+    from qtexpotool.xlsx_writer import export_xlsx_stream
+
+    df = _load_frame(data_dir)
+    return lambda: export_xlsx_stream(df, Path(out_dir) / "bench.xlsx")
+
+
+def _stage_pdf(workbook, data_dir, out_dir):
+    from qtexpotool.pdf_writer import export_pdf_stream
+    from qtexpotool.render import render_frame
+
+    rendered = render_frame(_load_frame(data_dir))
+    return lambda: export_pdf_stream(rendered, Path(out_dir) / "bench.pdf")
+
+
+SETUPS = {
+    "read": _stage_read,
+    "import": _stage_import,
+    "format": _stage_format,
+    "preview": _stage_preview,
+    "docx": _stage_docx,
+    "xlsx": _stage_xlsx,
+    "pdf": _stage_pdf,
+}
+
+
+def _run_stage(stage, workbook, data_dir, out_dir, repeat, results):
+    """Executado num processo novo: prepara a etapa, mede e devolve pela fila."""
+    try:
+        func = SETUPS[stage](workbook, data_dir, out_dir)
+        rss_before = peak_rss_bytes()
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        peak = peak_rss_bytes()
+        results.put({
+            "seconds": best,
+            "peak_rss_mb": peak / 2**20,
+            "stage_rss_mb": max(peak - rss_before, 0) / 2**20,
+        })
+    except ImportError as e:
+        results.put({"skipped": f"{type(e).__name__}: {e}"})
+    except Exception as e:
+        results.put({"error": f"{type(e).__name__}: {e}"})
+
+
+def measure(stage, workbook, data_dir, out_dir, repeat, timeout=None):
+    """Roda a etapa num processo novo; um processo que morre (falta de memória,
+    crash) ou passa de ``timeout`` segundos vira ``{"error": ...}``."""
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(
+        target=_run_stage, args=(stage, str(workbook), str(data_dir), str(out_dir), repeat, results)
+    )
+    process.start()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    result = None
+    while result is None:
+        try:
+            result = results.get(timeout=1)
+        except queue.Empty:
+            if process.exitcode is not None:
+                # O resultado pode ter chegado junto com a saída do processo
+                try:
+                    result = results.get(timeout=1)
+                except queue.Empty:
+                    result = {"error": f"processo terminou com código {process.exitcode}"}
+            elif deadline is not None and time.monotonic() > deadline:
+                process.terminate()
+                result = {"error": f"tempo esgotado ({timeout:g} s)"}
+    process.join()
+    return result
+
+
+def prepare_data(size, seed, data_root):
+    """Planilha sintética de ``size`` linhas e o DataFrame tipado, gerados uma vez."""
+    import codFkxlsx
+    from qtexpotool.ingest import read_excel_typed
+
+    data_dir = Path(data_root) / f"roteiro_{size}_{seed}"
+    workbook = data_dir / "roteiro.xlsx"
+    if not (data_dir / "typed.pkl").exists():
+        data_dir.mkdir(parents=True, exist_ok=True)
+        codFkxlsx.write_workbook(codFkxlsx.generate_roteiro(size, seed), workbook)
+        read_excel_typed(workbook).to_pickle(data_dir / "typed.pkl")
+    return workbook, data_dir
+
+
+def compare(results, baseline, tolerance, min_seconds=0.05):
+    """Lista as medidas que pioraram mais que ``tolerance`` em relação à base.
+
+    Tempos abaixo de ``min_seconds`` são ruído demais para acusar regressão.
+    """
+    regressions = []
+    for size, stages in results["results"].items():
+        for stage, current in stages.items():
+            reference = baseline.get("results", {}).get(size, {}).get(stage)
+            if not reference or "seconds" not in current or "seconds" not in reference:
+                continue
+            for key in ("seconds", "peak_rss_mb"):
+                ratio = current[key] / reference[key] if reference[key] else 1.0
+                current[f"{key}_vs_baseline"] = round(ratio, 3)
+                if key == "seconds" and max(current[key], reference[key]) < min_seconds:
+                    continue
+                if ratio > 1 + tolerance:
+                    regressions.append((size, stage, key, reference[key], current[key], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--data-dir", default=Path(tempfile.gettempdir()) / "qtexpotool_bench",
+                        help="onde guardar as planilhas geradas (reaproveitadas entre execuções)")
+    parser.add_argument("--output", help="JSON de saída (padrão: benchmarks/results/<data>.json)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="grava o resultado também como nova linha de base")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="piora aceita antes de acusar regressão (0.2 = 20%%)")
+    parser.add_argument("--min-seconds", type=float, default=0.05,
+                        help="tempos menores que isso não contam como regressão")
+    parser.add_argument("--timeout", type=float, default=None, metavar="S",
+                        help="tempo máximo de cada etapa, em segundos")
+    args = parser.parse_args(argv)
+
+    results = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "results": {},
+    }
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        for size in args.sizes:
+            workbook, data_dir = prepare_data(size, args.seed, args.data_dir)
+            stages = results["results"][str(size)] = {}
+            for stage in args.stages:
+                result = measure(stage, workbook, data_dir, out_dir, args.repeat, args.timeout)
+                if "seconds" in result:
+                    result["rows_per_s"] = size / result["seconds"] if result["seconds"] else 0.0
+                    print(f"{size:>9,} {stage:<8} {result['seconds']:8.3f} s "
+                          f"{result['rows_per_s']:>12,.0f} linhas/s "
+                          f"{result['peak_rss_mb']:8.1f} MiB")
+                else:
+                    print(f"{size:>9,} {stage:<8} {result.get('skipped') or result.get('error')}")
+                stages[stage] = result
+
+    regressions = []
+    baseline_path = Path(args.baseline)
+    if baseline_path.exists() and not args.save_baseline:
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.tolerance, args.min_seconds)
+        print(f"\nComparado com {baseline_path} ({baseline['meta']['date']}):")
+        for size, stage, key, before, after, ratio in regressions:
+            print(f"  REGRESSÃO {size} {stage} {key}: {before:.3f} -> {after:.3f} (x{ratio:.2f})")
+        if not regressions:
+            print("  nenhuma regressão acima da tolerância")
+
+    output = Path(args.output) if args.output else (
+        DEFAULT_RESULTS / f"bench_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\nResultado gravado em {output}")
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"Linha de base atualizada: {baseline_path}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
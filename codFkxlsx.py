@@ -1,6 +1,24 @@
-import random
+"""Gerador de planilhas falsas (com semente) para testes e benchmarks.
+
+Dois esquemas:
+    cadastro  colunas de processos (município, interessado, georref...)
+    roteiro   as 9 colunas do roteiro perimétrico do modelo.docx
+
+Tudo é gerado em vetores do numpy, de modo que 1M de linhas sai em segundos.
+
+Uso:
+    python codFkxlsx.py --linhas 10000 --tipo roteiro --semente 42 --saida roteiro.xlsx
+"""
+
+import argparse
+
+import numpy as np
 import pandas as pd
 
+from qtexpotool.coords import format_dms
+from qtexpotool.fixedpoint import format_units, integer_strings, to_units
+from qtexpotool.xlsx_writer import write_xlsx_stream
+
 # Definindo as colunas da planilha
 columns = ["ID", "MUNICIPIO", "SITUAÇÃO", "ANO", "NUMERO", "INTERESSADO", "IMOVEL", "PARCELA", "GEORREF"]
 
@@ -13,24 +31,122 @@ imoveis = ["Chácara", "Sítio", "Fazenda", "Terreno Urbano", "Apartamento", "Ca
 parcelas = ["Parcela 1", "Parcela 2", "Parcela 3", "Parcela 4"]
 georreferenciamento = ["S 01° 55' 44\" W 048° 29' 55\"", "S 02° 49' 12\" W 047° 28' 10\"", "S 01° 17' 32\" W 049° 12' 11\"", "S 03° 14' 22\" W 048° 55' 19\""]
 
-# Gerando dados aleatórios
-data = []
-
-for i in range(30):
-    row = [
-        i + 1,  # ID
-        random.choice(municipios),  # MUNICIPIO
-        random.choice(situacoes),  # SITUAÇÃO
-        random.choice(anos),  # ANO
-        f"{random.randint(1000, 9999)}/{random.randint(2000, 2099)}",  # NUMERO
-        random.choice(interessados),  # INTERESSADO
-        random.choice(imoveis),  # IMOVEL
-        random.choice(parcelas),  # PARCELA
-        random.choice(georreferenciamento)  # GEORREF
-    ]
-    data.append(row)
-
-# Criando o DataFrame
-df = pd.DataFrame(data, columns=columns)
-
-print(df)
+# Colunas do roteiro perimétrico (modelo.docx)
+roteiro_columns = ["De", "Para", "Coord. N(Y)", "Coord. E(X)", "Azimute", "Distância", "Fator K", "Latitude", "Longitude"]
+
+# Ponto de partida dos roteiros (região de tabela.xlsx) e metros por segundo de arco
+ORIGIN_N, ORIGIN_E = 9720565.46, 748700.23
+ORIGIN_LAT, ORIGIN_LON = 2 * 3600 + 31 * 60 + 34.244785, 48 * 3600 + 45 * 60 + 48.254857
+METERS_PER_ARC_SECOND = 30.87
+
+
+def _pad2(ints):
+    """Inteiros de 0 a 99 com dois dígitos."""
+    return np.where(ints < 10, "0", "").astype(object) + integer_strings(ints).astype(object)
+
+
+def _join(*parts):
+    """Concatena arrays/textos elemento a elemento (arrays de object)."""
+    out = parts[0]
+    for part in parts[1:]:
+        out = out + part
+    return out
+
+
+def generate_cadastro(n_rows, seed=0) -> pd.DataFrame:
+    """Planilha de cadastro com ``n_rows`` linhas."""
+    rng = np.random.default_rng(seed)
+    numero = _join(
+        integer_strings(rng.integers(1000, 10000, n_rows)).astype(object),
+        "/",
+        integer_strings(rng.integers(2000, 2100, n_rows)).astype(object),
+    )
+    return pd.DataFrame({
+        "ID": np.arange(1, n_rows + 1),
+        "MUNICIPIO": rng.choice(municipios, n_rows),
+        "SITUAÇÃO": rng.choice(situacoes, n_rows),
+        "ANO": rng.choice(anos, n_rows),
+        "NUMERO": numero,
+        "INTERESSADO": rng.choice(interessados, n_rows),
+        "IMOVEL": rng.choice(imoveis, n_rows),
+        "PARCELA": rng.choice(parcelas, n_rows),
+        "GEORREF": rng.choice(georreferenciamento, n_rows),
+    }, columns=columns)
+
+
+def generate_roteiro(n_rows, seed=0, decimals=2) -> pd.DataFrame:
+    """Roteiro perimétrico com ``n_rows`` segmentos de uma poligonal aleatória.
+
+    As distâncias saem como texto (``"67,75 m"``, com ``decimals`` casas),
+    igual às planilhas de campo; coordenadas e fator K são números.
+    """
+    rng = np.random.default_rng(seed)
+    azimuth = rng.uniform(0, 360, n_rows)
+    distance = rng.uniform(1, 120, n_rows)
+
+    # Vértice inicial de cada segmento: soma acumulada dos segmentos anteriores
+    step_n = np.cos(np.radians(azimuth)) * distance
+    step_e = np.sin(np.radians(azimuth)) * distance
+    north = ORIGIN_N + np.concatenate(([0.0], np.cumsum(step_n)[:-1]))
+    east = ORIGIN_E + np.concatenate(([0.0], np.cumsum(step_e)[:-1]))
+
+    azimuth_seconds = np.round(azimuth * 3600)
+    degrees = (azimuth_seconds // 3600).astype(np.int64)
+    azimuth_text = _join(
+        integer_strings(degrees).astype(object), "°",
+        _pad2(((azimuth_seconds % 3600) // 60).astype(np.int64)), "'",
+        _pad2((azimuth_seconds % 60).astype(np.int64)), '"',
+    )
+
+    vertex = np.arange(1, n_rows + 1)
+    width = max(3, len(str(n_rows + 1)))
+    names = np.char.zfill(integer_strings(np.arange(1, n_rows + 2)), width).astype(object)
+    names = "M-" + names
+
+    latitude = ORIGIN_LAT + (north - ORIGIN_N) / METERS_PER_ARC_SECOND
+    longitude = ORIGIN_LON - (east - ORIGIN_E) / METERS_PER_ARC_SECOND
+
+    return pd.DataFrame({
+        "De": names[vertex - 1],
+        "Para": names[vertex],
+        "Coord. N(Y)": np.round(north, 2),
+        "Coord. E(X)": np.round(east, 2),
+        "Azimute": azimuth_text,
+        "Distância": format_units(to_units(distance, decimals)[0], decimals, ",", " m"),
+        "Fator K": np.round(1.0003 + rng.normal(0, 5e-5, n_rows), 8),
+        "Latitude": format_dms(-np.abs(latitude) / 3600, 6, "NS"),
+        "Longitude": format_dms(-np.abs(longitude) / 3600, 6, "EW"),
+    }, columns=roteiro_columns)
+
+
+GENERATORS = {
+    "cadastro": generate_cadastro,
+    "roteiro": generate_roteiro,
+}
+
+
+def write_workbook(df, path, chunk_size=50000):
+    """Grava ``df`` em .xlsx pelo escritor em fluxo (rápido até para 1M de linhas)."""
+    frames = (df.iloc[start : start + chunk_size] for start in range(0, len(df), chunk_size))
+    return write_xlsx_stream(path, frames, number_formats={}, rounding={})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera planilhas falsas para testes.")
+    parser.add_argument("--linhas", type=int, default=30)
+    parser.add_argument("--tipo", choices=sorted(GENERATORS), default="cadastro")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--saida", help="arquivo .xlsx; sem ele a tabela é só impressa")
+    args = parser.parse_args(argv)
+
+    # Criando o DataFrame
+    df = GENERATORS[args.tipo](args.linhas, args.semente)
+    if args.saida:
+        write_workbook(df, args.saida)
+        print(f"{len(df)} linhas gravadas em {args.saida}")
+    else:
+        print(df)
+
+
+if __name__ == "__main__":
+    main()
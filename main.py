@@ -1,26 +1,27 @@
+import json
 import os
 import sys
-import time
 import webbrowser
+from abc import ABCMeta, abstractmethod
+from collections import OrderedDict
 from getpass import getuser
 from pathlib import Path
 from datetime import datetime
-import comtypes.client # type: ignore
 import pandas as pd # type: ignore
-from docx import Document
-from docx.shared import Inches, Pt
-from docx.oxml.ns import nsdecls
-from docx.oxml import parse_xml
+from docx.shared import Inches
 from PyQt5 import QtCore, QtWidgets
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import QModelIndex, Qt
 from PyQt5.QtGui import QIcon
 from PyQt5.QtCore import QThread, pyqtSignal
 from PyQt5.QtWidgets import (
     QAction,
+    QActionGroup,
     QApplication,
     QFileDialog,
     QHBoxLayout,
+    QInputDialog,
     QLabel,
+    QComboBox,
     QLineEdit,
     QMainWindow,
     QPushButton,
@@ -31,20 +32,53 @@ from PyQt5.QtWidgets import (
     QTableView,
     QProgressBar,
 )
+from qtexpotool.batch import find_workbooks, run_batch
+from qtexpotool.cache import WorkbookCache
+from qtexpotool.compact import ChunkCompactor, compact_frame
+from qtexpotool.coords import check_coordinates
+from qtexpotool.daemon import (
+    FAILED,
+    FINISHED_STATES,
+    STATE_LABELS,
+    DaemonClient,
+    DaemonError,
+)
+from qtexpotool.docx_stream import export_docx_stream
+from qtexpotool.docx_writer import BulkTableWriter
+from qtexpotool.fixedpoint import DOWN, HALF_EVEN, HALF_UP
+from qtexpotool.fanout import export_targets
+from qtexpotool.incremental import IncrementalResult, export_docx_incremental
+from qtexpotool.ingest import iter_excel_chunks
+from qtexpotool.instrument import metrics
+from qtexpotool.pdf_writer import export_pdf_stream
+from qtexpotool.pipeline import docx_output_path
+from qtexpotool.progress import ProgressReporter, format_info
+from qtexpotool.render import (
+    DISTANCE_DECIMALS,
+    DMS_DECIMALS,
+    RenderedTable,
+    format_distance,
+    render_frame,
+    report_formatters,
+)
+from qtexpotool.shard import export_shards
+from qtexpotool.sheets import (
+    SHEET_COLUMN,
+    merge_sheets,
+    read_sheets,
+    sheet_columns,
+    sheet_names,
+    workbook_schemas,
+)
+from qtexpotool.stats import format_number, frame_stats, numeric_columns
+from qtexpotool.template import get_template
+from qtexpotool.view import RowView
+from qtexpotool.xlsx_writer import export_xlsx_stream, report_number_formats, report_rounding
 
 
 def timer_decorator(func):
-    def wrapper(*args, **kwargs):
-        start_time = time.time()
-        result = func(*args, **kwargs)
-        end_time = time.time()
-        elapsed_time = end_time - start_time
-        print(
-            f"[bold green]Tempo de execução: {elapsed_time:.2f} segundos[/bold green]"
-        )
-        return result
-
-    return wrapper
+    """Mede cada chamada como uma etapa das métricas (qtexpotool.instrument)"""
+    return metrics.timed()(func)
 
 
 def set_doc_margins(doc, top, right, bottom, left):
@@ -55,86 +89,589 @@ def set_doc_margins(doc, top, right, bottom, left):
     section.left_margin = Inches(left)
 
 
-class Worker(QThread):
+class ProgressWorker(QThread):
+    """Base dos workers: progresso limitado por passo e intervalo (qtexpotool.progress)
+
+    ``progress`` leva o percentual para a barra; ``progress_info`` leva o
+    ``ProgressInfo`` completo (taxa e tempo restante) para o texto da barra.
+    ``failed`` leva a mensagem de erro quando o trabalho não termina.
+    """
+
     progress = pyqtSignal(int)
+    progress_info = pyqtSignal(object)
+    failed = pyqtSignal(str)
 
-    def __init__(self, doc, df, chunk_size=1000):
-        super().__init__()
-        self.doc = doc
-        self.df = df
-        self.chunk_size = chunk_size
+    # Unidade da taxa mostrada na barra (None: só o tempo restante)
+    rate_unit = "linhas"
+    # Execução das métricas (metrics.begin) que recebe as medidas do trabalho
+    metrics_run = None
+
+    def reporter(self, total, step=1, interval=0.1):
+        return ProgressReporter(total, self._emit_progress, step=step, interval=interval)
+
+    def _emit_progress(self, info):
+        self.progress_info.emit(info)
+        self.progress.emit(info.percent)
+
+
+class _AbstractWorkerMeta(type(QThread), ABCMeta):
+    pass
+
+
+class ExportWorker(ProgressWorker, metaclass=_AbstractWorkerMeta):
+    """Base das exportações de um arquivo: ``done`` com o resultado ou ``failed`` com o erro
+
+    As subclasses implementam :meth:`export`, que devolve o resultado.
+    """
+
+    done = pyqtSignal(object)
+    # Formatadores de render_frame (None: os padrões do relatório)
+    formatters = None
 
     def run(self):
-        self.add_data_to_doc(self.doc, self.df, self.chunk_size)
+        try:
+            with metrics.profiled(self.metrics_run):
+                result = self.export()
+        except Exception as e:
+            self.failed.emit(f"{type(e).__name__}: {e}")
+            return
+        self.done.emit(result)
+
+    @abstractmethod
+    def export(self):
+        """Faz a exportação nesta thread e devolve o resultado emitido em ``done``"""
+
+    def render(self, table):
+        """Formata ``table`` nesta thread, se vier como DataFrame"""
+        if isinstance(table, pd.DataFrame):
+            with metrics.span("render"):
+                table = render_frame(table, self.formatters)
+        return table
 
-    def add_data_to_doc(self, doc, df, chunk_size):
-        if not isinstance(df, pd.DataFrame):
+
+class Worker(ExportWorker):
+    def __init__(self, docx_model, rendered, chunk_size=1000, docx_output=None,
+                 formatters=None):
+        super().__init__()
+        self.docx_model = docx_model
+        self.doc = None
+        self.template = None
+        self.rendered = rendered
+        self.chunk_size = chunk_size
+        self.docx_output = docx_output
+        self.formatters = formatters
+
+    def export(self):
+        self.rendered = self.render(self.rendered)
+        if not isinstance(self.rendered, RenderedTable):
+            return 0
+        # Modelo compilado uma vez por arquivo (qtexpotool.template): o
+        # documento já vem com o estilo e o cabeçalho da tabela
+        with metrics.span("template"):
+            self.template = get_template(self.docx_model, self.rendered.columns)
+            self.doc = self.template.new_document()
+        self.add_data_to_doc(self.doc, self.rendered, self.chunk_size)
+        if self.docx_output:
+            with metrics.span("save"):
+                self.doc.save(self.docx_output)
+            metrics.count("bytes", os.path.getsize(self.docx_output))
+        return len(self.rendered)
+
+    def add_data_to_doc(self, doc, rendered, chunk_size):
+        if not isinstance(rendered, RenderedTable):
             return
 
-        t_size = len(df)
+        t_size = len(rendered)
         num_chunks = (t_size + chunk_size - 1) // chunk_size  # Número de chunks
+        reporter = self.reporter(t_size)
         count = 0
 
         for i in range(num_chunks):
             count += 1
             start_row = i * chunk_size
             end_row = min((i + 1) * chunk_size, t_size)
-            df_chunk = df.iloc[start_row:end_row]
 
-            # Adicionar cabeçalho
+            # Cabeçalho já aplicado no modelo compilado
             if i == 0:
-                table = doc.tables[1]
-                table.style = "EstiloPadrao"
-                hdr_cells = table.rows[0].cells
-
-                for j, column in enumerate(df.columns):
-                    hdr_cells[j].text = column
-                    xml_bg_cinza = parse_xml(
-                        r'<w:shd {} w:fill="D9D9D9"/>'.format(nsdecls("w"))
-                    )
-                    hdr_cells[j]._element.get_or_add_tcPr().append(xml_bg_cinza)
-                    for paragraph in hdr_cells[j].paragraphs:
-                        for run in paragraph.runs:
-                            run.font.size = Pt(8)
-                            run.bold = True
-                        paragraph.alignment = 1
-
-            # Adicionar dados
-            for idx, (_, row) in enumerate(df_chunk.iterrows()):
-                t_rows = ((count - 1) * chunk_size) + idx
-                row_cells = table.add_row().cells
-
-                for j, value in enumerate(row):
-                    row_cells[j].text = str(value)
-                    for paragraph in row_cells[j].paragraphs:
-                        for run in paragraph.runs:
-                            run.font.size = Pt(8)
-                        paragraph.alignment = 1
-
-                # Atualizando a barra de progresso
-                progress_percentage = ((t_rows + 1) / t_size) * 100
-                self.progress.emit(int(progress_percentage))
+                table = self.template.table(doc)
+                writer = BulkTableWriter(table, self.template.prototypes)
+
+            # Adicionar dados (XML do lote inteiro montado de uma vez)
+            writer.append_rows(rendered.values[start_row:end_row].tolist())
+
+            # Atualizando a barra de progresso
+            reporter.update(end_row)
 
             doc.add_paragraph("")  # Adicionar uma quebra de linha entre os lotes
 
-        print("Processo concluído!")
+
+class StreamWorker(ExportWorker):
+    """Exporta o DOCX em fluxo, direto para o arquivo de saída"""
+
+    def __init__(self, rendered, docx_model, docx_output, chunk_size=1000, formatters=None):
+        super().__init__()
+        self.rendered = rendered
+        self.docx_model = docx_model
+        self.docx_output = docx_output
+        self.chunk_size = chunk_size
+        self.formatters = formatters
+
+    def export(self):
+        # Um DataFrame é formatado lote a lote, enquanto é escrito
+        return export_docx_stream(
+            self.rendered,
+            self.docx_model,
+            self.docx_output,
+            chunk_size=self.chunk_size,
+            progress=self.reporter(len(self.rendered)).update,
+            formatters=self.formatters,
+        )
+
+
+class IncrementalWorker(ExportWorker):
+    """Reexporta o DOCX refazendo só as linhas alteradas desde a última vez"""
+
+    def __init__(self, df, docx_model, docx_output, chunk_size=1000, decimals=2,
+                 rounding=HALF_EVEN, dms_decimals=None):
+        super().__init__()
+        self.df = df
+        self.docx_model = docx_model
+        self.docx_output = docx_output
+        self.chunk_size = chunk_size
+        self.decimals = decimals
+        self.rounding = rounding
+        self.dms_decimals = dms_decimals
+
+    def export(self):
+        return export_docx_incremental(
+            self.df,
+            self.docx_model,
+            self.docx_output,
+            chunk_size=self.chunk_size,
+            progress=self.reporter(len(self.df)).update,
+            decimals=self.decimals,
+            rounding=self.rounding,
+            dms_decimals=self.dms_decimals,
+        )
+
+
+class PdfWorker(ExportWorker):
+    """Exporta o PDF página a página, sem passar pelo Word"""
+
+    def __init__(self, rendered, pdf_output, chunk_size=1000, formatters=None):
+        super().__init__()
+        self.rendered = rendered
+        self.pdf_output = pdf_output
+        self.chunk_size = chunk_size
+        self.formatters = formatters
+
+    def export(self):
+        self.rendered = self.render(self.rendered)
+        return export_pdf_stream(
+            self.rendered,
+            self.pdf_output,
+            chunk_size=self.chunk_size,
+            progress=self.reporter(len(self.rendered)).update,
+        )
+
+
+class XlsxWorker(ExportWorker):
+    """Exporta a planilha em fluxo, com as distâncias como números"""
+
+    def __init__(self, df, xlsx_output, chunk_size=10000, number_formats=None, rounding=None):
+        super().__init__()
+        self.df = df
+        self.xlsx_output = xlsx_output
+        self.chunk_size = chunk_size
+        self.number_formats = number_formats
+        self.rounding = rounding
+
+    def export(self):
+        return export_xlsx_stream(
+            self.df,
+            self.xlsx_output,
+            chunk_size=self.chunk_size,
+            number_formats=self.number_formats,
+            progress=self.reporter(len(self.df)).update,
+            rounding=self.rounding,
+        )
+
+
+class BatchWorker(ProgressWorker):
+    """Exporta várias planilhas em paralelo, um processo por núcleo"""
+
+    done = pyqtSignal(list)
+    rate_unit = None  # o progresso do lote é por tamanho de arquivo, não por linha
+
+    def __init__(self, workbooks, docx_model, output_dir, memory_limit_mb=None, decimals=2,
+                 rounding=HALF_EVEN, dms_decimals=None):
+        super().__init__()
+        self.workbooks = workbooks
+        self.docx_model = docx_model
+        self.output_dir = output_dir
+        self.memory_limit_mb = memory_limit_mb
+        self.decimals = decimals
+        self.rounding = rounding
+        self.dms_decimals = dms_decimals
+
+    def run(self):
+        try:
+            results = run_batch(
+                self.workbooks,
+                self.docx_model,
+                self.output_dir,
+                memory_limit_mb=self.memory_limit_mb,
+                progress=self.reporter(100).update,
+                cancelled=self.isInterruptionRequested,
+                decimals=self.decimals,
+                rounding=self.rounding,
+                dms_decimals=self.dms_decimals,
+            )
+        except Exception as e:
+            self.failed.emit(f"{type(e).__name__}: {e}")
+            return
+        self.done.emit(results)
+
+
+class ShardWorker(ProgressWorker):
+    """Exporta o DOCX em partes (por grupo e/ou a cada N linhas), em paralelo"""
+
+    done = pyqtSignal(list)
+
+    def __init__(self, df, docx_model, output_dir, stem, group_by=None, max_rows=None,
+                 keep_group=True, decimals=2, rounding=HALF_EVEN, columns=None,
+                 dms_decimals=None):
+        super().__init__()
+        self.df = df
+        self.docx_model = docx_model
+        self.output_dir = output_dir
+        self.stem = stem
+        self.group_by = group_by
+        self.max_rows = max_rows
+        self.keep_group = keep_group
+        self.columns = columns
+        self.decimals = decimals
+        self.rounding = rounding
+        self.dms_decimals = dms_decimals
+
+    def run(self):
+        try:
+            with metrics.profiled(self.metrics_run):
+                results = export_shards(
+                    self.df,
+                    self.docx_model,
+                    self.output_dir,
+                    group_by=self.group_by,
+                    max_rows=self.max_rows,
+                    stem=self.stem,
+                    progress=self.reporter(len(self.df)).update,
+                    cancelled=self.isInterruptionRequested,
+                    keep_group=self.keep_group,
+                    columns=self.columns,
+                    decimals=self.decimals,
+                    rounding=self.rounding,
+                    dms_decimals=self.dms_decimals,
+                )
+        except Exception as e:
+            self.failed.emit(f"{type(e).__name__}: {e}")
+            return
+        self.done.emit(results)
+
+
+class ExportAllWorker(ProgressWorker):
+    """Exporta DOCX, XLSX e PDF ao mesmo tempo, um processo por formato"""
+
+    done = pyqtSignal(dict)
+
+    def __init__(self, df, outputs, docx_model, decimals=2, rounding=HALF_EVEN,
+                 dms_decimals=None):
+        super().__init__()
+        self.df = df
+        self.outputs = outputs
+        self.docx_model = docx_model
+        self.decimals = decimals
+        self.rounding = rounding
+        self.dms_decimals = dms_decimals
+
+    def run(self):
+        try:
+            # A tabela é formatada aqui dentro, fora da thread da interface
+            with metrics.profiled(self.metrics_run):
+                results = export_targets(
+                    self.df,
+                    self.outputs,
+                    self.docx_model,
+                    progress=self.reporter(len(self.df) * len(self.outputs)).update,
+                    cancelled=self.isInterruptionRequested,
+                    decimals=self.decimals,
+                    rounding=self.rounding,
+                    dms_decimals=self.dms_decimals,
+                )
+        except Exception as e:
+            self.failed.emit(f"{type(e).__name__}: {e}")
+            return
+        self.done.emit(results)
+
+
+class DaemonJobWorker(ProgressWorker):
+    """Acompanha um trabalho enviado ao serviço local até ele terminar"""
+
+    done = pyqtSignal(dict)
+    rate_unit = None
+
+    def __init__(self, client, job_id, poll=0.2):
+        super().__init__()
+        self.client = client
+        self.job_id = job_id
+        self.poll = poll
+
+    def run(self):
+        reporter = self.reporter(100)
+        try:
+            while True:
+                job = self.client.status(self.job_id, wait=self.poll)
+                if self.isInterruptionRequested():
+                    self.client.cancel(self.job_id)
+                reporter.update(job["progress"])
+                if job["state"] in FINISHED_STATES:
+                    break
+        except DaemonError as e:
+            job = {"state": FAILED, "error": str(e), "results": {}}
+        self.done.emit(job)
+
+
+class ImportWorker(ProgressWorker):
+    """Lê a planilha em lotes fora da thread da interface"""
+
+    first_chunk = pyqtSignal(object)
+    loaded = pyqtSignal(object)
+    # Falha do cache: a leitura segue sem ele, mas a interface avisa
+    cache_failed = pyqtSignal(str)
+
+    def __init__(self, file_path, cache=None, chunk_size=20000, first_chunk_size=1000,
+                 compact=True, all_sheets=False):
+        super().__init__()
+        self.file_path = file_path
+        self.all_sheets = all_sheets
+        self.cache = cache
+        self.chunk_size = chunk_size
+        self.first_chunk_size = first_chunk_size
+        self.compact = compact
+        self.compact_report = None
+        self.invalid_numbers = {}
+        self.total_rows = 0
+
+    def set_total(self, total_rows):
+        self.total_rows = total_rows
+
+    def run(self):
+        with metrics.profiled(self.metrics_run):
+            self.read()
+
+    def compacted(self, df):
+        """Categorias, strings do Arrow e números menores (qtexpotool.compact)"""
+        if not self.compact:
+            return df
+        with metrics.span("compact"):
+            df, self.compact_report = compact_frame(df)
+        metrics.count("bytes_saved", self.compact_report.saved)
+        return df
+
+    def cache_variant(self, variant=""):
+        """A forma compacta entra na chave do cache: ligar/desligar relê a planilha"""
+        return f"{variant}|compacto" if self.compact else variant
+
+    def cache_key(self, variant=""):
+        """Chave do cache, calculada uma vez por leitura (o hash lê o arquivo inteiro)"""
+        if self.cache is None:
+            return None
+        try:
+            with metrics.span("cache"):
+                return self.cache.key(self.file_path, self.cache_variant(variant))
+        except Exception as e:
+            self.cache_failed.emit(f"{type(e).__name__}: {e}")
+            return None
+
+    def cache_get(self, key):
+        if key is None:
+            return None
+        try:
+            with metrics.span("cache"):
+                return self.cache.get(self.file_path, key=key)
+        except Exception as e:
+            self.cache_failed.emit(f"{type(e).__name__}: {e}")
+            return None
+
+    def cache_put(self, key, df):
+        if key is None:
+            return
+        try:
+            with metrics.span("cache"):
+                self.cache.put(self.file_path, df, key=key)
+        except Exception as e:
+            self.cache_failed.emit(f"{type(e).__name__}: {e}")
+
+    def read(self):
+        if self.all_sheets:
+            self.read_all_sheets()
+            return
+        # Planilha sem alterações desde a última leitura: vem do cache, já
+        # compactada (ou não) como pedido
+        key = self.cache_key()
+        df = self.cache_get(key)
+        if df is not None:
+            metrics.count("rows", len(df))
+            self.reporter(len(df)).update(len(df), force=True)
+            self.loaded.emit(df)
+            return
+
+        # Cada lote é compactado assim que chega, antes de ler o próximo
+        compactor = ChunkCompactor() if self.compact else None
+        chunks = []
+        rows_read = 0
+        reporter = self.reporter(0)
+        reader = iter_excel_chunks(
+            self.file_path,
+            chunk_size=self.chunk_size,
+            first_chunk_size=self.first_chunk_size,
+            on_total=self.set_total,
+            invalid=self.invalid_numbers,
+        )
+        try:
+            with metrics.span("read"):
+                for chunk in reader:
+                    # Cancelamento pedido pela interface
+                    if self.isInterruptionRequested():
+                        reader.close()
+                        return
+                    if not rows_read:
+                        self.first_chunk.emit(chunk)
+                    rows_read += len(chunk)
+                    if compactor is not None:
+                        with metrics.span("compact"):
+                            compactor.add(chunk)
+                    else:
+                        chunks.append(chunk)
+                    if self.total_rows:
+                        reporter.set_total(self.total_rows)
+                        reporter.update(rows_read)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+
+        if not self.isInterruptionRequested() and rows_read:
+            with metrics.span("concat"):
+                if compactor is not None:
+                    df, self.compact_report = compactor.frame()
+                    metrics.count("bytes_saved", self.compact_report.saved)
+                else:
+                    df = pd.concat(chunks, ignore_index=True)
+            chunks.clear()
+            metrics.count("rows", len(df))
+            self.loaded.emit(df)
+            self.cache_put(key, df)
+
+    def read_all_sheets(self):
+        """Todas as abas em paralelo (qtexpotool.sheets), juntas com a coluna da aba"""
+        self.rate_unit = None  # o progresso é por aba, não por linha
+        try:
+            schemas = workbook_schemas(self.file_path)
+            # O esquema entra na chave: mudar o .esquema.json relê a planilha
+            key = self.cache_key(f"abas:{json.dumps(schemas, sort_keys=True)}")
+            df = self.cache_get(key)
+            if df is None:
+                sheets = sheet_names(self.file_path)
+                reporter = self.reporter(len(sheets))
+                with metrics.span("read"):
+                    frames = read_sheets(
+                        self.file_path,
+                        sheets,
+                        schemas,
+                        progress=reporter.update,
+                        cancelled=self.isInterruptionRequested,
+                    )
+                if self.isInterruptionRequested():
+                    return
+                with metrics.span("concat"):
+                    df = merge_sheets(frames)
+                frames.clear()
+                df = self.compacted(df)
+                if not df.empty:
+                    self.cache_put(key, df)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        metrics.count("rows", len(df))
+        self.reporter(len(df)).update(len(df), force=True)
+        self.loaded.emit(df)
 
 
 class TableModel(QtCore.QAbstractTableModel):
-    def __init__(self, data, headers):
+    """Modelo virtual sobre o DataFrame.
+
+    Nada é copiado para listas: as linhas são formatadas sob demanda, em
+    páginas de ``page_size`` linhas guardadas num pequeno cache LRU, e o
+    QTableView recebe as linhas aos poucos via ``canFetchMore``/``fetchMore``.
+    """
+
+    def __init__(self, df, rows=None, formatters=None, page_size=256, max_pages=64,
+                 batch_size=10000):
         super(TableModel, self).__init__()
-        self._data = data
-        self._headers = headers
+        # ``rows``: posições das linhas visíveis, já ordenadas/filtradas
+        self._df = df
+        self._rows = rows
+        self._formatters = formatters
+        self._headers = [str(column) for column in df.columns]
+        self._page_size = page_size
+        self._max_pages = max_pages
+        self._batch_size = batch_size
+        self._pages = OrderedDict()
+        self._total = len(df) if rows is None else len(rows)
+        self._loaded = min(self._total, batch_size)
+
+    def _row_values(self, row):
+        page, offset = divmod(row, self._page_size)
+        values = self._pages.get(page)
+        if values is None:
+            start = page * self._page_size
+            if self._rows is None:
+                chunk = self._df.iloc[start : start + self._page_size]
+            else:
+                chunk = self._df.take(self._rows[start : start + self._page_size])
+            values = render_frame(chunk, self._formatters).values
+            self._pages[page] = values
+            if len(self._pages) > self._max_pages:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(page)
+        return values[offset]
 
     def data(self, index, role):
         if role == Qt.DisplayRole:
-            return self._data[index.row()][index.column()]
+            return self._row_values(index.row())[index.column()]
+
+    def rowCount(self, index=QModelIndex()):
+        if index.isValid():
+            return 0
+        return self._loaded
+
+    def columnCount(self, index=QModelIndex()):
+        if index.isValid():
+            return 0
+        return len(self._headers)
 
-    def rowCount(self, index):
-        return len(self._data)
+    def canFetchMore(self, index):
+        return not index.isValid() and self._loaded < self._total
 
-    def columnCount(self, index):
-        return len(self._data[0])
+    def fetchMore(self, index):
+        if index.isValid():
+            return
+        count = min(self._batch_size, self._total - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
 
     def setHeaderData(self, section, orientation, value, role=Qt.DisplayRole):
         if role == Qt.DisplayRole:
@@ -147,22 +684,27 @@ class TableModel(QtCore.QAbstractTableModel):
         if role == Qt.DisplayRole:
             if orientation == Qt.Horizontal:
                 return self._headers[section]
+            # Número da linha na planilha, mesmo com ordenação/filtro
+            if self._rows is not None:
+                return int(self._rows[section]) + 1
+            return section + 1
 
     @staticmethod
     def formatValuesDataFrame(df_column: pd.Series) -> pd.Series:
-        return (
-            df_column.str.replace(",", ".")
-            .str.replace(" m", "")
-            .astype(float)
-            .round(2)
-            .apply(lambda x: f"{x:.2f} m".replace(".", ","))
-        )
+        return pd.Series(format_distance(df_column), index=df_column.index)
 
 
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.df = None
+        # Casas e arredondamento da Distância e casas do DMS das coordenadas
+        # no relatório (menu Arquivo); None: coordenadas como na planilha
+        self.decimals = 2
+        self.rounding = HALF_EVEN
+        self.dms_decimals = None
+        self.formatters = report_formatters(self.decimals, self.rounding, self.dms_decimals)
+        self.workbook_cache = WorkbookCache()
         self.rootdir = Path(__file__).parent
         self.icons_folder = rf"{self.rootdir}\src\icons"
 
@@ -180,6 +722,7 @@ class MainWindow(QMainWindow):
         menubar = self.menuBar()
 
         file_menu = menubar.addMenu("Arquivo")
+        self.stats_menu = menubar.addMenu("Estatísticas")
         about_menu = menubar.addMenu("Ajuda")
 
         import_xlsx_action  = QAction(QIcon(rf"{self.icons_folder}\select_xlsx.ico"), "Importar .xlsx", self)
@@ -191,6 +734,89 @@ class MainWindow(QMainWindow):
         about_action        = QAction(QIcon(rf"{self.icons_folder}\about.ico"), "Sobre", self)
         github_action       = QAction(QIcon(rf"{self.icons_folder}\github.ico"), "Github", self)
 
+        # Exportação DOCX em fluxo: as linhas vão direto para o arquivo, sem
+        # montar o documento inteiro em memória
+        self.stream_export_action = QAction("Exportar .docx em fluxo (pouca memória)", self)
+        self.stream_export_action.setCheckable(True)
+        self.stream_export_action.setChecked(True)
+
+        # Reexportação incremental: mesmo arquivo de saída por planilha, com
+        # as linhas da exportação anterior guardadas ao lado (.linhas)
+        self.incremental_export_action = QAction("Reexportar .docx só com as linhas alteradas", self)
+        self.incremental_export_action.setCheckable(True)
+
+        self.export_filtered_action = QAction("Exportar apenas as linhas filtradas", self)
+        self.export_filtered_action.setCheckable(True)
+
+        # Categorias e tipos menores na importação: planilhas maiores na mesma memória
+        self.compact_action = QAction("Compactar a tabela na importação", self)
+        self.compact_action.setCheckable(True)
+        self.compact_action.setChecked(True)
+
+        # Todas as abas, lidas em paralelo e juntas com a coluna "Aba"
+        self.all_sheets_action = QAction("Importar todas as abas", self)
+        self.all_sheets_action.setCheckable(True)
+
+        clear_cache_action = QAction("Limpar cache de planilhas", self)
+        clear_cache_action.triggered.connect(self.f_clear_cache)
+
+        # Tempos por etapa na barra de status e no log JSONL de métricas
+        self.metrics_action = QAction("Registrar métricas de desempenho", self)
+        self.metrics_action.setCheckable(True)
+        self.metrics_action.setChecked(metrics.enabled)
+        self.metrics_action.toggled.connect(self.toggle_metrics)
+
+        # Exportação em lote: várias planilhas contra o mesmo modelo
+        batch_files_action = QAction("Exportar lote (arquivos)...", self)
+        batch_folder_action = QAction("Exportar lote (pasta)...", self)
+        batch_files_action.triggered.connect(self.f_batch_files)
+        batch_folder_action.triggered.connect(self.f_batch_folder)
+
+        # Um documento por grupo e/ou a cada N linhas, com índice
+        export_shards_action = QAction("Exportar .docx dividido...", self)
+        export_shards_action.triggered.connect(self.f_export_shards)
+
+        # Distância com 2 ou 3 casas e o modo de arredondamento, em todos os formatos
+        distance_menu = QMenu("Distância no relatório", self)
+        self.decimals_group = QActionGroup(self)
+        for decimals in DISTANCE_DECIMALS:
+            action = distance_menu.addAction(f"{decimals} casas decimais")
+            action.setCheckable(True)
+            action.setData(decimals)
+            action.setChecked(decimals == self.decimals)
+            self.decimals_group.addAction(action)
+        distance_menu.addSeparator()
+        self.rounding_group = QActionGroup(self)
+        for rounding, label in (
+            (HALF_EVEN, "Arredondar para o par (NBR 5891)"),
+            (HALF_UP, "Arredondar meio para cima"),
+            (DOWN, "Truncar"),
+        ):
+            action = distance_menu.addAction(label)
+            action.setCheckable(True)
+            action.setData(rounding)
+            action.setChecked(rounding == self.rounding)
+            self.rounding_group.addAction(action)
+        self.decimals_group.triggered.connect(self.set_report_format)
+        self.rounding_group.triggered.connect(self.set_report_format)
+
+        # Latitude/Longitude como na planilha ou em DMS normalizado com N casas
+        coordinates_menu = QMenu("Coordenadas no relatório", self)
+        self.dms_group = QActionGroup(self)
+        for dms_decimals in (None, *DMS_DECIMALS):
+            label = ("Como na planilha" if dms_decimals is None
+                     else f"DMS com {dms_decimals} casas nos segundos")
+            action = coordinates_menu.addAction(label)
+            action.setCheckable(True)
+            action.setData(dms_decimals)
+            action.setChecked(dms_decimals == self.dms_decimals)
+            self.dms_group.addAction(action)
+        self.dms_group.triggered.connect(self.set_report_format)
+
+        # Serviço local (python -m qtexpotool serve): processos já aquecidos
+        daemon_export_action = QAction("Exportar pelo serviço local", self)
+        daemon_export_action.triggered.connect(self.f_export_daemon)
+
         import_xlsx_action.triggered.connect(self.f_import_excel)
         import_docxmodel_action.triggered.connect(self.f_import_docxmodel)
         export_xlsx_action.triggered.connect(self.f_export_xlsx)
@@ -206,19 +832,90 @@ class MainWindow(QMainWindow):
         file_menu.addAction(export_xlsx_action)
         file_menu.addAction(export_docx_action)
         file_menu.addAction(export_pdf_action)
+        file_menu.addAction(export_shards_action)
+        file_menu.addAction(daemon_export_action)
+        file_menu.addAction(batch_files_action)
+        file_menu.addAction(batch_folder_action)
+        file_menu.addSeparator()
+        file_menu.addAction(self.stream_export_action)
+        file_menu.addAction(self.incremental_export_action)
+        file_menu.addAction(self.export_filtered_action)
+        file_menu.addMenu(distance_menu)
+        file_menu.addMenu(coordinates_menu)
+        file_menu.addAction(self.compact_action)
+        file_menu.addAction(self.all_sheets_action)
+        file_menu.addAction(clear_cache_action)
+        file_menu.addAction(self.metrics_action)
         file_menu.addSeparator()
         file_menu.addAction(exit_action)
         about_menu.addAction(about_action)
         about_menu.addAction(github_action)
 
-    def save_doc(self, doc, docx_output):
-        doc.save(docx_output)
+        # Colunas numéricas marcadas para as estatísticas (Distância por padrão)
+        self.stats_columns = ["Distância"]
+        self.stats = {}
+        self.bad_coordinates = {}
+        self.update_stats_menu()
+
+    def start_export(self, worker, output, run=None):
+        """Liga a barra e os sinais de um ExportWorker e começa a exportação
+
+        ``run`` é a execução das métricas (``metrics.begin``) desta exportação.
+        """
+        self.worker = worker
+        worker.metrics_run = run
+        self.connect_progress(worker)
+        worker.done.connect(lambda result: self.docx_exported(output, result, run))
+        worker.failed.connect(lambda message: self.export_failed(message, run))
+        worker.start()
+
+    def docx_exported(self, docx_output, result=None, run=None):
+        record = metrics.end(run)
+        if record is not None:
+            self.statusBar().showMessage(metrics.summary(record))
+        if isinstance(result, IncrementalResult):
+            self.statusBar().showMessage(
+                f"{result.reused} linhas reaproveitadas, {result.rendered} refeitas, "
+                f"{result.removed} removidas"
+            )
         QtWidgets.QMessageBox.information(
             self,
             "Exportação",
             Rf"Dados exportados com sucesso para: {docx_output}",
         )
-        self.worker.progress.emit(int(0))
+        self.updateProgress(0)
+
+    def export_failed(self, message, run=None):
+        metrics.end(run, error=message)
+        self.updateProgress(0)
+        self.statusBar().showMessage("Exportação interrompida")
+        QtWidgets.QMessageBox.critical(
+            self, "Exportação", f"Não foi possível exportar: {message}"
+        )
+
+    def set_report_format(self):
+        """Aplica o formato da Distância e das coordenadas escolhido no menu"""
+        self.decimals = self.decimals_group.checkedAction().data()
+        self.rounding = self.rounding_group.checkedAction().data()
+        self.dms_decimals = self.dms_group.checkedAction().data()
+        self.formatters = report_formatters(self.decimals, self.rounding, self.dms_decimals)
+        if not isinstance(self.df, pd.DataFrame):
+            return
+        self.stats = frame_stats(self.df, self.stats_columns, self.decimals, self.rounding)
+        if self.row_view is not None:
+            # O filtro de texto procura no texto exibido, que mudou
+            self.row_view.formatters = self.formatters
+            self.apply_filter()
+
+    def toggle_metrics(self, checked):
+        if checked:
+            metrics.enable(profiler=metrics.profiler)
+            # Os processos da exportação em lote leem a mesma opção
+            os.environ["QTEXPOTOOL_METRICS"] = metrics.profiler or "1"
+            self.statusBar().showMessage(f"Métricas gravadas em {metrics.log_path}")
+        else:
+            metrics.disable()
+            os.environ.pop("QTEXPOTOOL_METRICS", None)
 
     def f_github(self):
         url = "https://github.com/DesignerDjalma/QtExpoTool"
@@ -251,17 +948,36 @@ class MainWindow(QMainWindow):
 
         if not self.df.empty:
             docx_output = rf"{self.export_path.text()}/DOCUMENTO_{datetime.now().strftime('%H%M%S')}.docx"
-            docx = Document(self.docxmodel_path.text())
 
-            # Configura o Worker e a barra de progresso
-            self.worker = Worker(docx, self.df)
-            self.worker.progress.connect(self.updateProgress)
-
-            # Inicia o processamento
-            self.worker.start()
-
-            # Aguarda a conclusão do processamento
-            self.worker.finished.connect(lambda: self.save_doc(docx, docx_output))
+            run = metrics.begin("export_docx")
+            if self.incremental_export_action.isChecked() and self.excel_path.text():
+                docx_output = str(docx_output_path(self.excel_path.text(), self.export_path.text()))
+                self.start_export(
+                    IncrementalWorker(self.export_frame(), self.docxmodel_path.text(), docx_output,
+                                      decimals=self.decimals, rounding=self.rounding,
+                                      dms_decimals=self.dms_decimals),
+                    docx_output,
+                    run,
+                )
+                return
+
+            # A tabela é formatada no worker, não na thread da interface
+            if self.stream_export_action.isChecked():
+                self.start_export(
+                    StreamWorker(self.export_frame(), self.docxmodel_path.text(), docx_output,
+                                 formatters=self.formatters),
+                    docx_output,
+                    run,
+                )
+                return
+
+            # Documento montado em memória pelo python-docx
+            self.start_export(
+                Worker(self.docxmodel_path.text(), self.export_frame(), docx_output=docx_output,
+                       formatters=self.formatters),
+                docx_output,
+                run,
+            )
         else:
             QtWidgets.QMessageBox.warning(self, "Aviso", "Nenhum dado para exportar!")
 
@@ -276,13 +992,16 @@ class MainWindow(QMainWindow):
             return
         if not isinstance(self.df, pd.DataFrame):
             return
-        df_export = self.df.copy()
         xlsx_output = rf"{self.export_path.text()}/PLANILHA_{datetime.now().strftime('%H%M%S')}.xlsx"
-        df_export.to_excel(xlsx_output, index=False)
-        QtWidgets.QMessageBox.information(
-            self.iface.mainWindow(),
-            "Exportação",
-            f"Dados exportados com sucesso para: {xlsx_output}",
+
+        # Sem cópia do DataFrame: os lotes são fatias lidas direto dele
+        run = metrics.begin("export_xlsx")
+        self.start_export(
+            XlsxWorker(self.export_frame(), xlsx_output,
+                       number_formats=report_number_formats(self.decimals),
+                       rounding=report_rounding(self.decimals, self.rounding)),
+            xlsx_output,
+            run,
         )
 
     def f_export_pdf(self):
@@ -295,14 +1014,153 @@ class MainWindow(QMainWindow):
             return
         if not isinstance(self.df, pd.DataFrame):
             return
+        if self.df.empty:
+            QtWidgets.QMessageBox.warning(self, "Aviso", "Nenhum dado para exportar!")
+            return
         pdf_output = (
             rf"{self.export_path.text()}/PDF_{datetime.now().strftime('%H%M%S')}.pdf"
         )
-        QtWidgets.QMessageBox.critical(
+        run = metrics.begin("export_pdf")
+        self.start_export(
+            PdfWorker(self.export_frame(), pdf_output, formatters=self.formatters), pdf_output, run
+        )
+
+    def f_batch_files(self):
+        options = QFileDialog.Options()
+        file_paths, _ = QFileDialog.getOpenFileNames(
             self,
-            "Exportação",
-            Rf"Função não implementada ainda, em breve em atualizações.",
+            "Selecione as Planilhas Excel",
+            "",
+            "Excel Files (*.xlsx; *.xls)",
+            options=options,
+        )
+        if file_paths:
+            self.start_batch(find_workbooks(file_paths))
+
+    def f_batch_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Selecione a Pasta das Planilhas")
+        if folder:
+            self.start_batch(find_workbooks(folder))
+
+    def start_batch(self, workbooks):
+        if not self.export_path.text():
+            QtWidgets.QMessageBox.warning(
+                self,
+                "Local da exportação",
+                Rf"Nenhum pasta de exportação foi selecionada! Selecione uma pasta de exportação.",
+            )
+            return
+        if not self.docxmodel_path.text():
+            QtWidgets.QMessageBox.warning(
+                self, "Modelo", "Nenhum documento Word de modelo foi selecionado!"
+            )
+            return
+        if not workbooks:
+            QtWidgets.QMessageBox.warning(self, "Aviso", "Nenhuma planilha encontrada!")
+            return
+        worker = getattr(self, "batch_worker", None)
+        if worker is not None and worker.isRunning():
+            QtWidgets.QMessageBox.warning(self, "Aviso", "Já existe um lote em andamento!")
+            return
+
+        self.statusBar().showMessage(f"Exportando lote de {len(workbooks)} planilhas...")
+        self.batch_worker = worker = BatchWorker(
+            workbooks, self.docxmodel_path.text(), self.export_path.text(),
+            decimals=self.decimals, rounding=self.rounding, dms_decimals=self.dms_decimals,
+        )
+        worker.metrics_run = metrics.begin("batch", workbooks=len(workbooks))
+        self.connect_progress(worker)
+        worker.done.connect(self.batch_exported)
+        worker.failed.connect(lambda message: self.export_failed(message, worker.metrics_run))
+        worker.start()
+
+    def batch_exported(self, results):
+        metrics.end(self.batch_worker.metrics_run)
+        self.updateProgress(0)
+        failed = [result for result in results if not result.ok]
+        lines = [f"{len(results) - len(failed)} de {len(results)} planilhas exportadas."]
+        lines += [f"{Path(result.source).name}: {result.error}" for result in failed]
+        self.statusBar().showMessage(lines[0])
+        QtWidgets.QMessageBox.information(self, "Exportação em lote", "\n".join(lines))
+
+    def f_export_shards(self):
+        if not self.export_path.text():
+            QtWidgets.QMessageBox.warning(
+                self,
+                "Local da exportação",
+                Rf"Nenhum pasta de exportação foi selecionada! Selecione uma pasta de exportação.",
+            )
+            return
+        if not self.docxmodel_path.text():
+            QtWidgets.QMessageBox.warning(
+                self, "Modelo", "Nenhum documento Word de modelo foi selecionado!"
+            )
+            return
+        if not isinstance(self.df, pd.DataFrame) or self.df.empty:
+            QtWidgets.QMessageBox.warning(self, "Aviso", "Nenhum dado para exportar!")
+            return
+
+        no_group = "(nenhuma)"
+        columns = [no_group] + [str(column) for column in self.df.columns]
+        # Planilha com todas as abas: um documento por aba, de saída
+        current = columns.index(SHEET_COLUMN) if SHEET_COLUMN in self.df.columns else 0
+        group_by, ok = QInputDialog.getItem(
+            self, "Exportar dividido", "Um documento para cada valor da coluna:", columns,
+            current, False,
+        )
+        if not ok:
+            return
+        max_rows, ok = QInputDialog.getInt(
+            self, "Exportar dividido", "Máximo de linhas por documento (0 = sem limite):",
+            50000, 0, 10**9, 1000,
+        )
+        if not ok:
+            return
+        if group_by == no_group and not max_rows:
+            QtWidgets.QMessageBox.warning(
+                self, "Aviso", "Escolha uma coluna ou um máximo de linhas para dividir!"
+            )
+            return
+
+        group_by = None if group_by == no_group else self.df.columns[columns.index(group_by) - 1]
+        frame = self.export_frame(keep_sheet=group_by == SHEET_COLUMN)
+        stem = f"DOCUMENTO_{datetime.now().strftime('%H%M%S')}"
+        self.statusBar().showMessage("Exportando documentos divididos...")
+        self.shard_worker = worker = ShardWorker(
+            frame,
+            self.docxmodel_path.text(),
+            self.export_path.text(),
+            stem,
+            group_by=group_by,
+            max_rows=max_rows or None,
+            # A coluna da aba separa os documentos, mas não existe no modelo;
+            # cada documento leva as colunas da sua aba
+            keep_group=group_by != SHEET_COLUMN,
+            columns=sheet_columns(self.df) if group_by == SHEET_COLUMN else None,
+            decimals=self.decimals,
+            rounding=self.rounding,
+            dms_decimals=self.dms_decimals,
+        )
+        worker.metrics_run = metrics.begin("export_shards", rows=len(frame))
+        self.connect_progress(worker)
+        worker.done.connect(self.shards_exported)
+        worker.failed.connect(lambda message: self.export_failed(message, worker.metrics_run))
+        worker.start()
+
+    def shards_exported(self, results):
+        record = metrics.end(self.shard_worker.metrics_run)
+        self.updateProgress(0)
+        failed = [result for result in results if not result.ok]
+        lines = [f"{len(results) - len(failed)} de {len(results)} documentos exportados."]
+        lines += [f"{result.source}: {result.error}" for result in failed]
+        self.statusBar().showMessage(
+            f"{lines[0]} {metrics.summary(record)}" if record else lines[0]
         )
+        QtWidgets.QMessageBox.information(self, "Exportação dividida", "\n".join(lines))
+
+    def f_clear_cache(self):
+        self.workbook_cache.clear()
+        self.statusBar().showMessage("Cache de planilhas apagado")
 
     def f_about(self):
         QtWidgets.QMessageBox.information(
@@ -344,13 +1202,39 @@ class MainWindow(QMainWindow):
         toolbar.addAction(github_action)
 
     def create_central_widget(self):
-        self.table_initial_data = [["Aguardando", "Dados do", "Usuário"]]
-        self.table = QTableView()
-        self.model = TableModel(
-            self.table_initial_data, ["Coluna A", "Coluna B", "Coluna C"]
+        self.table_initial_data = pd.DataFrame(
+            [["Aguardando", "Dados do", "Usuário"]],
+            columns=["Coluna A", "Coluna B", "Coluna C"],
         )
+        self.table = QTableView()
+        self.model = TableModel(self.table_initial_data)
         self.table.setModel(self.model)
 
+        # Ordenação ao clicar no cabeçalho (argsort em NumPy, ver RowView)
+        self.row_view = None
+        self.table.horizontalHeader().setSortIndicatorShown(False)
+        self.table.horizontalHeader().sectionClicked.connect(self.sort_by_column)
+
+        # Section: Filtro da tabela
+        self.filter_layout = QHBoxLayout()
+        self.filter_label = QLabel("Filtro:")
+        self.filter_label.setMinimumWidth(100)
+        self.filter_column = QComboBox()
+        self.filter_column.addItem("Todas as colunas")
+        self.filter_text = QLineEdit()
+        self.filter_text.setPlaceholderText("Texto ou intervalo (ex.: 10..20)")
+        self.filter_text.returnPressed.connect(self.apply_filter)
+        self.filter_column.currentIndexChanged.connect(self.apply_filter)
+
+        self.filter_clear_button = QToolButton()
+        self.filter_clear_button.setText("Limpar")
+        self.filter_clear_button.clicked.connect(self.clear_filter)
+
+        self.filter_layout.addWidget(self.filter_label)
+        self.filter_layout.addWidget(self.filter_column)
+        self.filter_layout.addWidget(self.filter_text)
+        self.filter_layout.addWidget(self.filter_clear_button)
+
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
 
@@ -359,7 +1243,7 @@ class MainWindow(QMainWindow):
         self.btn_export_all = QPushButton("Exportar")
         self.btn_export_all.setMaximumWidth(100)
         self.btn_export_all.setLayoutDirection(1)
-        self.btn_export_all (self.export_all)
+        self.btn_export_all.clicked.connect(self.export_all)
 
         # Section: Import .xlsx
         self.import_docxmodel_layout = QHBoxLayout()
@@ -399,7 +1283,13 @@ class MainWindow(QMainWindow):
             "Selecionar Planilha"
         )
 
+        self.cancel_import_action = self.menu_excel_tool_button.addAction(
+            "Cancelar Importação"
+        )
+        self.cancel_import_action.setEnabled(False)
+
         self.select_excel_action.triggered.connect(self.f_import_excel)
+        self.cancel_import_action.triggered.connect(self.f_cancel_import)
         self.excel_tool_button.setMenu(self.menu_excel_tool_button)
         self.excel_tool_button.setPopupMode(QToolButton.InstantPopup)
 
@@ -436,6 +1326,7 @@ class MainWindow(QMainWindow):
         self.my_layout.addLayout(self.import_docxmodel_layout)
         self.my_layout.addLayout(self.import_excel_layout)
         self.my_layout.addLayout(self.export_path_layout)
+        self.my_layout.addLayout(self.filter_layout)
         self.my_layout.addWidget(self.table)
         self.my_layout.addWidget(self.progressBarPercentage)
         self.my_layout.addWidget(self.btn_export_all)
@@ -455,7 +1346,103 @@ class MainWindow(QMainWindow):
             self.docxmodel_path.setText(file_path)
 
     def export_all(self):
-        self.statusBar().showMessage("Botão Exportar clicado!")
+        """DOCX, XLSX e PDF de uma vez: formata uma vez e escreve os três em paralelo"""
+        if not self.export_path.text():
+            QtWidgets.QMessageBox.warning(
+                self,
+                "Local da exportação",
+                Rf"Nenhum pasta de exportação foi selecionada! Selecione uma pasta de exportação.",
+            )
+            return
+        if not self.docxmodel_path.text():
+            QtWidgets.QMessageBox.warning(
+                self, "Modelo", "Nenhum documento Word de modelo foi selecionado!"
+            )
+            return
+        if not isinstance(self.df, pd.DataFrame) or self.df.empty:
+            QtWidgets.QMessageBox.warning(self, "Aviso", "Nenhum dado para exportar!")
+            return
+        worker = getattr(self, "export_all_worker", None)
+        if worker is not None and worker.isRunning():
+            QtWidgets.QMessageBox.warning(self, "Aviso", "Já existe uma exportação em andamento!")
+            return
+
+        stamp = datetime.now().strftime("%H%M%S")
+        folder = self.export_path.text()
+        outputs = {
+            "docx": rf"{folder}/DOCUMENTO_{stamp}.docx",
+            "xlsx": rf"{folder}/PLANILHA_{stamp}.xlsx",
+            "pdf": rf"{folder}/PDF_{stamp}.pdf",
+        }
+        self.statusBar().showMessage("Exportando .docx, .xlsx e .pdf...")
+        self.export_all_worker = worker = ExportAllWorker(
+            self.export_frame(), outputs, self.docxmodel_path.text(),
+            decimals=self.decimals, rounding=self.rounding, dms_decimals=self.dms_decimals,
+        )
+        worker.metrics_run = metrics.begin("export_all")
+        self.connect_progress(worker)
+        worker.done.connect(self.all_exported)
+        worker.failed.connect(lambda message: self.export_failed(message, worker.metrics_run))
+        worker.start()
+
+    def f_export_daemon(self):
+        """Envia a planilha importada ao serviço local (DOCX, XLSX e PDF)"""
+        if not self.export_path.text():
+            QtWidgets.QMessageBox.warning(
+                self,
+                "Local da exportação",
+                Rf"Nenhum pasta de exportação foi selecionada! Selecione uma pasta de exportação.",
+            )
+            return
+        if not self.excel_path.text():
+            QtWidgets.QMessageBox.warning(self, "Aviso", "Nenhuma planilha importada!")
+            return
+
+        client = DaemonClient()
+        spec = {
+            "input": str(Path(self.excel_path.text()).resolve()),
+            "output_dir": str(Path(self.export_path.text()).resolve()),
+            "formats": ["docx", "xlsx", "pdf"],
+            "decimals": self.decimals,
+            "rounding": self.rounding,
+            "dms_decimals": self.dms_decimals,
+        }
+        if self.docxmodel_path.text():
+            spec["template"] = str(Path(self.docxmodel_path.text()).resolve())
+        try:
+            job_id = client.submit(spec)
+        except DaemonError as e:
+            QtWidgets.QMessageBox.warning(
+                self, "Serviço local", f"{e}\n\nInicie com: python -m qtexpotool serve"
+            )
+            return
+        self.statusBar().showMessage("Exportando pelo serviço local...")
+        self.daemon_worker = DaemonJobWorker(client, job_id)
+        self.connect_progress(self.daemon_worker)
+        self.daemon_worker.done.connect(self.daemon_exported)
+        self.daemon_worker.start()
+
+    def daemon_exported(self, job):
+        self.updateProgress(0)
+        lines = [result["output"] for result in job["results"].values() if not result["error"]]
+        if job["error"]:
+            lines.append(job["error"])
+        summary = f"Serviço local: {STATE_LABELS.get(job['state'], job['state'])}"
+        self.statusBar().showMessage(summary)
+        QtWidgets.QMessageBox.information(self, "Exportação", "\n".join([summary] + lines))
+
+    def all_exported(self, results):
+        record = metrics.end(self.export_all_worker.metrics_run)
+        self.updateProgress(0)
+        lines = [
+            f"{Path(result.output).name} ({format_number(result.seconds, 1)} s)"
+            if result.ok else f".{target}: {result.error}"
+            for target, result in results.items()
+        ]
+        ok = sum(result.ok for result in results.values())
+        summary = f"{ok} de {len(results)} formatos exportados."
+        self.statusBar().showMessage(f"{summary} {metrics.summary(record)}" if record else summary)
+        QtWidgets.QMessageBox.information(self, "Exportação", "\n".join([summary] + lines))
 
     def f_import_excel(self):
         options = QFileDialog.Options()
@@ -467,60 +1454,205 @@ class MainWindow(QMainWindow):
             options=options,
         )
         if file_path:
+            self.f_cancel_import()
             self.excel_path.setText(file_path)
-            self.df = pd.read_excel(file_path)
-            self.df = self.df.astype(str)
-
-            numeros = []
-            self.distancias_sum_listmode = self.df["Distância"].tolist()
-            for dist in self.distancias_sum_listmode:
-                print(f"{dist = }")
-                numeros.append(round(float(f"{dist}".replace(" m", "").replace(",", ".")), 2))
-
-
-            self.distancia_sum = (
-                self.df["Distância"]
-                .str.replace(",", ".")
-                .str.replace(" m", "")
-                .astype(float)
-                .round(2)
-                .sum()
+            self.statusBar().showMessage("Carregando planilha...")
+
+            # Leitura em lotes numa thread separada; a tabela é preenchida
+            # assim que o primeiro lote chega
+            self.import_worker = ImportWorker(
+                file_path,
+                self.workbook_cache,
+                compact=self.compact_action.isChecked(),
+                all_sheets=self.all_sheets_action.isChecked(),
             )
-            ps = f"{self.distancia_sum:.2f}".replace(".", ",")
-            print(f"Soma do perímetro: {ps}")
+            self.import_worker.metrics_run = metrics.begin("import", file=Path(file_path).name)
+            self.connect_progress(self.import_worker)
+            self.import_worker.first_chunk.connect(self.preview_first_chunk)
+            self.import_worker.loaded.connect(self.import_loaded)
+            self.import_worker.failed.connect(self.import_failed)
+            self.import_worker.cache_failed.connect(self.cache_failed)
+            self.cancel_import_action.setEnabled(True)
+            self.import_worker.start()
+
+    def f_cancel_import(self):
+        worker = getattr(self, "import_worker", None)
+        if worker is not None and worker.isRunning():
+            worker.requestInterruption()
+            worker.wait()
+            metrics.end(worker.metrics_run, error="Cancelado")
+            self.statusBar().showMessage("Importação cancelada")
+            self.updateProgress(0)
+        self.cancel_import_action.setEnabled(False)
+
+    def preview_first_chunk(self, df_chunk):
+        self.updateTableView(df_chunk)
+        self.statusBar().showMessage("Carregando planilha... (pré-visualização)")
+
+    def cache_failed(self, message):
+        # A planilha é lida mesmo assim; só o reaproveitamento fica de fora
+        self.statusBar().showMessage(f"Cache de planilhas indisponível: {message}", 10000)
+
+    def import_failed(self, message):
+        metrics.end(self.import_worker.metrics_run, error=message)
+        self.cancel_import_action.setEnabled(False)
+        self.updateProgress(0)
+        QtWidgets.QMessageBox.critical(
+            self, "Importação", f"Não foi possível ler a planilha: {message}"
+        )
+
+    def import_loaded(self, df):
+        # As etapas feitas aqui, na thread da interface, contam para a importação
+        with metrics.bind(self.import_worker.metrics_run):
+            self.show_imported(df)
 
+    def show_imported(self, df):
+        self.cancel_import_action.setEnabled(False)
+        # Colunas tipadas: "Distância" já vem em float64
+        self.df = df
+        self.update_stats_menu()
+        with metrics.span("stats"):
+            self.stats = frame_stats(self.df, self.stats_columns, self.decimals, self.rounding)
+        with metrics.span("coords"):
+            self.bad_coordinates = check_coordinates(self.df)
+
+        # A tabela formata só as linhas visíveis; cada exportação formata a
+        # planilha inteira no seu worker
+        self.row_view = RowView(self.df, self.formatters)
+        self.filter_text.clear()
+        self.filter_column.blockSignals(True)
+        self.filter_column.clear()
+        self.filter_column.addItem("Todas as colunas")
+        self.filter_column.addItems([str(column) for column in self.df.columns])
+        self.filter_column.blockSignals(False)
+        self.table.horizontalHeader().setSortIndicatorShown(False)
+        with metrics.span("view"):
             self.updateTableView(self.df)
-            self.df["Distância"] = TableModel.formatValuesDataFrame(
-                self.df["Distância"]
+        self.updateProgress(0)
+
+        message = f"Total de linhas: {self.df.shape[0]}"
+        perimetro = self.stats.get("Distância")
+        if perimetro is not None:
+            message = (
+                f"Soma do perímetro: {format_number(perimetro.rounded_sum, perimetro.decimals)} m | "
+                f"{message} | "
+                f"Soma sem arredondamento: {format_number(perimetro.raw_sum, 3)} m | "
+                f"Diferença do arredondamento: {format_number(perimetro.drift, 3)} m"
             )
-            perimetro_sum_after = (
-                self.df["Distância"]
-                .str.replace(",", ".")
-                .str.replace(" m", "")
-                .astype(float)
-                .round(2)
-                .sum()
+        bad = sum(len(rows) for rows in self.bad_coordinates.values())
+        if bad:
+            columns = ", ".join(str(column) for column in self.bad_coordinates)
+            message = f"{message} | Coordenadas inválidas: {bad} ({columns})"
+        invalid = getattr(self.import_worker, "invalid_numbers", None)
+        if invalid:
+            columns = ", ".join(str(column) for column in invalid)
+            message = f"{message} | Números inválidos: {sum(invalid.values())} ({columns})"
+        report = getattr(self.import_worker, "compact_report", None)
+        if report is not None and report.saved > 0:
+            message = f"{message} | {report.summary()}"
+        record = metrics.end(self.import_worker.metrics_run)
+        if record is not None:
+            message = f"{message} | {metrics.summary(record)}"
+        self.statusBar().showMessage(message)
+
+    def update_stats_menu(self):
+        """Recria o menu com as colunas numéricas da planilha atual"""
+        self.stats_menu.clear()
+        show_action = self.stats_menu.addAction("Mostrar estatísticas")
+        show_action.triggered.connect(self.f_show_stats)
+        self.stats_menu.addSeparator()
+
+        columns = numeric_columns(self.df) if isinstance(self.df, pd.DataFrame) else []
+        for column in columns:
+            action = self.stats_menu.addAction(str(column))
+            action.setCheckable(True)
+            action.setChecked(column in self.stats_columns)
+            action.toggled.connect(
+                lambda checked, column=column: self.toggle_stats_column(column, checked)
             )
-            ps_after = f"{perimetro_sum_after:.2f}".replace(".", ",")
-            self.statusBar().showMessage(
-                f"Soma do perímetro: {ps} m | Total de linhas: {self.df.shape[0]} | Soma do perímetro após arrendondamento: {sum(numeros)}"
+
+    def toggle_stats_column(self, column, checked):
+        if checked and column not in self.stats_columns:
+            self.stats_columns.append(column)
+        elif not checked and column in self.stats_columns:
+            self.stats_columns.remove(column)
+        if isinstance(self.df, pd.DataFrame):
+            self.stats = frame_stats(self.df, self.stats_columns, self.decimals, self.rounding)
+
+    def f_show_stats(self):
+        if not self.stats:
+            QtWidgets.QMessageBox.information(
+                self, "Estatísticas", "Nenhuma coluna numérica marcada."
             )
+            return
+        lines = []
+        for column, st in self.stats.items():
+            lines.append(
+                f"{column}\n"
+                f"  Quantidade: {st.count}\n"
+                f"  Soma: {format_number(st.raw_sum, 3)}\n"
+                f"  Soma arredondada: {format_number(st.rounded_sum, st.decimals)}\n"
+                f"  Diferença do arredondamento: {format_number(st.drift, 3)}\n"
+                f"  Mínimo: {format_number(st.min, 3)} | Máximo: {format_number(st.max, 3)}"
+            )
+        QtWidgets.QMessageBox.information(self, "Estatísticas", "\n\n".join(lines))
+
     # Função para transformar o valor em float com duas casas decimais
     def transform_value(value):
         value = value.replace(' m', '').replace(',', '.')
         return round(float(value), 2)
 
-    def updateTableView(self, df: pd.DataFrame):
-        headers = df.columns.tolist()
-        if len(df) >= 11:
-            data_top = df.head()
-            data_mid = ["..." for i in range(len(headers))]
-            data_bot = df.tail()
-            data = data_top.values.tolist() + [data_mid] + data_bot.values.tolist()
-        else:
-            data = df.values.tolist()
-
-        self.model = TableModel(data, headers)
+    def export_frame(self, keep_sheet=False):
+        """self.df, ou só as linhas visíveis se a opção estiver marcada
+
+        A coluna da aba (importação de todas as abas) não existe no modelo e
+        fica de fora, a não ser com ``keep_sheet``.
+        """
+        df = self.df
+        if self.export_filtered_action.isChecked() and self.row_view is not None:
+            rows = self.row_view.rows()
+            if rows is not None:
+                df = df.take(rows)
+        if not keep_sheet and SHEET_COLUMN in df.columns:
+            df = df.drop(columns=[SHEET_COLUMN])
+        return df
+
+    def sort_by_column(self, column):
+        if self.row_view is None:
+            return
+        header = self.table.horizontalHeader()
+        name = self.df.columns[column]
+        ascending = not (self.row_view.sort_column == name and self.row_view.ascending)
+        self.row_view.set_sort(name, ascending)
+        self.refresh_row_view()
+        header.setSortIndicatorShown(True)
+        header.setSortIndicator(column, Qt.AscendingOrder if ascending else Qt.DescendingOrder)
+
+    def apply_filter(self):
+        if self.row_view is None:
+            return
+        index = self.filter_column.currentIndex()
+        column = self.df.columns[index - 1] if index > 0 else None
+        self.row_view.filter_text(self.filter_text.text(), column)
+        self.refresh_row_view()
+
+    def clear_filter(self):
+        self.filter_text.clear()
+        if self.row_view is None:
+            return
+        self.row_view.clear()
+        self.table.horizontalHeader().setSortIndicatorShown(False)
+        self.refresh_row_view()
+
+    def refresh_row_view(self):
+        rows = self.row_view.rows()
+        self.updateTableView(self.df, rows)
+        visible = len(self.df) if rows is None else len(rows)
+        self.statusBar().showMessage(f"Linhas exibidas: {visible} de {len(self.df)}")
+
+    def updateTableView(self, df: pd.DataFrame, rows=None):
+        headers = [str(column) for column in df.columns]
+        self.model = TableModel(df, rows, self.formatters)
         self.table.setModel(self.model)
 
         for col in range(len(headers)):
@@ -539,9 +1671,23 @@ class MainWindow(QMainWindow):
         if folder_path:
             self.export_path.setText(folder_path)
 
+    def connect_progress(self, worker):
+        """Liga a barra de progresso aos sinais de um ProgressWorker"""
+        worker.progress.connect(self.updateProgress)
+        worker.progress_info.connect(
+            lambda info: self.updateProgressInfo(info, worker.rate_unit)
+        )
+
     def updateProgress(self, value):
         """Update de Progress Bar % value, async"""
         self.progressBarPercentage.setValue(value)
+        if value == 0:
+            self.progressBarPercentage.setFormat("%p%")
+
+    def updateProgressInfo(self, info, unit="linhas"):
+        """Taxa e tempo restante no texto da barra de progresso"""
+        text = format_info(info, unit)
+        self.progressBarPercentage.setFormat(f"%p% — {text}" if text else "%p%")
 
 
 
@@ -0,0 +1,7 @@
+"""Núcleo do QtExpoTool: leitura, formatação e exportação das planilhas.
+
+Os módulos deste pacote não dependem do PyQt5, de modo que podem ser usados
+tanto pela interface (main.py) quanto por scripts.
+"""
+
+__version__ = "1.0.0"
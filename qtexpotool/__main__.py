@@ -0,0 +1,5 @@
+import sys
+
+from qtexpotool.cli import main
+
+sys.exit(main())
@@ -0,0 +1,150 @@
+"""Exportação em lote: várias planilhas, um processo por núcleo.
+
+Cada planilha passa por :func:`qtexpotool.pipeline.export_workbook` num
+``ProcessPoolExecutor``, fora do GIL da interface. O progresso de cada
+processo volta por uma fila e é somado, com peso proporcional ao tamanho
+de cada arquivo.
+"""
+
+import os
+import queue
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from multiprocessing import get_context
+from pathlib import Path
+
+from qtexpotool.fixedpoint import HALF_EVEN
+from qtexpotool.instrument import metrics
+from qtexpotool.pipeline import ExportResult, export_workbook, output_stems
+from qtexpotool.progress import ProgressReporter
+
+WORKBOOK_SUFFIXES = (".xlsx", ".xls")
+
+
+def find_workbooks(paths):
+    """Planilhas de uma pasta (ou de uma lista de pastas/arquivos), em ordem."""
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+
+    workbooks = []
+    for path in map(Path, paths):
+        candidates = sorted(path.iterdir()) if path.is_dir() else [path]
+        for candidate in candidates:
+            # "~$arquivo.xlsx" é o arquivo de bloqueio do Excel aberto
+            if candidate.suffix.lower() in WORKBOOK_SUFFIXES \
+                    and not candidate.name.startswith("~$"):
+                workbooks.append(candidate)
+    return workbooks
+
+
+def _limit_memory(memory_limit_mb):
+    # Limite de memória por processo (só em sistemas com o módulo resource)
+    if not memory_limit_mb:
+        return
+    try:
+        import resource
+    except ImportError:
+        return
+    limit = memory_limit_mb * 2**20
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _export_task(index, xlsx_path, template_path, output_dir, chunk_size, incremental,
+                 stem, decimals, rounding, dms_decimals, events):
+    # Cada put na fila do Manager é uma ida e volta entre processos: só o
+    # progresso que muda a barra é enviado
+    reporter = ProgressReporter(
+        0, lambda info: events.put((index, info.done, info.total)), interval=0.25
+    )
+
+    def on_total(rows):
+        reporter.set_total(rows)
+        events.put((index, 0, rows))
+
+    try:
+        with metrics.run("export_workbook", source=Path(xlsx_path).name):
+            return export_workbook(
+                xlsx_path, template_path, output_dir, chunk_size, on_total, reporter.update,
+                incremental, stem, decimals, rounding, dms_decimals,
+            )
+    except Exception as e:
+        return ExportResult(source=str(xlsx_path), error=f"{type(e).__name__}: {e}")
+
+
+def run_batch(workbooks, template_path, output_dir, max_workers=None, chunk_size=1000,
+              memory_limit_mb=None, progress=None, cancelled=None, incremental=False,
+              decimals=2, rounding=HALF_EVEN, dms_decimals=None):
+    """Exporta ``workbooks`` em paralelo e devolve um ``ExportResult`` por planilha.
+
+    ``progress`` recebe o progresso geral (0 a 100), só quando ele muda;
+    ``cancelled``, se informado, é consultado periodicamente e cancela as
+    planilhas que ainda não começaram. ``memory_limit_mb`` limita a memória de
+    cada processo: uma planilha grande demais falha sozinha, sem derrubar o
+    lote, assim como um processo que morre. ``incremental`` reaproveita as
+    linhas das exportações anteriores, ``decimals``/``rounding`` formatam a
+    Distância e ``dms_decimals`` as coordenadas. Planilhas de mesmo nome em pastas
+    diferentes não se sobrescrevem (ver ``output_stems``).
+    """
+    workbooks = [Path(path) for path in workbooks]
+    if not workbooks:
+        return []
+    stems = output_stems(workbooks)
+    weights = [max(path.stat().st_size, 1) for path in workbooks]
+    fractions = [0.0] * len(workbooks)
+
+    # max_tasks_per_child ficou de fora: no Python 3.11 ele pode travar o
+    # pool quando há mais tarefas que processos. Os processos são criados por
+    # spawn: um fork da interface copiaria as threads do Qt e os locks delas.
+    spawn = get_context("spawn")
+    pool_options = {
+        "max_workers": max_workers or min(len(workbooks), os.cpu_count() or 1),
+        "mp_context": spawn,
+        "initializer": _limit_memory,
+        "initargs": (memory_limit_mb,),
+    }
+
+    results = [None] * len(workbooks)
+    last_percent = None
+    with spawn.Manager() as manager, ProcessPoolExecutor(**pool_options) as pool:
+        events = manager.Queue()
+        futures = {
+            pool.submit(
+                _export_task, i, str(path), str(template_path), str(output_dir),
+                chunk_size, incremental, stems[i], decimals, rounding, dms_decimals, events,
+            ): i
+            for i, path in enumerate(workbooks)
+        }
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = futures[future]
+                fractions[i] = 1.0
+                if future.cancelled():
+                    results[i] = ExportResult(source=str(workbooks[i]), error="Cancelado")
+                    continue
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    # BrokenProcessPool (processo morto), erro ao devolver o resultado...
+                    results[i] = ExportResult(source=str(workbooks[i]),
+                                              error=f"{type(e).__name__}: {e}")
+
+            while True:
+                try:
+                    i, rows, total = events.get_nowait()
+                except queue.Empty:
+                    break
+                if total and fractions[i] < 1.0:
+                    fractions[i] = rows / total
+
+            if cancelled is not None and cancelled():
+                for future in pending:
+                    future.cancel()
+            if progress is not None:
+                done_weight = sum(w * f for w, f in zip(weights, fractions))
+                percent = int(done_weight / sum(weights) * 100)
+                if percent != last_percent:
+                    last_percent = percent
+                    progress(percent)
+
+    return results
@@ -0,0 +1,202 @@
+"""Cache em disco das planilhas já lidas e tipadas.
+
+Cada entrada é uma pasta com um ``.npy`` por coluna e um ``meta.json``. A
+chave combina caminho, tamanho, data de modificação e o hash do conteúdo do
+arquivo, então uma planilha alterada nunca reaproveita dados antigos. Quando
+o total passa de ``max_bytes`` as entradas usadas há mais tempo são apagadas.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_BYTES = 512 * 2**20
+# Muda quando o formato das entradas muda
+CACHE_VERSION = 2
+
+_META = "meta.json"
+
+
+def default_cache_dir() -> Path:
+    base = os.environ.get("LOCALAPPDATA") or Path.home() / ".cache"
+    return Path(base) / "qtexpotool" / "planilhas"
+
+
+def file_digest(file_path, block_size=2**20) -> str:
+    """Hash (BLAKE2b) do conteúdo do arquivo."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class WorkbookCache:
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = Path(directory) if directory else default_cache_dir()
+        self.max_bytes = max_bytes
+
+    def key(self, file_path, variant="") -> str:
+        """Chave da planilha: caminho, tamanho, mtime e hash do conteúdo.
+
+        ``variant`` diferencia leituras do mesmo arquivo com opções diferentes
+        (esquema, aba...).
+        """
+        path = Path(file_path).resolve()
+        stat = path.stat()
+        parts = [
+            str(CACHE_VERSION),
+            str(path),
+            str(stat.st_size),
+            str(stat.st_mtime_ns),
+            file_digest(path),
+            variant,
+        ]
+        return hashlib.blake2b("|".join(parts).encode(), digest_size=16).hexdigest()
+
+    def get(self, file_path, variant="", key=None):
+        """DataFrame guardado para a planilha, ou ``None`` se não houver.
+
+        Uma entrada ilegível (cortada, corrompida, de outra versão) conta como
+        ausente: a planilha é lida de novo e a entrada é regravada. ``key``
+        é a chave já calculada por :meth:`key` (o hash lê o arquivo inteiro).
+        """
+        entry = self.directory / (key or self.key(file_path, variant))
+        try:
+            with open(entry / _META, encoding="utf-8") as f:
+                meta = json.load(f)
+            df = _read_entry(entry, meta)
+        except Exception:
+            return None
+        # Marca o uso para a remoção por LRU
+        os.utime(entry / _META)
+        return df
+
+    def put(self, file_path, df: pd.DataFrame, variant="", key=None):
+        """Guarda ``df`` e apaga as entradas antigas do mesmo arquivo.
+
+        ``key``, se informada, é a mesma usada no :meth:`get` que falhou.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        key = key or self.key(file_path, variant)
+        source = str(Path(file_path).resolve())
+
+        tmp = Path(tempfile.mkdtemp(prefix=".tmp-", dir=self.directory))
+        try:
+            meta = _write_entry(tmp, df)
+            meta["source"] = source
+            meta["variant"] = variant
+            with open(tmp / _META, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            target = self.directory / key
+            shutil.rmtree(target, ignore_errors=True)
+            os.replace(tmp, target)
+        except Exception:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+        for entry, entry_meta, _, _ in self._entries():
+            if entry.name != key and entry_meta.get("source") == source \
+                    and entry_meta.get("variant") == variant:
+                shutil.rmtree(entry, ignore_errors=True)
+        self.evict()
+
+    def load(self, file_path, loader, variant=""):
+        """Devolve a planilha do cache ou chama ``loader(file_path)`` e guarda."""
+        key = self.key(file_path, variant)
+        df = self.get(file_path, variant, key)
+        if df is None:
+            df = loader(file_path)
+            self.put(file_path, df, variant, key)
+        return df
+
+    def size(self) -> int:
+        return sum(size for _, _, size, _ in self._entries())
+
+    def evict(self):
+        """Apaga as entradas menos usadas até o total caber em ``max_bytes``."""
+        entries = sorted(self._entries(), key=lambda entry: entry[3])
+        total = sum(size for _, _, size, _ in entries)
+        for entry, _, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _entries(self):
+        """(pasta, meta, bytes, último uso) de cada entrada válida."""
+        if not self.directory.is_dir():
+            return []
+        entries = []
+        for entry in self.directory.iterdir():
+            meta_path = entry / _META
+            if entry.name.startswith(".") or not meta_path.is_file():
+                continue
+            try:
+                with open(meta_path, encoding="utf-8") as f:
+                    meta = json.load(f)
+                size = sum(p.stat().st_size for p in entry.iterdir())
+                last_used = meta_path.stat().st_mtime
+            except (OSError, ValueError):
+                continue
+            entries.append((entry, meta, size, last_used))
+        return entries
+
+
+def _write_entry(entry: Path, df: pd.DataFrame) -> dict:
+    columns = []
+    for j, column in enumerate(df.columns):
+        values = df.iloc[:, j]
+        dtype = values.dtype
+        array = values.to_numpy()
+        if isinstance(dtype, pd.CategoricalDtype):
+            # Códigos e categorias à parte: a ordem das categorias (ex.: a das
+            # abas) não se perde
+            categories = dtype.categories.to_numpy()
+            np.save(entry / f"{j}.categories.npy", categories,
+                    allow_pickle=categories.dtype == object)
+            np.save(entry / f"{j}.npy", values.cat.codes.to_numpy())
+            columns.append({"name": column, "dtype": "category", "ordered": dtype.ordered,
+                            "categories_object": categories.dtype == object})
+            continue
+        if not isinstance(dtype, np.dtype):
+            # Tipos do pandas (categoria, string...) são refeitos com astype
+            array = np.asarray(values, dtype=object)
+        np.save(entry / f"{j}.npy", array, allow_pickle=array.dtype == object)
+        columns.append({"name": column, "dtype": str(dtype), "object": array.dtype == object})
+    # attrs (ex.: as colunas de cada aba) vão no JSON e voltam com a entrada
+    return {"columns": columns, "rows": len(df), "attrs": df.attrs, "created": time.time()}
+
+
+def _read_entry(entry: Path, meta: dict) -> pd.DataFrame:
+    # Só as colunas de texto (object) passam pelo pickle
+    data = {}
+    for j, column in enumerate(meta["columns"]):
+        array = np.load(entry / f"{j}.npy", allow_pickle=column.get("object", False))
+        if "ordered" in column:
+            categories = np.load(entry / f"{j}.categories.npy",
+                                 allow_pickle=column["categories_object"])
+            data[j] = pd.Series(pd.Categorical.from_codes(
+                array, categories=pd.Index(categories), ordered=column["ordered"]
+            ))
+            continue
+        series = pd.Series(array, copy=False)
+        if str(series.dtype) != column["dtype"]:
+            series = series.astype(column["dtype"])
+        data[j] = series
+    df = pd.DataFrame(data)
+    df.columns = [column["name"] for column in meta["columns"]]
+    if len(df) != meta["rows"]:
+        raise ValueError("Entrada de cache incompleta")
+    df.attrs.update(meta.get("attrs", {}))
+    return df
@@ -0,0 +1,342 @@
+"""Linha de comando do QtExpoTool, sem interface gráfica.
+
+    python -m qtexpotool export planilha.xlsx --template modelo.docx --out saida/
+    python -m qtexpotool export pasta_de_planilhas/ --out saida/ --jobs 4
+    python -m qtexpotool serve --workers 4
+    python -m qtexpotool submit planilha.xlsx --out saida/ --formats docx pdf --wait
+
+Só o ``argparse`` é importado na partida; pandas, python-docx e o restante
+do núcleo são carregados dentro de cada comando, quando o trabalho começa.
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+DEFAULT_TEMPLATE = Path(__file__).resolve().parent.parent / "src" / "docs" / "modelo.docx"
+
+
+def _print_progress(info):
+    from qtexpotool.progress import format_info
+
+    text = format_info(info, unit=None)
+    print(f"\r{info.percent:3d}% {text:<16}", end="", file=sys.stderr, flush=True)
+
+
+def _workbook_progress(progress, index, count):
+    """Callbacks ``on_total``/``progress`` de uma planilha para a barra geral."""
+    total = [0]
+
+    def on_total(rows):
+        total[0] = rows
+
+    def on_rows(rows):
+        if progress is not None and total[0]:
+            progress((index + rows / total[0]) / count * 100)
+
+    return on_total, on_rows
+
+
+def _export_sharded(args, workbooks, template, output_dir, progress):
+    """Cada planilha vira vários documentos; as partes é que rodam em paralelo."""
+    from qtexpotool.ingest import read_excel_typed
+    from qtexpotool.pipeline import ExportResult, output_stems
+    from qtexpotool.shard import export_shards
+
+    results = []
+    stems = output_stems(workbooks)
+    for index, workbook in enumerate(workbooks):
+        try:
+            df = read_excel_typed(workbook)
+            if args.group_by and args.group_by not in df.columns:
+                raise KeyError(f"coluna {args.group_by!r} não encontrada")
+            on_total, on_rows = _workbook_progress(progress, index, len(workbooks))
+            on_total(len(df))
+            results.extend(export_shards(
+                df, template, output_dir,
+                group_by=args.group_by,
+                max_rows=args.max_rows,
+                stem=f"DOCUMENTO_{stems[index]}",
+                max_workers=args.jobs,
+                chunk_size=args.chunk_size,
+                progress=on_rows,
+                decimals=args.decimals,
+                rounding=args.rounding,
+                dms_decimals=args.dms_decimals,
+            ))
+        except Exception as e:
+            results.append(ExportResult(source=str(workbook), error=f"{type(e).__name__}: {e}"))
+    return results
+
+
+def _export_sheets(args, workbooks, template, output_dir, progress):
+    """Todas as abas de cada planilha, lidas em paralelo: um documento por aba
+    (com índice) ou, com ``--merge-sheets``, um documento só."""
+    import time
+
+    from qtexpotool.docx_stream import export_docx_stream
+    from qtexpotool.pipeline import ExportResult, docx_output_path, output_stems
+    from qtexpotool.render import report_formatters
+    from qtexpotool.shard import export_shards
+    from qtexpotool.sheets import (
+        SHEET_COLUMN, load_schemas, merge_sheets, read_sheets, sheet_columns, workbook_schemas,
+    )
+
+    results = []
+    stems = output_stems(workbooks)
+    for index, workbook in enumerate(workbooks):
+        start = time.perf_counter()
+        try:
+            schemas = (load_schemas(args.sheet_schema) if args.sheet_schema
+                       else workbook_schemas(workbook))
+            df = merge_sheets(read_sheets(workbook, schemas=schemas, max_workers=args.jobs))
+            on_total, on_rows = _workbook_progress(progress, index, len(workbooks))
+            on_total(len(df))
+            if args.merge_sheets:
+                output = docx_output_path(workbook, output_dir, stems[index])
+                rows = export_docx_stream(
+                    df.drop(columns=[SHEET_COLUMN]), template, output,
+                    chunk_size=args.chunk_size, progress=on_rows,
+                    formatters=report_formatters(args.decimals, args.rounding,
+                                                 args.dms_decimals),
+                )
+                results.append(ExportResult(source=str(workbook), output=str(output), rows=rows,
+                                            seconds=time.perf_counter() - start))
+            else:
+                results.extend(export_shards(
+                    df, template, output_dir,
+                    group_by=SHEET_COLUMN,
+                    max_rows=args.max_rows,
+                    stem=f"DOCUMENTO_{stems[index]}",
+                    max_workers=args.jobs,
+                    chunk_size=args.chunk_size,
+                    progress=on_rows,
+                    keep_group=False,
+                    columns=sheet_columns(df),
+                    decimals=args.decimals,
+                    rounding=args.rounding,
+                    dms_decimals=args.dms_decimals,
+                ))
+        except Exception as e:
+            results.append(ExportResult(source=str(workbook), error=f"{type(e).__name__}: {e}"))
+    return results
+
+
+def cmd_export(args):
+    from qtexpotool.batch import find_workbooks, run_batch
+    from qtexpotool.instrument import metrics
+
+    if args.metrics:
+        profiler = None if args.metrics == "on" else args.metrics
+        metrics.enable(log_path=args.metrics_log, profiler=profiler)
+        # Os processos do lote leem a mesma opção
+        os.environ["QTEXPOTOOL_METRICS"] = args.metrics
+        if args.metrics_log:
+            os.environ["QTEXPOTOOL_METRICS_LOG"] = str(Path(args.metrics_log).resolve())
+
+    template = Path(args.template)
+    if not template.is_file():
+        print(f"Modelo não encontrado: {template}", file=sys.stderr)
+        return 2
+    workbooks = find_workbooks(args.inputs)
+    if not workbooks:
+        print("Nenhuma planilha encontrada.", file=sys.stderr)
+        return 2
+    output_dir = Path(args.out)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    progress = None
+    if not args.quiet:
+        from qtexpotool.progress import ProgressReporter
+
+        # Progresso geral em pontos percentuais, redesenhado no máximo 4x/s
+        progress = ProgressReporter(100, _print_progress, interval=0.25).update
+
+    if args.all_sheets or args.merge_sheets or args.sheet_schema:
+        if args.incremental or args.group_by:
+            print("--incremental e --group-by não valem com todas as abas.", file=sys.stderr)
+            return 2
+        results = _export_sheets(args, workbooks, template, output_dir, progress)
+    elif args.group_by or args.max_rows:
+        if args.incremental:
+            print("--incremental não vale para documentos divididos.", file=sys.stderr)
+            return 2
+        results = _export_sharded(args, workbooks, template, output_dir, progress)
+    elif len(workbooks) == 1 or args.jobs == 1:
+        # Uma planilha (ou --jobs 1): tudo no próprio processo, sem pool
+        from qtexpotool.pipeline import ExportResult, export_workbook, output_stems
+
+        results = []
+        stems = output_stems(workbooks)
+        for index, workbook in enumerate(workbooks):
+            on_total, on_rows = _workbook_progress(progress, index, len(workbooks))
+            try:
+                with metrics.run("export_workbook", source=workbook.name):
+                    results.append(export_workbook(
+                        workbook, template, output_dir, chunk_size=args.chunk_size,
+                        on_total=on_total, progress=on_rows, incremental=args.incremental,
+                        stem=stems[index], decimals=args.decimals, rounding=args.rounding,
+                        dms_decimals=args.dms_decimals,
+                    ))
+                if metrics.enabled:
+                    print(metrics.summary(), file=sys.stderr)
+            except Exception as e:
+                results.append(
+                    ExportResult(source=str(workbook), error=f"{type(e).__name__}: {e}")
+                )
+            if progress is not None:
+                progress((index + 1) / len(workbooks) * 100)
+    else:
+        results = run_batch(
+            workbooks,
+            template,
+            output_dir,
+            max_workers=args.jobs,
+            chunk_size=args.chunk_size,
+            memory_limit_mb=args.memory_limit,
+            progress=progress,
+            incremental=args.incremental,
+            decimals=args.decimals,
+            rounding=args.rounding,
+            dms_decimals=args.dms_decimals,
+        )
+    if progress is not None:
+        print(file=sys.stderr)
+
+    for result in results:
+        if result.ok:
+            print(f"{result.source} -> {result.output} "
+                  f"({result.rows} linhas, {result.seconds:.2f} s)")
+        else:
+            print(f"{result.source}: ERRO {result.error}", file=sys.stderr)
+    return 0 if all(result.ok for result in results) else 1
+
+
+def cmd_serve(args):
+    from qtexpotool.daemon import ExportDaemon
+
+    template = args.template if Path(args.template).is_file() else None
+    try:
+        daemon = ExportDaemon(template, max_workers=args.workers, host=args.host, port=args.port)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    print(f"Serviço de exportação em {daemon.url} (Ctrl+C encerra)", file=sys.stderr)
+    daemon.serve_forever()
+    return 0
+
+
+def cmd_submit(args):
+    from qtexpotool.daemon import FINISHED_STATES, DaemonClient, DaemonError
+
+    client = DaemonClient(args.url)
+    status = 0
+    try:
+        ids = [
+            client.submit(
+                input=str(Path(workbook).resolve()),
+                output_dir=str(Path(args.out).resolve()),
+                formats=args.formats,
+                priority=args.priority,
+                decimals=args.decimals,
+                rounding=args.rounding,
+                dms_decimals=args.dms_decimals,
+                **({"template": str(Path(args.template).resolve())} if args.template else {}),
+            )
+            for workbook in args.inputs
+        ]
+        for job_id in ids:
+            if not args.wait:
+                print(job_id)
+                continue
+            job = client.wait(job_id)
+            if job["state"] not in FINISHED_STATES or job["error"]:
+                status = 1
+                print(f"{job['name']}: {job['state']} {job['error']}", file=sys.stderr)
+            else:
+                outputs = ", ".join(result["output"] for result in job["results"].values())
+                print(f"{job['name']} -> {outputs} ({job['rows']} linhas, "
+                      f"{job['finished'] - job['started']:.2f} s)")
+    except DaemonError as e:
+        print(e, file=sys.stderr)
+        return 2
+    return status
+
+
+def _add_format_options(parser):
+    # Os modos de qtexpotool.fixedpoint, sem importar o numpy na partida
+    parser.add_argument("--decimals", type=int, default=2, choices=(2, 3),
+                        help="casas decimais da Distância (padrão: 2)")
+    parser.add_argument("--rounding", default="half_even",
+                        choices=("half_even", "half_up", "down"),
+                        help="arredondamento da Distância (padrão: half_even, NBR 5891)")
+    # Os valores de qtexpotool.render.DMS_DECIMALS
+    parser.add_argument("--dms-decimals", type=int, default=None, choices=(2, 3, 4, 5, 6),
+                        help="Latitude/Longitude em DMS normalizado com estas casas nos "
+                             "segundos (padrão: como estão na planilha)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="qtexpotool", description="Exporta planilhas do roteiro perimétrico sem a interface."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="exporta planilhas para DOCX")
+    export.add_argument("inputs", nargs="+", help="planilhas .xlsx/.xls ou pastas")
+    export.add_argument("--template", default=str(DEFAULT_TEMPLATE),
+                        help="documento Word de modelo (padrão: src/docs/modelo.docx)")
+    export.add_argument("--out", default=".", help="pasta de saída")
+    export.add_argument("--jobs", type=int, default=None,
+                        help="processos em paralelo (padrão: um por núcleo)")
+    export.add_argument("--chunk-size", type=int, default=1000,
+                        help="linhas por lote na escrita")
+    export.add_argument("--memory-limit", type=int, default=None, metavar="MB",
+                        help="limite de memória por processo")
+    export.add_argument("--group-by", default=None, metavar="COLUNA",
+                        help="um documento para cada valor da coluna (com índice)")
+    export.add_argument("--max-rows", type=int, default=None, metavar="N",
+                        help="divide o documento a cada N linhas")
+    export.add_argument("--all-sheets", action="store_true",
+                        help="lê todas as abas em paralelo: um documento por aba, com índice")
+    export.add_argument("--merge-sheets", action="store_true",
+                        help="lê todas as abas e junta num documento só")
+    export.add_argument("--sheet-schema", default=None, metavar="JSON",
+                        help="tipos das colunas por aba (padrão: <planilha>.esquema.json)")
+    export.add_argument("--incremental", action="store_true",
+                        help="refaz só as linhas alteradas desde a última exportação")
+    _add_format_options(export)
+    export.add_argument("-q", "--quiet", action="store_true", help="sem barra de progresso")
+    export.add_argument("--metrics", nargs="?", const="on", choices=("on", "cprofile", "tracemalloc"),
+                        help="registra os tempos de cada etapa no log JSONL de métricas")
+    export.add_argument("--metrics-log", default=None, help="arquivo do log de métricas")
+    export.set_defaults(func=cmd_export)
+
+    serve = commands.add_parser("serve", help="sobe o serviço local de exportação")
+    serve.add_argument("--template", default=str(DEFAULT_TEMPLATE),
+                       help="modelo pré-compilado nos processos (padrão: src/docs/modelo.docx)")
+    serve.add_argument("--workers", type=int, default=None,
+                       help="processos aquecidos (padrão: um por núcleo)")
+    serve.add_argument("--host", default="127.0.0.1",
+                       help="endereço da própria máquina (127.0.0.1, ::1 ou localhost)")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.set_defaults(func=cmd_serve)
+
+    submit = commands.add_parser("submit", help="envia planilhas ao serviço local")
+    submit.add_argument("inputs", nargs="+", help="planilhas .xlsx/.xls")
+    submit.add_argument("--out", default=".", help="pasta de saída")
+    submit.add_argument("--formats", nargs="+", default=["docx"],
+                        choices=("docx", "xlsx", "pdf"), help="formatos de saída")
+    submit.add_argument("--template", default=None,
+                        help="documento Word de modelo (padrão: o do serviço)")
+    submit.add_argument("--priority", type=int, default=0, help="maior sai primeiro da fila")
+    submit.add_argument("--url", default="http://127.0.0.1:8765", help="endereço do serviço")
+    submit.add_argument("--wait", action="store_true", help="espera terminar e mostra as saídas")
+    _add_format_options(submit)
+    submit.set_defaults(func=cmd_submit)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
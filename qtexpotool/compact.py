@@ -0,0 +1,175 @@
+"""Representação compacta das planilhas importadas.
+
+Colunas de texto com poucos valores distintos (MUNICIPIO, SITUAÇÃO, IMOVEL...)
+viram ``category``: um código inteiro por linha e cada texto guardado uma
+vez só. Texto livre sem células vazias vira ``string[pyarrow]`` quando o
+``pyarrow`` está instalado. Inteiros são reduzidos ao menor tipo que os
+comporta e ``float64`` vira ``float32`` só quando nenhum valor muda.
+
+A formatação (``astype(str)``), a ordenação, os filtros e as exportações dão
+o mesmo resultado na forma compacta.
+"""
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Vira categoria quando os valores distintos são no máximo esta fração das linhas
+CATEGORY_MAX_RATIO = 0.5
+ARROW_STRING = "string[pyarrow]"
+
+
+def arrow_strings_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+@dataclass
+class CompactReport:
+    before: int = 0  # bytes
+    after: int = 0
+    columns: dict = field(default_factory=dict)  # coluna -> (tipo antigo, tipo novo)
+
+    @property
+    def saved(self):
+        return self.before - self.after
+
+    def summary(self) -> str:
+        if not self.before:
+            return ""
+        percent = self.saved / self.before * 100
+        return (
+            f"Memória: {self.before / 2**20:.1f} MiB -> {self.after / 2**20:.1f} MiB "
+            f"({percent:.0f}% a menos)"
+        ).replace(".", ",")
+
+
+def _is_lossless_float32(values: np.ndarray) -> bool:
+    narrow = values.astype(np.float32)
+    with np.errstate(invalid="ignore"):
+        return bool(np.array_equal(narrow.astype(np.float64), values, equal_nan=True))
+
+
+def compact_column(series: pd.Series, category_ratio=CATEGORY_MAX_RATIO, arrow=None):
+    """Versão compacta de ``series`` (ou a própria série, se não houver ganho)."""
+    dtype = series.dtype
+    if not isinstance(dtype, np.dtype) or dtype.kind == "b":
+        return series
+    if dtype.kind == "i":
+        return pd.to_numeric(series, downcast="integer")
+    if dtype.kind == "u":
+        return pd.to_numeric(series, downcast="unsigned")
+    if dtype == np.float64:
+        values = series.to_numpy()
+        return series.astype(np.float32) if _is_lossless_float32(values) else series
+    if dtype.kind != "O" or series.empty:
+        return series
+
+    codes, uniques = pd.factorize(series)
+    if len(uniques) <= category_ratio * len(series):
+        try:
+            return series.astype("category")
+        except TypeError:
+            # Tipos misturados que não dá para ordenar: fica como está
+            return series
+
+    if arrow is None:
+        arrow = arrow_strings_available()
+    # Só sem células vazias: o NA do Arrow viraria "<NA>" no astype(str)
+    if arrow and (codes >= 0).all() and all(isinstance(value, str) for value in uniques):
+        return series.astype(ARROW_STRING)
+    return series
+
+
+def compact_frame(df: pd.DataFrame, category_ratio=CATEGORY_MAX_RATIO):
+    """Devolve ``(DataFrame compacto, CompactReport)``; ``df`` não é alterado."""
+    arrow = arrow_strings_available()
+    report = CompactReport()
+    columns = {}
+    for j, column in enumerate(df.columns):
+        series = df.iloc[:, j]
+        compacted = compact_column(series, category_ratio, arrow)
+        before = int(series.memory_usage(deep=True, index=False))
+        after = before
+        if compacted is not series:
+            after = int(compacted.memory_usage(deep=True, index=False))
+            if after < before:
+                report.columns[column] = (str(series.dtype), str(compacted.dtype))
+            else:
+                compacted, after = series, before
+        report.before += before
+        report.after += after
+        columns[j] = compacted
+
+    compact = pd.DataFrame(columns, index=df.index)
+    compact.columns = df.columns
+    compact.attrs = dict(df.attrs)
+    return compact, report
+
+
+def _concat_column(parts, category_ratio=CATEGORY_MAX_RATIO) -> pd.Series:
+    """Junta as partes de uma coluna compactadas em lotes diferentes.
+
+    Categorias de lotes diferentes são unidas (``union_categoricals``) em vez
+    de virar ``object``; se a coluna inteira tiver valores distintos demais,
+    fica como texto.
+    """
+    categorical = [isinstance(part.dtype, pd.CategoricalDtype) for part in parts]
+    if any(categorical) and len(parts) > 1:
+        try:
+            union = union_categoricals(
+                [part if is_category else part.astype("category")
+                 for part, is_category in zip(parts, categorical)],
+                sort_categories=True,
+            )
+        except TypeError:
+            # Tipos misturados que não dá para ordenar
+            parts = [part.astype(object) for part in parts]
+        else:
+            if len(union.categories) <= category_ratio * len(union):
+                return pd.Series(union)
+            return pd.Series(np.asarray(union, dtype=object))
+    return pd.concat(parts, ignore_index=True)
+
+
+class ChunkCompactor:
+    """Compacta os lotes da leitura à medida que chegam e junta tudo no fim.
+
+    A planilha inteira nunca fica na memória como objetos Python: cada lote é
+    compactado (:func:`compact_frame`) antes do próximo ser lido.
+    """
+
+    def __init__(self, category_ratio=CATEGORY_MAX_RATIO):
+        self.category_ratio = category_ratio
+        self.chunks = []
+        self.dtypes = None  # tipos do primeiro lote, antes de compactar
+        self.before = 0
+
+    def add(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        compact, report = compact_frame(chunk, self.category_ratio)
+        if self.dtypes is None:
+            self.dtypes = list(chunk.dtypes)
+        self.before += report.before
+        self.chunks.append(compact)
+        return compact
+
+    def frame(self):
+        """Devolve ``(DataFrame com todos os lotes, CompactReport)`` e esvazia a lista."""
+        chunks, self.chunks = self.chunks, []
+        columns = {
+            j: _concat_column([chunk.iloc[:, j] for chunk in chunks], self.category_ratio)
+            for j in range(chunks[0].shape[1])
+        }
+        df = pd.DataFrame(columns)
+        df.columns = chunks[0].columns
+        report = CompactReport(before=self.before,
+                               after=int(df.memory_usage(deep=True, index=False).sum()))
+        for j, column in enumerate(df.columns):
+            if str(df.iloc[:, j].dtype) != str(self.dtypes[j]):
+                report.columns[column] = (str(self.dtypes[j]), str(df.iloc[:, j].dtype))
+        return df, report
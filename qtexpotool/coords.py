@@ -0,0 +1,319 @@
+"""Coordenadas em graus, minutos e segundos (DMS), coluna a coluna.
+
+Lê textos como ``02°31'34,244785"S`` (roteiro) ou o par
+``S 01° 55' 44" W 048° 29' 55"`` (GEORREF) para graus decimais em float64
+(negativos ao sul e a oeste) e escreve de volta em DMS com as casas pedidas.
+
+Nas planilhas reais quase todas as células de uma coluna têm a mesma largura
+e o mesmo desenho; então a primeira célula que casa com a expressão regular
+serve de gabarito, as demais são conferidas posição a posição e os números
+saem direto dos códigos dos caracteres, em NumPy. Só as células fora do
+gabarito passam pela expressão regular, uma a uma.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from qtexpotool.fixedpoint import integer_strings
+
+NEGATIVE_HEMISPHERES = "SWO"  # O = oeste
+HEMISPHERES = "NSEWLO"  # L = leste
+
+# Um hemisfério só por coordenada: antes (``S 01°...``) ou depois (``...44"S``).
+# Com o hemisfério antes, a letra seguinte é da próxima coordenada do par.
+_COORD = (
+    r"(?P<{p}pre>[NSEWLO])?\s*(?P<{p}deg>\d{{1,3}})\s*°\s*(?P<{p}min>\d{{1,2}})\s*['’′]\s*"
+    r"(?P<{p}sec>\d{{1,2}}(?:[.,]\d+)?)\s*(?:\"|''|”|″)?\s*"
+    r"(?({p}pre)|(?P<{p}post>[NSEWLO])?)"
+)
+DMS_PATTERN = re.compile(r"\s*" + _COORD.format(p="") + r"\s*")
+DMS_PAIR_PATTERN = re.compile(
+    r"\s*" + _COORD.format(p="a_") + r"\s*[,;/]?\s*" + _COORD.format(p="b_") + r"\s*"
+)
+
+_ZERO = ord("0")
+_HEMISPHERE_CODES = np.array([ord(c) for c in HEMISPHERES], dtype=np.uint32)
+_NEGATIVE_CODES = np.array([ord(c) for c in NEGATIVE_HEMISPHERES], dtype=np.uint32)
+
+
+def _as_text(values) -> tuple:
+    """(array de object, máscara das células que são texto)."""
+    values = pd.Series(values, copy=False).to_numpy(dtype=object)
+    if pd.api.types.infer_dtype(values, skipna=True) in ("string", "empty"):
+        # Coluna só de texto (e vazios): sem isinstance célula a célula
+        return values, ~pd.isna(values)
+    is_text = np.fromiter((isinstance(v, str) for v in values), dtype=bool, count=len(values))
+    return values, is_text
+
+
+_str_len = np.frompyfunc(len, 1, 1)
+
+
+def _number(codes, start, stop):
+    """Inteiro formado pelos dígitos ``codes[:, start:stop]``."""
+    digits = codes[:, start:stop].astype(np.int64) - _ZERO
+    return digits @ (10 ** np.arange(stop - start - 1, -1, -1, dtype=np.int64))
+
+
+def _fields_from_codes(codes, match, prefixes):
+    """Graus decimais de cada coordenada do gabarito ``match``, lidos de ``codes``."""
+    results = []
+    for p in prefixes:
+        degrees = _number(codes, *match.span(f"{p}deg")).astype(np.float64)
+        minutes = _number(codes, *match.span(f"{p}min"))
+        start, stop = match.span(f"{p}sec")
+        separator = next(
+            (i for i in range(start, stop) if match.string[i] in ".,"), stop
+        )
+        seconds = _number(codes, start, separator).astype(np.float64)
+        if separator < stop - 1:
+            seconds += _number(codes, separator + 1, stop) / 10.0 ** (stop - separator - 1)
+        value = degrees + minutes / 60 + seconds / 3600
+        value[(minutes >= 60) | (seconds >= 60)] = np.nan
+
+        side = "pre" if match.group(f"{p}pre") is not None else "post"
+        if match.group(f"{p}{side}") is not None:
+            position = match.start(f"{p}{side}")
+            value = np.where(np.isin(codes[:, position], _NEGATIVE_CODES), -value, value)
+        results.append(value)
+    return results
+
+
+def _template_rows(codes, template):
+    """Linhas com o mesmo desenho do gabarito (dígitos e separadores nas mesmas posições)."""
+    is_digit = (template >= _ZERO) & (template <= _ZERO + 9)
+    row_digits = (codes >= _ZERO) & (codes <= _ZERO + 9)
+    same = (row_digits == is_digit) | ~is_digit
+    literal = ~is_digit & ~np.isin(template, _HEMISPHERE_CODES)
+    same &= (codes == template) | ~literal
+    hemisphere = ~is_digit & ~literal
+    same &= np.isin(codes, _HEMISPHERE_CODES) | ~hemisphere
+    return same.all(axis=1)
+
+
+def _regex_fields(match, prefixes):
+    values = []
+    for p in prefixes:
+        minutes = int(match.group(f"{p}min"))
+        seconds = float(match.group(f"{p}sec").replace(",", "."))
+        if minutes >= 60 or seconds >= 60:
+            values.append(np.nan)
+            continue
+        value = int(match.group(f"{p}deg")) + minutes / 60 + seconds / 3600
+        hemisphere = match.group(f"{p}pre") or match.group(f"{p}post")
+        values.append(-value if hemisphere and hemisphere in NEGATIVE_HEMISPHERES else value)
+    return values
+
+
+def _parse(values, pattern, prefixes):
+    values, is_text = _as_text(values)
+    out = [np.full(len(values), np.nan) for _ in prefixes]
+    pending = np.flatnonzero(is_text)
+    if not len(pending):
+        return out
+
+    lengths = _str_len(values[pending]).astype(np.int64)
+    leftover = []
+    for width in np.unique(lengths):
+        rows = pending[lengths == width]
+        sample = next((values[i] for i in rows[:32] if pattern.fullmatch(values[i])), None)
+        if sample is None or width == 0:
+            leftover.append(rows)
+            continue
+        match = pattern.fullmatch(sample)
+        codes = np.array(values[rows].tolist(), dtype=f"U{width}").view(np.uint32)
+        codes = codes.reshape(len(rows), width)
+        template = np.frombuffer(sample.encode("utf-32-le"), dtype=np.uint32)
+        ok = _template_rows(codes, template)
+        for target, parsed in zip(out, _fields_from_codes(codes[ok], match, prefixes)):
+            target[rows[ok]] = parsed
+        leftover.append(rows[~ok])
+
+    # Fora do gabarito: expressão regular célula a célula
+    for i in np.concatenate(leftover) if leftover else ():
+        match = pattern.fullmatch(values[i])
+        if match is not None:
+            for target, parsed in zip(out, _regex_fields(match, prefixes)):
+                target[i] = parsed
+    return out
+
+
+def parse_dms(values) -> np.ndarray:
+    """Coluna de textos DMS -> graus decimais (``NaN`` onde o texto não é DMS válido)."""
+    return _parse(values, DMS_PATTERN, [""])[0]
+
+
+def parse_dms_pair(values):
+    """Coluna de pares ``S 01° 55' 44" W 048° 29' 55"`` -> ``(latitude, longitude)``."""
+    latitude, longitude = _parse(values, DMS_PAIR_PATTERN, ["a_", "b_"])
+    return latitude, longitude
+
+
+def _put_digits(codes, column, values, digits):
+    """Escreve ``values`` com ``digits`` dígitos a partir de ``codes[:, column]``."""
+    for k in range(digits - 1, -1, -1):
+        values, digit = np.divmod(values, 10)
+        codes[:, column + k] = _ZERO + digit
+
+
+def format_dms(degrees, decimals=6, hemispheres="NS", degree_digits=2, decimal_sep=","):
+    """Graus decimais -> ``02°31'34,244785"S``; ``NaN`` vira texto vazio.
+
+    ``hemispheres`` é o par (positivo, negativo): ``"NS"`` para latitude,
+    ``"EW"`` (ou ``"LO"``) para longitude; vazio omite o hemisfério. Todos
+    os textos têm a mesma largura, então são montados como uma matriz de
+    códigos de caracteres e vistos como ``str`` de uma vez.
+    """
+    degrees = np.asarray(degrees, dtype=np.float64)
+    valid = np.isfinite(degrees)
+    # Tudo em unidades da última casa dos segundos, para o arredondamento
+    # propagar para minutos e graus (59,9999995" -> 1')
+    scale = 10**decimals
+    units = np.round(np.abs(np.where(valid, degrees, 0)) * 3600 * scale).astype(np.int64)
+    whole_seconds, fraction = np.divmod(units, scale)
+    minutes_total, seconds = np.divmod(whole_seconds, 60)
+    whole_degrees, minutes = np.divmod(minutes_total, 60)
+
+    # Graus com mais dígitos que ``degree_digits`` aumentam a largura de todos
+    degree_width = max(degree_digits, len(str(int(whole_degrees.max(initial=0)))))
+    layout = [(degree_width, whole_degrees), "°", (2, minutes), "'", (2, seconds)]
+    if decimals:
+        layout += [decimal_sep, (decimals, fraction)]
+    layout.append('"')
+    width = sum(part[0] if isinstance(part, tuple) else len(part) for part in layout)
+    width += 1 if hemispheres else 0
+
+    codes = np.empty((len(degrees), width), dtype=np.uint32)
+    column = 0
+    for part in layout:
+        if isinstance(part, tuple):
+            digits, values = part
+            _put_digits(codes, column, values, digits)
+            column += digits
+        else:
+            for char in part:
+                codes[:, column] = ord(char)
+                column += 1
+    if hemispheres:
+        positive, negative = hemispheres
+        codes[:, column] = np.where(np.signbit(degrees), ord(negative), ord(positive))
+
+    text = codes.view(f"U{width}").ravel().astype(object)
+    if degree_width > degree_digits:
+        # Graus com menos dígitos que o maior perdem os zeros a mais à esquerda
+        digits = np.char.str_len(integer_strings(whole_degrees))
+        strip = degree_width - np.maximum(digits, degree_digits)
+        for k in np.unique(strip[strip > 0]):
+            rows = strip == k
+            text[rows] = np.ascontiguousarray(codes[rows, k:]).view(f"U{width - k}").ravel()
+    text[~valid] = ""
+    return text
+
+
+def _formatted_rows(values, decimals, hemispheres, degree_digits) -> np.ndarray:
+    """Células que já estão exatamente como :func:`format_dms` as escreveria.
+
+    Nas planilhas do roteiro é quase a coluna inteira: essas células são
+    conferidas posição a posição, sem converter para graus e de volta.
+    """
+    values, is_text = _as_text(values)
+    formatted = np.zeros(len(values), dtype=bool)
+    pending = np.flatnonzero(is_text)
+    if not len(pending):
+        return formatted
+    rest = 7 + (decimals + 1 if decimals else 0) + (1 if hemispheres else 0)
+    lengths = _str_len(values[pending]).astype(np.int64)
+    for width in np.unique(lengths):
+        degree_width = width - rest
+        if degree_width < max(degree_digits, 1):
+            continue
+        rows = pending[lengths == width]
+        codes = np.array(values[rows].tolist(), dtype=f"U{width}").view(np.uint32)
+        codes = codes.reshape(len(rows), width)
+        digit = (codes >= _ZERO) & (codes <= _ZERO + 9)
+        # Graus, minutos e segundos (com as casas) nas posições de dígito
+        layout = "d" * degree_width + "°dd'dd" + ("," + "d" * decimals if decimals else "") + '"'
+        ok = np.ones(len(rows), dtype=bool)
+        for position, char in enumerate(layout):
+            ok &= digit[:, position] if char == "d" else codes[:, position] == ord(char)
+        # Minutos e segundos abaixo de 60, sem zeros a mais nos graus
+        ok &= (codes[:, degree_width + 1] <= ord("5")) & (codes[:, degree_width + 4] <= ord("5"))
+        if degree_width > degree_digits:
+            ok &= codes[:, 0] != _ZERO
+        if hemispheres:
+            ok &= np.isin(codes[:, -1], [ord(char) for char in hemispheres])
+        formatted[rows[ok]] = True
+    return formatted
+
+
+def dms(decimals=6, hemispheres="NS", degree_digits=2):
+    """Formatador de coluna (``render_frame``): DMS normalizado com ``decimals`` casas.
+
+    Células que não são DMS válido saem como estão (``astype(str)``).
+    """
+
+    def formatter(values: pd.Series) -> np.ndarray:
+        out = values.astype(str).to_numpy(dtype=object)
+        rows = np.flatnonzero(~_formatted_rows(values, decimals, hemispheres, degree_digits))
+        if len(rows):
+            degrees = parse_dms(values.iloc[rows])
+            valid = ~np.isnan(degrees)
+            out[rows[valid]] = format_dms(degrees[valid], decimals, hemispheres, degree_digits)
+        return out
+
+    return formatter
+
+
+# Limite em graus de cada tipo de coluna
+LIMITS = {"lat": 90.0, "lon": 180.0}
+
+
+def coordinate_columns(df: pd.DataFrame) -> dict:
+    """``{coluna: "lat" | "lon" | "pair"}`` das colunas de texto com coordenadas DMS.
+
+    O tipo vem do nome (Latitude/Longitude) ou do par na mesma célula
+    (GEORREF); ângulos como o Azimute ficam de fora.
+    """
+    kinds = {}
+    for column in df.columns:
+        series = df[column]
+        if series.dtype.kind != "O" and not isinstance(series.dtype, pd.CategoricalDtype):
+            continue
+        first = series.dropna().head(1)
+        if not len(first) or not isinstance(first.iloc[0], str):
+            continue
+        name = str(column).lower()
+        if DMS_PAIR_PATTERN.fullmatch(first.iloc[0]):
+            kinds[column] = "pair"
+        elif DMS_PATTERN.fullmatch(first.iloc[0]):
+            if "lat" in name:
+                kinds[column] = "lat"
+            elif "lon" in name:
+                kinds[column] = "lon"
+    return kinds
+
+
+def invalid_coordinates(values, kind) -> np.ndarray:
+    """Posições das células preenchidas que não são DMS válido ou passam do limite."""
+    filled = ~pd.isna(pd.Series(values, copy=False)).to_numpy()
+    with np.errstate(invalid="ignore"):
+        if kind == "pair":
+            latitude, longitude = parse_dms_pair(values)
+            bad = np.isnan(latitude) | np.isnan(longitude) \
+                | (np.abs(latitude) > LIMITS["lat"]) | (np.abs(longitude) > LIMITS["lon"])
+        else:
+            degrees = parse_dms(values)
+            bad = np.isnan(degrees) | (np.abs(degrees) > LIMITS[kind])
+    return np.flatnonzero(filled & bad)
+
+
+def check_coordinates(df: pd.DataFrame) -> dict:
+    """``{coluna: posições inválidas}`` para cada coluna DMS com problema."""
+    problems = {}
+    for column, kind in coordinate_columns(df).items():
+        bad = invalid_coordinates(df[column], kind)
+        if len(bad):
+            problems[column] = bad
+    return problems
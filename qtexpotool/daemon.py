@@ -0,0 +1,697 @@
+"""Serviço local de exportação: processos já aquecidos e uma fila de trabalhos.
+
+    python -m qtexpotool serve --workers 4
+
+Cada exportação pela interface ou pela linha de comando paga de novo a
+partida do Python, a importação do pandas/python-docx e a leitura do modelo.
+Aqui um ``ProcessPoolExecutor`` fica de pé com os módulos importados e os
+modelos já compilados (:func:`qtexpotool.template.get_template`) em cada
+processo; os trabalhos chegam por HTTP em ``127.0.0.1`` e entram numa fila
+com prioridade. Cada requisição leva o token do serviço no cabeçalho
+:data:`TOKEN_HEADER`; o token é sorteado na partida e gravado num arquivo que
+só o usuário lê (:func:`default_token_path`), de onde o cliente o tira.
+Vários trabalhos rodam ao mesmo tempo, um por processo, então uma exportação
+grande não segura as pequenas. Um processo que morre (memória, crash) derruba
+o pool inteiro: ele é trocado por um novo e os trabalhos que estavam nele
+voltam para a fila uma vez (:data:`MAX_ATTEMPTS`).
+
+API (JSON):
+
+- ``POST /jobs``: cria um trabalho e devolve ``{"id": ...}``;
+- ``GET /jobs``: estado de todos os trabalhos;
+- ``GET /jobs/<id>?wait=5``: estado de um trabalho, esperando até 5 s ele terminar;
+- ``DELETE /jobs/<id>``: cancela (na fila sai na hora; rodando para no próximo lote);
+- ``GET /status``: processos, trabalhos na fila e rodando.
+
+O trabalho é ``{"input": "planilha.xlsx"}`` ou ``{"columns": [...], "rows":
+[[...], ...]}``, mais ``"output_dir"``, ``"formats"`` (``docx``, ``xlsx``,
+``pdf``; padrão ``["docx"]``) e, opcionais, ``"stem"``, ``"template"``,
+``"priority"`` (maior sai primeiro), ``"chunk_size"``, as casas
+(``"decimals"``, 2 ou 3) e o arredondamento (``"rounding"``) da Distância e
+as casas dos segundos das coordenadas em DMS (``"dms_decimals"``; sem ele as
+coordenadas saem como estão).
+"""
+
+import heapq
+import hmac
+import ipaddress
+import itertools
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass, field
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import get_context
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from qtexpotool.cache import WorkbookCache
+from qtexpotool.fanout import DOCX, PDF, TARGETS, XLSX, _write_target
+from qtexpotool.fixedpoint import HALF_EVEN
+from qtexpotool.ingest import apply_schema, read_excel_typed
+from qtexpotool.instrument import metrics
+from qtexpotool.progress import ProgressReporter
+from qtexpotool.render import render_frame, report_formatters
+from qtexpotool.template import get_template
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_URL = f"http://{DEFAULT_HOST}:{DEFAULT_PORT}"
+DEFAULT_TEMPLATE = Path(__file__).resolve().parent.parent / "src" / "docs" / "modelo.docx"
+TOKEN_HEADER = "X-QtExpoTool-Token"
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+STATE_LABELS = {
+    QUEUED: "na fila",
+    RUNNING: "exportando",
+    DONE: "concluído",
+    FAILED: "falhou",
+    CANCELLED: "cancelado",
+}
+
+# Vezes que um trabalho vai ao pool: quem derrubar o pool de novo falha
+MAX_ATTEMPTS = 2
+
+# Prefixo do arquivo de cada formato, como na interface
+OUTPUT_PREFIXES = {DOCX: "DOCUMENTO", XLSX: "PLANILHA", PDF: "PDF"}
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class DaemonError(Exception):
+    """Erro do serviço (ou serviço fora do ar), do lado do cliente."""
+
+
+@dataclass
+class Job:
+    id: str
+    spec: dict
+    priority: int = 0
+    state: str = QUEUED
+    progress: int = 0  # 0 a 100
+    submitted: float = field(default_factory=time.time)
+    started: float = None
+    finished: float = None
+    rows: int = 0
+    results: dict = field(default_factory=dict)  # formato -> ExportResult (dict)
+    error: str = ""
+    attempts: int = 0  # vezes que foi enviado ao pool
+
+    def to_dict(self):
+        data = asdict(self)
+        data["name"] = self.spec.get("name") or self.spec.get("input") or ""
+        del data["spec"]
+        return data
+
+
+def default_token_path() -> Path:
+    base = os.environ.get("LOCALAPPDATA") or Path.home() / ".cache"
+    return Path(base) / "qtexpotool" / "servico.token"
+
+
+def write_token(path) -> str:
+    """Sorteia um token novo e grava em ``path``, legível só pelo dono (0600)."""
+    token = secrets.token_urlsafe(32)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.unlink(missing_ok=True)
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w", encoding="ascii") as file:
+        file.write(token)
+    os.replace(tmp, path)
+    return token
+
+
+def read_token(path=None):
+    """Token do serviço em ``path`` (padrão: :func:`default_token_path`), ou ``None``."""
+    try:
+        return Path(path or default_token_path()).read_text(encoding="ascii").strip()
+    except OSError:
+        return None
+
+
+def is_loopback(host) -> bool:
+    """``127.0.0.1``, ``::1``, ``localhost``...: endereços só da própria máquina."""
+    host = host.strip("[]")
+    if host.lower() == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def template_columns(template_path, table_index=1):
+    """Textos do cabeçalho da tabela do modelo (as colunas do roteiro)."""
+    from docx import Document
+
+    table = Document(template_path).tables[table_index]
+    return [cell.text for cell in table.rows[0].cells]
+
+
+def job_outputs(spec) -> dict:
+    """``{formato: caminho}`` das saídas de um trabalho."""
+    stem = spec.get("stem") or (Path(spec["input"]).stem if spec.get("input") else spec["id"])
+    output_dir = Path(spec["output_dir"])
+    return {
+        target: str(output_dir / f"{OUTPUT_PREFIXES[target]}_{stem}.{target}")
+        for target in spec.get("formats", [DOCX])
+    }
+
+
+def validate_spec(spec, default_template=None) -> dict:
+    """Confere e completa um trabalho recebido; ``ValueError`` se estiver inválido."""
+    if not isinstance(spec, dict):
+        raise ValueError("O trabalho deve ser um objeto JSON")
+    spec = dict(spec)
+    if bool(spec.get("input")) == bool(spec.get("rows") is not None):
+        raise ValueError('Informe "input" (planilha) ou "columns" e "rows"')
+    if spec.get("rows") is not None and not spec.get("columns"):
+        raise ValueError('"rows" precisa de "columns"')
+    if not spec.get("output_dir"):
+        raise ValueError('Informe "output_dir"')
+    stem = spec.get("stem")
+    if stem is not None and (not isinstance(stem, str) or "/" in stem or "\\" in stem
+                             or stem in ("", ".", "..")):
+        raise ValueError('"stem" é só o nome do arquivo, sem pastas')
+    formats = spec.setdefault("formats", [DOCX])
+    if not formats or set(formats) - set(TARGETS):
+        raise ValueError(f"Formatos válidos: {', '.join(TARGETS)}")
+    if DOCX in formats:
+        spec["template"] = str(spec.get("template") or default_template or "")
+        if not Path(spec["template"]).is_file():
+            raise ValueError(f"Modelo não encontrado: {spec['template']}")
+    spec["priority"] = int(spec.get("priority", 0))
+    spec["chunk_size"] = int(spec.get("chunk_size", 1000))
+    spec["decimals"] = int(spec.get("decimals", 2))
+    spec["rounding"] = spec.get("rounding") or HALF_EVEN
+    if spec.get("dms_decimals") is not None:
+        spec["dms_decimals"] = int(spec["dms_decimals"])
+    report_formatters(spec["decimals"], spec["rounding"], spec.get("dms_decimals"))
+    return spec
+
+
+# --- Processos do pool ---------------------------------------------------
+
+_workbook_cache = None
+
+
+def _warm_worker(templates):
+    """Inicializador do pool: compila os modelos antes do primeiro trabalho."""
+    global _workbook_cache
+    _workbook_cache = WorkbookCache()
+    for path in templates:
+        try:
+            get_template(path, template_columns(path))
+        except Exception:
+            # Modelo inválido: o erro aparece no trabalho que o usar
+            pass
+
+
+def _ping():
+    return os.getpid()
+
+
+def _load_frame(spec):
+    if spec.get("rows") is not None:
+        return apply_schema(pd.DataFrame(spec["rows"], columns=spec["columns"]))
+    path = spec["input"]
+    if _workbook_cache is not None:
+        df = _workbook_cache.get(path)
+        if df is not None:
+            return df
+    df = read_excel_typed(path)
+    if _workbook_cache is not None:
+        try:
+            _workbook_cache.put(path, df)
+        except OSError:
+            pass
+    return df
+
+
+def _run_job(job_id, spec, events, cancelled):
+    """Executa um trabalho num processo do pool e devolve ``(linhas, resultados)``."""
+    with metrics.run("daemon_job", job=job_id):
+        with metrics.span("import"):
+            df = _load_frame(spec)
+        outputs = job_outputs(spec)
+        Path(spec["output_dir"]).mkdir(parents=True, exist_ok=True)
+
+        total = len(df) * len(outputs)
+        done = dict.fromkeys(outputs, 0)
+        reporter = ProgressReporter(
+            total, lambda info: events.put((job_id, info.percent)), interval=0.25
+        )
+
+        def progress_for(target):
+            def progress(rows):
+                if cancelled.get(job_id):
+                    raise JobCancelled()
+                done[target] = rows
+                reporter.update(sum(done.values()))
+
+            return progress
+
+        rendered = None
+        if DOCX in outputs or PDF in outputs:
+            with metrics.span("render"):
+                rendered = render_frame(df, report_formatters(spec["decimals"],
+                                                              spec["rounding"],
+                                                              spec.get("dms_decimals")))
+        results = {}
+        for target, output in outputs.items():
+            if cancelled.get(job_id):
+                break
+            data = df if target == XLSX else rendered
+            result = _write_target(target, data, output, spec.get("template"),
+                                   spec["chunk_size"], progress_for(target), spec["decimals"],
+                                   spec["rounding"])
+            if result.error.startswith(JobCancelled.__name__):
+                # Arquivo pela metade não fica na pasta de saída
+                Path(output).unlink(missing_ok=True)
+                break
+            results[target] = asdict(result)
+        return len(df), results
+
+
+# --- Serviço ---------------------------------------------------------------
+
+
+class ExportDaemon:
+    """Fila com prioridade na frente de um pool de processos aquecidos."""
+
+    def __init__(self, template=DEFAULT_TEMPLATE, max_workers=None, host=DEFAULT_HOST,
+                 port=DEFAULT_PORT, keep_finished=1000, token_path=None):
+        if not is_loopback(host):
+            raise ValueError(f"O serviço só escuta na própria máquina, não em {host}")
+        self.template = str(template) if template else None
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.host = host
+        self.port = port
+        self.keep_finished = keep_finished
+        self.token_path = Path(token_path) if token_path else default_token_path()
+        self.token = None
+
+        self._jobs = {}
+        self._heap = []
+        self._sequence = itertools.count()
+        self._running = 0
+        self._closing = False
+        self._cond = threading.Condition()
+        self._threads = []
+        self._manager = None
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self):
+        host = f"[{self.host}]" if ":" in self.host else self.host
+        return f"http://{host}:{self.port}"
+
+    def start(self):
+        """Sobe os processos (já aquecidos), a fila e o servidor HTTP."""
+        # spawn: o pool pode ser recriado com as threads do servidor rodando
+        self._context = get_context("spawn")
+        self._manager = self._context.Manager()
+        self._events = self._manager.Queue()
+        self._cancelled = self._manager.dict()
+        self._start_pool()
+        self.token = write_token(self.token_path)
+
+        self._server = ThreadingHTTPServer((self.host, self.port), _handler_for(self))
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        for target in (self._dispatch, self._collect, self._server.serve_forever):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def close(self):
+        with self._cond:
+            self._closing = True
+            for job in self._jobs.values():
+                if job.state in (QUEUED, RUNNING):
+                    self._cancelled[job.id] = True
+            self._cond.notify_all()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+        for thread in self._threads:
+            thread.join(timeout=2)
+        if self._manager is not None:
+            self._manager.shutdown()
+        if self.token is not None and read_token(self.token_path) == self.token:
+            self.token_path.unlink(missing_ok=True)
+
+    def _replace_pool(self, broken):
+        """Troca ``broken`` por um pool novo, já aquecido, e devolve o pool atual.
+
+        Todos os trabalhos do pool quebrado chegam aqui; só o primeiro troca.
+        """
+        with self._pool_lock:
+            if self._pool is broken and not self._closing:
+                broken.shutdown(wait=False)
+                self._start_pool()
+            return self._pool
+
+    def _start_pool(self):
+        templates = [self.template] if self.template and Path(self.template).is_file() else []
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.max_workers, mp_context=self._context,
+            initializer=_warm_worker, initargs=(templates,),
+        )
+        # Um trabalho vazio por processo: todos sobem e aquecem agora
+        for future in [self._pool.submit(_ping) for _ in range(self.max_workers)]:
+            future.result()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def serve_forever(self):
+        self.start()
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    # Trabalhos
+
+    def submit(self, spec) -> str:
+        spec = validate_spec(spec, self.template)
+        job = Job(id=uuid.uuid4().hex[:12], spec=spec, priority=spec["priority"])
+        spec["id"] = job.id
+        with self._cond:
+            if self._closing:
+                raise ValueError("Serviço encerrando")
+            self._jobs[job.id] = job
+            heapq.heappush(self._heap, (-job.priority, next(self._sequence), job.id))
+            self._forget_old()
+            self._cond.notify_all()
+        return job.id
+
+    def cancel(self, job_id) -> bool:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.state in FINISHED_STATES:
+                return False
+            if job.state == QUEUED:
+                # Sai do heap quando chegar a vez dele
+                job.state = CANCELLED
+                job.finished = time.time()
+                self._cond.notify_all()
+            else:
+                self._cancelled[job_id] = True
+            return True
+
+    def status(self, job_id, wait=0):
+        """Estado do trabalho (``None`` se não existir), esperando até ``wait`` s."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if wait:
+                self._cond.wait_for(lambda: job.state in FINISHED_STATES, timeout=wait)
+            return job.to_dict()
+
+    def jobs(self):
+        with self._cond:
+            return [job.to_dict() for job in self._jobs.values()]
+
+    def health(self):
+        with self._cond:
+            queued = sum(job.state == QUEUED for job in self._jobs.values())
+            return {"workers": self.max_workers, "queued": queued, "running": self._running,
+                    "template": self.template}
+
+    def _forget_old(self):
+        finished = [job for job in self._jobs.values() if job.state in FINISHED_STATES]
+        for job in finished[: max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job.id]
+
+    def _dispatch(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._closing or (self._heap and self._running < self.max_workers)
+                )
+                if self._closing:
+                    return
+                _, _, job_id = heapq.heappop(self._heap)
+                job = self._jobs.get(job_id)
+                if job is None or job.state != QUEUED:
+                    continue
+                job.state = RUNNING
+                job.started = time.time()
+                job.attempts += 1
+                self._running += 1
+            pool = self._pool
+            try:
+                try:
+                    future = pool.submit(_run_job, job.id, job.spec, self._events,
+                                         self._cancelled)
+                except BrokenProcessPool:
+                    # Quebrou entre o último trabalho e este
+                    pool = self._replace_pool(pool)
+                    future = pool.submit(_run_job, job.id, job.spec, self._events,
+                                         self._cancelled)
+            except Exception as e:  # pool encerrado ou sem conseguir subir
+                self._finish(job, error=f"{type(e).__name__}: {e}")
+                continue
+            future.add_done_callback(partial(self._job_done, job, pool))
+
+    def _job_done(self, job, pool, future):
+        if future.cancelled():
+            self._finish(job, cancelled=True)
+            return
+        try:
+            rows, results = future.result()
+        except BrokenProcessPool as e:
+            # Um processo morreu e levou o pool junto, com todos os trabalhos
+            # que rodavam nele: pool novo e o trabalho volta para a fila
+            error = f"{type(e).__name__}: {e}"
+            try:
+                self._replace_pool(pool)
+            except Exception as start_error:
+                self._finish(job, error=f"{error} (pool novo: {start_error})")
+                return
+            if job.attempts >= MAX_ATTEMPTS or not self._requeue(job):
+                self._finish(job, error=error)
+            return
+        except Exception as e:
+            self._finish(job, error=f"{type(e).__name__}: {e}")
+            return
+        self._finish(job, rows=rows, results=results)
+
+    def _requeue(self, job) -> bool:
+        """Devolve ``job`` à fila; ``False`` se foi cancelado ou o serviço está encerrando."""
+        with self._cond:
+            if self._closing or self._cancelled.get(job.id):
+                return False
+            job.state = QUEUED
+            job.progress = 0
+            job.started = None
+            self._running -= 1
+            heapq.heappush(self._heap, (-job.priority, next(self._sequence), job.id))
+            self._cond.notify_all()
+            return True
+
+    def _finish(self, job, rows=0, results=None, error="", cancelled=False):
+        with self._cond:
+            cancelled = cancelled or bool(self._cancelled.pop(job.id, False))
+            job.rows = rows
+            job.results = results or {}
+            failed = [f"{target}: {r['error']}" for target, r in job.results.items()
+                      if r["error"]]
+            job.error = error or "; ".join(failed)
+            if cancelled:
+                job.state = CANCELLED
+            else:
+                job.state = FAILED if job.error else DONE
+                job.progress = 100 if not job.error else job.progress
+            job.finished = time.time()
+            self._running -= 1
+            self._cond.notify_all()
+
+    def _collect(self):
+        # Progresso dos processos, sem segurar a trava enquanto espera
+        while not self._closing:
+            try:
+                job_id, percent = self._events.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                return
+            with self._cond:
+                job = self._jobs.get(job_id)
+                if job is not None and job.state == RUNNING:
+                    job.progress = percent
+
+
+def _handler_for(daemon):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, code, data):
+            body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _allowed(self):
+            """Token certo e ``Host`` da própria máquina (nada de DNS rebinding)."""
+            host = self.headers.get("Host", "")
+            host = host.rsplit(":", 1)[0] if host.count(":") == 1 else host.rsplit("]:", 1)[0]
+            if not is_loopback(host):
+                self._reply(403, {"error": "Host não permitido"})
+                return False
+            token = self.headers.get(TOKEN_HEADER, "")
+            if not hmac.compare_digest(token.encode(), (daemon.token or "").encode()):
+                self._reply(401, {"error": "Token do serviço ausente ou inválido"})
+                return False
+            return True
+
+        def _job_id(self, path):
+            parts = path.strip("/").split("/")
+            return parts[1] if len(parts) == 2 and parts[0] == "jobs" else None
+
+        def do_GET(self):
+            if not self._allowed():
+                return
+            url = urlparse(self.path)
+            if url.path == "/status":
+                return self._reply(200, daemon.health())
+            if url.path.rstrip("/") == "/jobs":
+                return self._reply(200, daemon.jobs())
+            job_id = self._job_id(url.path)
+            if job_id is None:
+                return self._reply(404, {"error": "Rota desconhecida"})
+            try:
+                wait = float(parse_qs(url.query).get("wait", ["0"])[0])
+            except ValueError:
+                return self._reply(400, {"error": "wait inválido"})
+            status = daemon.status(job_id, wait=min(wait, 60))
+            if status is None:
+                return self._reply(404, {"error": "Trabalho não encontrado"})
+            return self._reply(200, status)
+
+        def do_POST(self):
+            if not self._allowed():
+                return
+            if urlparse(self.path).path.rstrip("/") != "/jobs":
+                return self._reply(404, {"error": "Rota desconhecida"})
+            if self.headers.get_content_type() != "application/json":
+                return self._reply(415, {"error": "Envie o trabalho como application/json"})
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                job_id = daemon.submit(json.loads(self.rfile.read(length) or b"null"))
+            except (ValueError, TypeError) as e:
+                return self._reply(400, {"error": str(e)})
+            return self._reply(202, {"id": job_id})
+
+        def do_DELETE(self):
+            if not self._allowed():
+                return
+            job_id = self._job_id(urlparse(self.path).path)
+            if job_id is None:
+                return self._reply(404, {"error": "Rota desconhecida"})
+            return self._reply(200, {"cancelled": daemon.cancel(job_id)})
+
+    return Handler
+
+
+# --- Cliente -----------------------------------------------------------------
+
+
+class DaemonClient:
+    """Cliente do serviço, só com a biblioteca padrão (interface e scripts).
+
+    O token é lido de ``token_path`` (padrão: :func:`default_token_path`) a
+    cada requisição, então vale também depois que o serviço reinicia.
+    """
+
+    def __init__(self, url=DEFAULT_URL, timeout=5, token_path=None):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.token_path = token_path
+
+    def _request(self, method, path, data=None, timeout=None):
+        body = json.dumps(data).encode("utf-8") if data is not None else None
+        request = urllib.request.Request(
+            self.url + path, data=body, method=method,
+            headers={"Content-Type": "application/json",
+                     TOKEN_HEADER: read_token(self.token_path) or ""},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=timeout or self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get("error", e.reason)
+            except ValueError:
+                message = e.reason
+            raise DaemonError(message) from None
+        except (urllib.error.URLError, OSError) as e:
+            raise DaemonError(f"Serviço indisponível em {self.url}: {e}") from None
+
+    def available(self) -> bool:
+        try:
+            self.health()
+        except DaemonError:
+            return False
+        return True
+
+    def health(self):
+        return self._request("GET", "/status")
+
+    def submit(self, spec=None, **options) -> str:
+        return self._request("POST", "/jobs", {**(spec or {}), **options})["id"]
+
+    def status(self, job_id, wait=0):
+        return self._request("GET", f"/jobs/{job_id}?wait={wait}", timeout=self.timeout + wait)
+
+    def wait(self, job_id, timeout=None, poll=5):
+        """Espera o trabalho terminar (ou ``timeout`` s) e devolve o estado."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            step = poll if deadline is None else max(0, min(poll, deadline - time.monotonic()))
+            status = self.status(job_id, wait=step)
+            if status["state"] in FINISHED_STATES or (deadline and time.monotonic() >= deadline):
+                return status
+
+    def cancel(self, job_id) -> bool:
+        return self._request("DELETE", f"/jobs/{job_id}")["cancelled"]
+
+    def jobs(self):
+        return self._request("GET", "/jobs")
@@ -0,0 +1,97 @@
+"""Exportação DOCX em fluxo, sem manter a árvore do documento em memória.
+
+O ``word/document.xml`` do modelo é dividido em duas partes no ponto em que
+ficam as linhas da tabela de destino (uma vez por modelo, ver
+:mod:`qtexpotool.template`). As linhas são escritas direto na entrada
+do zip de saída, lote a lote, e as demais partes do pacote são copiadas sem
+alteração. O uso de memória não depende da quantidade de linhas.
+"""
+
+import os
+import zipfile
+
+from qtexpotool.docx_writer import rows_xml
+from qtexpotool.instrument import metrics
+from qtexpotool.render import RenderedTable, render_chunks
+from qtexpotool.template import DOCUMENT_PART, get_template
+
+# O Worker acrescenta um parágrafo vazio depois de cada lote
+_CHUNK_PARAGRAPH = b"<w:p/>"
+
+
+def write_document(template, output_path, write_rows):
+    """Grava o pacote de ``template`` (um ``CompiledTemplate``) em ``output_path``.
+
+    ``write_rows(dst)`` escreve o XML das linhas da tabela no ``document.xml``
+    e devolve quantos lotes escreveu (um parágrafo vazio por lote).
+    """
+    with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as zout:
+        for info, data in template.parts:
+            if info.filename != DOCUMENT_PART:
+                # Demais partes do pacote seguem sem alteração
+                with metrics.span("save"):
+                    zout.writestr(info, data, compress_type=zipfile.ZIP_DEFLATED)
+                continue
+
+            target = zipfile.ZipInfo(DOCUMENT_PART, date_time=info.date_time)
+            target.compress_type = zipfile.ZIP_DEFLATED
+            with zout.open(target, "w", force_zip64=True) as dst:
+                dst.write(template.head)
+                n_chunks = write_rows(dst)
+                dst.write(template.middle)
+                dst.write(_CHUNK_PARAGRAPH * n_chunks)
+                dst.write(template.tail)
+
+
+def write_docx_stream(template_path, output_path, columns, chunks, table_index=1,
+                      progress=None):
+    """Escreve o relatório em ``output_path`` a partir de ``chunks``.
+
+    ``chunks`` é qualquer iterável de lotes de linhas (sequências de str);
+    cada lote é consumido, escrito e descartado. ``progress``, se informado,
+    recebe o total de linhas escritas após cada lote. Devolve esse total.
+    """
+    with metrics.span("template"):
+        split = get_template(template_path, columns, table_index)
+    rows_written = 0
+
+    def write_rows(dst):
+        nonlocal rows_written
+        n_chunks = 0
+        for rows in chunks:
+            if not rows:
+                continue
+            with metrics.span("rows"):
+                dst.write(rows_xml(rows, split.prototypes).encode("utf-8"))
+            rows_written += len(rows)
+            n_chunks += 1
+            if progress is not None:
+                progress(rows_written)
+        return n_chunks
+
+    write_document(split, output_path, write_rows)
+    metrics.count("rows", rows_written)
+    metrics.count("bytes", os.path.getsize(output_path))
+    return rows_written
+
+
+def export_docx_stream(rendered, template_path, output_path, chunk_size=1000,
+                       table_index=1, progress=None, formatters=None):
+    """Atalho de :func:`write_docx_stream` para uma tabela.
+
+    Aceita um :class:`~qtexpotool.render.RenderedTable` ou um DataFrame; o
+    DataFrame é formatado lote a lote, com ``formatters`` (ver
+    :func:`~qtexpotool.render.render_chunks`), à medida que é escrito.
+    """
+    if isinstance(rendered, RenderedTable):
+        chunks = rendered.iter_chunks(chunk_size)
+    else:
+        chunks = render_chunks(rendered, chunk_size, formatters)
+    return write_docx_stream(
+        template_path,
+        output_path,
+        list(rendered.columns),
+        chunks,
+        table_index=table_index,
+        progress=progress,
+    )
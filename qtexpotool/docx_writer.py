@@ -0,0 +1,140 @@
+"""Escrita em bloco das linhas da tabela do relatório Word.
+
+Em vez de ``table.add_row()`` + ``cell.text`` + ``Pt(8)`` célula a célula, o
+XML de ``<w:tr>``/``<w:tc>`` de um lote inteiro é montado como texto a partir
+de um modelo por coluna e convertido em elementos com um único parse. O XML
+resultante é idêntico ao gerado pelo caminho antigo do python-docx.
+"""
+
+import re
+
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+from docx.shared import Length, Pt
+
+from qtexpotool.instrument import metrics
+
+# Alinhamento/tamanho usados nas células de dados (Pt(8) == 16 meio-pontos)
+ALIGNMENT = "center"
+FONT_HALF_POINTS = 16
+
+# Caracteres de controle que o XML não aceita (o lxml recusaria o mesmo texto)
+_INVALID_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+_SPECIAL_CHARS = ("\t", "\n", "\r")
+
+
+def _t_xml(text):
+    if len(text.strip()) < len(text):
+        return f'<w:t xml:space="preserve">{text.translate(_ESCAPES)}</w:t>'
+    return f"<w:t>{text.translate(_ESCAPES)}</w:t>"
+
+
+def run_content_xml(text: str) -> str:
+    """Conteúdo de um ``<w:r>`` equivalente a ``run.text = text``."""
+    if not text:
+        return ""
+    if not any(char in text for char in _SPECIAL_CHARS):
+        return _t_xml(text)
+
+    # Tab vira <w:tab/>, quebras de linha viram <w:br/> (igual ao python-docx)
+    parts = []
+    buffer = []
+    for char in text:
+        if char == "\t" or char in "\r\n":
+            if buffer:
+                parts.append(_t_xml("".join(buffer)))
+                buffer.clear()
+            parts.append("<w:tab/>" if char == "\t" else "<w:br/>")
+        else:
+            buffer.append(char)
+    if buffer:
+        parts.append(_t_xml("".join(buffer)))
+    return "".join(parts)
+
+
+def cell_prototypes(table, font_half_points=FONT_HALF_POINTS, alignment=ALIGNMENT):
+    """Modelo XML de cada coluna, montado uma única vez a partir do ``tblGrid``.
+
+    Devolve pares ``(célula vazia, prefixo da célula preenchida)`` que
+    reproduzem o ``tcPr`` criado por ``table.add_row()`` e a formatação de
+    parágrafo/run aplicada pelo Worker.
+    """
+    prototypes = []
+    for grid_col in table._tbl.tblGrid.gridCol_lst:
+        tc_pr = ""
+        if grid_col.w is not None:
+            twips = Length(grid_col.w).twips
+            tc_pr = f'<w:tcPr><w:tcW w:type="dxa" w:w="{twips}"/></w:tcPr>'
+        prefix = (
+            f"<w:tc>{tc_pr}<w:p>"
+            f'<w:pPr><w:jc w:val="{alignment}"/></w:pPr>'
+            f'<w:r><w:rPr><w:sz w:val="{font_half_points}"/></w:rPr>'
+        )
+        prototypes.append((f"<w:tc>{tc_pr}<w:p/></w:tc>", prefix))
+    return prototypes
+
+
+_CELL_END = "</w:r></w:p></w:tc>"
+
+
+@metrics.timed("header")
+def style_header_row(table, columns, style="EstiloPadrao"):
+    """Aplica o estilo da tabela e escreve o cabeçalho cinza em negrito."""
+    table.style = style
+    hdr_cells = table.rows[0].cells
+
+    for j, column in enumerate(columns):
+        hdr_cells[j].text = column
+        xml_bg_cinza = parse_xml(r'<w:shd {} w:fill="D9D9D9"/>'.format(nsdecls("w")))
+        hdr_cells[j]._element.get_or_add_tcPr().append(xml_bg_cinza)
+        for paragraph in hdr_cells[j].paragraphs:
+            for run in paragraph.runs:
+                run.font.size = Pt(8)
+                run.bold = True
+            paragraph.alignment = 1
+
+
+def rows_xml(rows, prototypes) -> str:
+    """XML de ``<w:tr>`` para cada linha de ``rows`` (sequências de str)."""
+    n_cols = len(prototypes)
+    parts = []
+    for row in rows:
+        if len(row) > n_cols:
+            raise IndexError(
+                f"Linha com {len(row)} valores para uma tabela de {n_cols} colunas"
+            )
+        parts.append("<w:tr>")
+        for (_, prefix), text in zip(prototypes, row):
+            parts.append(prefix)
+            parts.append(run_content_xml(text))
+            parts.append(_CELL_END)
+        # Colunas sem valor ficam como o add_row() as cria
+        for empty_cell, _ in prototypes[len(row):]:
+            parts.append(empty_cell)
+        parts.append("</w:tr>")
+    xml = "".join(parts)
+    if _INVALID_XML_CHARS.search(xml):
+        raise ValueError("Texto com caracteres de controle não suportados pelo XML")
+    return xml
+
+
+class BulkTableWriter:
+    """Acrescenta lotes de linhas já convertidas em texto ao fim de uma tabela."""
+
+    def __init__(self, table, prototypes=None):
+        self.table = table
+        # Protótipos prontos (de um modelo compilado) evitam reler o tblGrid
+        self.prototypes = prototypes if prototypes is not None else cell_prototypes(table)
+
+    def append_rows(self, rows):
+        """Acrescenta ``rows`` à tabela e devolve a quantidade de linhas escritas."""
+        with metrics.span("rows"):
+            body = rows_xml(rows, self.prototypes)
+            if not body:
+                return 0
+            fragment = parse_xml(f"<w:tbl {nsdecls('w')}>{body}</w:tbl>")
+            trs = list(fragment)
+            self.table._tbl.extend(trs)
+        metrics.count("rows", len(trs))
+        return len(trs)
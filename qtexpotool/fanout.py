@@ -0,0 +1,182 @@
+"""Exportação para vários formatos de uma vez: DOCX, XLSX e PDF em paralelo.
+
+A tabela é formatada uma única vez e cada formato é escrito num processo
+próprio (os escritores são Python puro e disputariam o GIL em threads). O
+tempo total fica perto do formato mais lento, não da soma dos três. Cada
+tabela é serializada uma vez, num arquivo temporário, e os processos recebem
+só o caminho: o DOCX e o PDF leem o mesmo arquivo, cada um com a sua cópia
+em memória. O progresso de cada processo volta por uma fila e a barra mostra
+a soma das linhas escritas em todos os formatos.
+
+Subir os processos (spawn, com as importações do pandas e do python-docx) e
+o Manager da fila custa perto de 2 s; até :data:`PARALLEL_MIN_ROWS` linhas
+os formatos são escritos um depois do outro, no próprio processo, o que sai
+mais rápido.
+"""
+
+import os
+import pickle
+import queue
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import get_context
+
+from qtexpotool.docx_stream import export_docx_stream
+from qtexpotool.fixedpoint import HALF_EVEN
+from qtexpotool.instrument import metrics
+from qtexpotool.pdf_writer import export_pdf_stream
+from qtexpotool.pipeline import ExportResult
+from qtexpotool.progress import ProgressReporter
+from qtexpotool.render import render_frame, report_formatters
+from qtexpotool.xlsx_writer import export_xlsx_stream, report_number_formats, report_rounding
+
+DOCX = "docx"
+XLSX = "xlsx"
+PDF = "pdf"
+TARGETS = (DOCX, XLSX, PDF)
+
+# Abaixo disto o custo de subir o pool passa do ganho do paralelismo: com
+# ~80 µs/linha somando os três formatos e o DOCX, o mais lento, em ~45% do
+# total, 50 mil linhas economizam ~2 s, o mesmo que o pool custa
+PARALLEL_MIN_ROWS = 50_000
+
+
+def _write_target(target, data, output, template_path, chunk_size, progress, decimals=2,
+                  rounding=HALF_EVEN):
+    """Escreve ``output`` no formato ``target``; ``data`` é a tabela formatada
+    (DOCX e PDF) ou o DataFrame (XLSX, com as distâncias como números
+    arredondados em ``decimals`` casas com o modo ``rounding``)."""
+    start = time.perf_counter()
+    try:
+        if target == DOCX:
+            rows = export_docx_stream(data, template_path, output, chunk_size=chunk_size,
+                                      progress=progress)
+        elif target == XLSX:
+            rows = export_xlsx_stream(data, output, number_formats=report_number_formats(decimals),
+                                      progress=progress,
+                                      rounding=report_rounding(decimals, rounding))
+        elif target == PDF:
+            rows = export_pdf_stream(data, output, chunk_size=chunk_size, progress=progress)
+        else:
+            raise ValueError(f"Formato desconhecido: {target!r}")
+    except Exception as e:
+        return ExportResult(source=target, error=f"{type(e).__name__}: {e}")
+    return ExportResult(source=target, output=str(output), rows=rows,
+                        seconds=time.perf_counter() - start)
+
+
+def _target_task(target, payload_path, output, template_path, chunk_size, decimals, rounding,
+                 events):
+    with open(payload_path, "rb") as payload:
+        data = pickle.load(payload)
+    reporter = ProgressReporter(
+        len(data), lambda info: events.put((target, info.done)), interval=0.25
+    )
+    with metrics.run(f"export_{target}"):
+        return _write_target(target, data, output, template_path, chunk_size,
+                             reporter.update, decimals, rounding)
+
+
+def export_targets(df, outputs, template_path=None, rendered=None, max_workers=None,
+                   chunk_size=1000, progress=None, cancelled=None, decimals=2,
+                   rounding=HALF_EVEN, dms_decimals=None,
+                   min_parallel_rows=PARALLEL_MIN_ROWS):
+    """Exporta ``df`` para cada ``{formato: caminho}`` de ``outputs``.
+
+    ``rendered`` reaproveita uma tabela já formatada (senão ``df`` é
+    formatado aqui, uma vez). ``progress`` recebe a soma das linhas escritas
+    em todos os formatos (o total é ``len(df) * len(outputs)``);
+    ``cancelled``, se informado, cancela os formatos que ainda não começaram.
+    ``decimals`` e ``rounding`` são os da Distância e ``dms_decimals`` o das
+    coordenadas. Tabelas com menos de ``min_parallel_rows`` linhas são
+    escritas em sequência, sem pool. Devolve ``{formato: ExportResult}``.
+    """
+    unknown = set(outputs) - set(TARGETS)
+    if unknown:
+        raise ValueError(f"Formatos desconhecidos: {sorted(unknown)}")
+    if DOCX in outputs and not template_path:
+        raise ValueError("O DOCX precisa de um documento modelo")
+
+    if rendered is None and (DOCX in outputs or PDF in outputs):
+        with metrics.span("render"):
+            rendered = render_frame(df, report_formatters(decimals, rounding, dms_decimals))
+    data = {target: df if target == XLSX else rendered for target in outputs}
+    template_path = str(template_path) if template_path else None
+
+    results = {}
+    done_rows = dict.fromkeys(outputs, 0)
+
+    def report(target, rows):
+        done_rows[target] = rows
+        if progress is not None:
+            progress(sum(done_rows.values()))
+
+    max_workers = max_workers or min(len(outputs), os.cpu_count() or 1)
+    if max_workers <= 1 or len(outputs) == 1 or len(df) < min_parallel_rows:
+        # Um núcleo só ou tabela pequena: um formato depois do outro, sem
+        # copiar os dados
+        for target, output in outputs.items():
+            if cancelled is not None and cancelled():
+                results[target] = ExportResult(source=target, error="Cancelado")
+                continue
+            results[target] = _write_target(
+                target, data[target], output, template_path, chunk_size,
+                lambda rows, target=target: report(target, rows), decimals, rounding,
+            )
+            report(target, len(df))
+        return results
+
+    # spawn, não fork: a interface chama daqui com as threads do Qt rodando.
+    # A pasta temporária só é apagada depois que o pool termina.
+    spawn = get_context("spawn")
+    with tempfile.TemporaryDirectory(prefix="qtexpotool-") as tmp, \
+            spawn.Manager() as manager, \
+            ProcessPoolExecutor(max_workers=max_workers, mp_context=spawn) as pool:
+        # Cada tabela vai para o disco uma vez só, mesmo que vá para dois
+        # processos; pela fila do pool passa só o caminho
+        with metrics.span("pickle"):
+            payloads = {}
+            for target in outputs:
+                key = id(data[target])
+                if key not in payloads:
+                    payloads[key] = os.path.join(tmp, f"{len(payloads)}.pickle")
+                    with open(payloads[key], "wb") as payload:
+                        pickle.dump(data[target], payload, protocol=pickle.HIGHEST_PROTOCOL)
+        events = manager.Queue()
+        futures = {
+            pool.submit(
+                _target_task, target, payloads[id(data[target])], str(output), template_path,
+                chunk_size, decimals, rounding, events,
+            ): target
+            for target, output in outputs.items()
+        }
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            while True:
+                try:
+                    target, rows = events.get_nowait()
+                except queue.Empty:
+                    break
+                if target not in results:
+                    done_rows[target] = rows
+            for future in done:
+                target = futures[future]
+                if future.cancelled():
+                    results[target] = ExportResult(source=target, error="Cancelado")
+                else:
+                    try:
+                        results[target] = future.result()
+                    except Exception as e:
+                        # Processo morto (BrokenProcessPool): só este formato falha
+                        results[target] = ExportResult(source=target,
+                                                       error=f"{type(e).__name__}: {e}")
+                done_rows[target] = len(df)
+            if progress is not None:
+                progress(sum(done_rows.values()))
+            if cancelled is not None and cancelled():
+                for future in pending:
+                    future.cancel()
+
+    return {target: results[target] for target in outputs}
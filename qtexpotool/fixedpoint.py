@@ -0,0 +1,136 @@
+"""Valores decimais em ponto fixo: inteiros ``int64`` em centésimos, milésimos...
+
+As distâncias chegam como float64 (``67.752`` lido de ``"67,752 m"``). Cada
+valor é convertido uma única vez no inteiro exato do texto original, em
+milionésimos (:data:`EXACT_DECIMALS`); daí em diante o arredondamento para
+as casas do relatório, as somas e a formatação são feitos só com inteiros.
+Assim o empate ``67,755`` arredonda sempre do mesmo jeito (o float
+``67.755`` é na verdade ``67.75499999...``) e a soma do perímetro é
+exatamente a soma dos valores como aparecem no documento.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+# Modos de arredondamento
+HALF_EVEN = "half_even"  # empate vai para o par (NBR 5891)
+HALF_UP = "half_up"  # empate se afasta do zero
+DOWN = "down"  # trunca
+ROUNDING_MODES = (HALF_EVEN, HALF_UP, DOWN)
+
+# Casas guardadas na conversão do float (o suficiente para as planilhas)
+EXACT_DECIMALS = 6
+# Acima disto os milionésimos não cabem com folga em int64
+MAX_ABS_VALUE = 2**53 / 10**EXACT_DECIMALS
+
+
+@lru_cache(maxsize=None)
+def _digit_table(width):
+    """Textos de 0 a 10**width - 1, com e sem zeros à esquerda."""
+    size = 10**width
+    padded = np.array([f"{i:0{width}d}" for i in range(size)])
+    unpadded = np.array([str(i) for i in range(size)])
+    return padded, unpadded
+
+
+def integer_strings(ints, thousands_sep="") -> np.ndarray:
+    """Converte inteiros não negativos em texto, em grupos de três dígitos.
+
+    Usa tabelas de consulta em vez de ``str()`` por valor e já insere o
+    separador de milhar, se houver.
+    """
+    padded, unpadded = _digit_table(3)
+    ints = np.asarray(ints, dtype=np.int64)
+    low = ints % 1000
+    rest = ints // 1000
+    big = rest > 0
+    if not big.any():
+        return unpadded[low]
+
+    # Só os valores com mais de três dígitos seguem para o próximo grupo
+    head = integer_strings(rest[big], thousands_sep)
+    if thousands_sep:
+        head = np.char.add(head, thousands_sep)
+    tail = np.char.add(head, padded[low[big]])
+    out = unpadded[low].astype(tail.dtype)
+    out[big] = tail
+    return out
+
+
+def exact_units(values) -> tuple:
+    """``(milionésimos em int64, máscara dos válidos)`` de um array de float.
+
+    Cada valor vira o decimal mais curto que o representa (``67.755`` ->
+    ``67755000``), testando de 0 a :data:`EXACT_DECIMALS` casas. ``nan``,
+    ``inf`` e valores acima de :data:`MAX_ABS_VALUE` ficam inválidos (0).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    with np.errstate(invalid="ignore"):
+        valid = np.abs(values) < MAX_ABS_VALUE
+    values = np.where(valid, values, 0.0)
+
+    units = np.round(values * 10**EXACT_DECIMALS)
+    pending = valid.copy()
+    for decimals in range(EXACT_DECIMALS):
+        if not pending.any():
+            break
+        scaled = np.round(values * 10**decimals)
+        hit = pending & (scaled / 10**decimals == values)
+        units[hit] = scaled[hit] * 10 ** (EXACT_DECIMALS - decimals)
+        pending &= ~hit
+    return units.astype(np.int64), valid
+
+
+def rescale(units, from_decimals, to_decimals, rounding=HALF_EVEN) -> np.ndarray:
+    """Muda a escala de ``units`` de ``from_decimals`` para ``to_decimals`` casas."""
+    if rounding not in ROUNDING_MODES:
+        raise ValueError(f"Modo de arredondamento desconhecido: {rounding!r}")
+    units = np.asarray(units, dtype=np.int64)
+    if to_decimals >= from_decimals:
+        return units * 10 ** (to_decimals - from_decimals)
+
+    factor = 10 ** (from_decimals - to_decimals)
+    quotient, remainder = np.divmod(np.abs(units), factor)
+    half = factor // 2
+    if rounding == HALF_UP:
+        quotient += remainder >= half
+    elif rounding == HALF_EVEN:
+        quotient += (remainder > half) | ((remainder == half) & (quotient % 2 == 1))
+    return np.where(units < 0, -quotient, quotient)
+
+
+def to_units(values, decimals=2, rounding=HALF_EVEN) -> tuple:
+    """``(valores em int64 com ``decimals`` casas, máscara dos válidos)``."""
+    units, valid = exact_units(values)
+    return rescale(units, EXACT_DECIMALS, decimals, rounding), valid
+
+
+def units_sum(units, valid=None) -> int:
+    """Soma exata (``int`` do Python) dos valores válidos."""
+    units = np.asarray(units, dtype=np.int64)
+    if valid is not None:
+        units = units[valid]
+    return int(units.sum())
+
+
+def format_units(units, decimals=2, decimal_sep=",", suffix="", thousands_sep="",
+                 valid=None) -> np.ndarray:
+    """``123456`` (centésimos) -> ``"1234,56"``; inválidos saem como ``"nan"``."""
+    units = np.asarray(units, dtype=np.int64)
+    ints = np.abs(units)
+    scale = 10**decimals
+    out = integer_strings(ints // scale, thousands_sep)
+    if decimals:
+        if decimals <= 3:
+            frac = _digit_table(decimals)[0][ints % scale]
+        else:
+            frac = np.char.zfill(integer_strings(ints % scale), decimals)
+        out = np.char.add(np.char.add(out, decimal_sep), frac)
+    out = np.where(units < 0, np.char.add("-", out), out)
+    if suffix:
+        out = np.char.add(out, suffix)
+    out = out.astype(object)
+    if valid is not None:
+        out[~valid] = "nan" + suffix
+    return out
@@ -0,0 +1,267 @@
+"""Reexportação incremental do DOCX: só as linhas alteradas são refeitas.
+
+Ao lado do documento fica um arquivo ``<saída>.linhas`` com o hash de cada
+linha do DataFrame (``pd.util.hash_pandas_object``) e o XML ``<w:tr>`` já
+pronto de cada uma. Na exportação seguinte as linhas com hash conhecido
+reaproveitam o XML guardado (trechos contíguos são copiados de uma vez) e só
+as linhas novas ou alteradas são formatadas e convertidas; as removidas
+simplesmente não entram. Se as colunas, os tipos ou o modelo mudarem, o
+arquivo auxiliar é ignorado e tudo é refeito.
+
+Formato do ``.linhas``: ``_MAGIC``, tamanho (8 bytes) e JSON do cabeçalho,
+hashes (``uint64``), deslocamentos (``int64``, n + 1) e o XML das linhas.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from qtexpotool.docx_stream import write_document
+from qtexpotool.docx_writer import rows_xml
+from qtexpotool.fixedpoint import HALF_EVEN
+from qtexpotool.instrument import metrics
+from qtexpotool.render import render_frame, report_formatters
+from qtexpotool.template import get_template
+
+SIDECAR_SUFFIX = ".linhas"
+# Muda quando o formato do arquivo auxiliar ou do XML das linhas muda
+SIDECAR_VERSION = 2
+
+_MAGIC = b"QTXLINHAS\n"
+_ROW_END = b"</w:tr>"
+
+
+@dataclass
+class IncrementalResult:
+    rows: int = 0
+    reused: int = 0  # linhas copiadas da exportação anterior
+    rendered: int = 0  # linhas novas ou alteradas
+    removed: int = 0  # linhas da exportação anterior que saíram
+
+    @property
+    def full(self):
+        return self.reused == 0
+
+
+def sidecar_path(output_path) -> Path:
+    return Path(f"{output_path}{SIDECAR_SUFFIX}")
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """Hash de 64 bits de cada linha (valores de todas as colunas, sem o índice)."""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy(dtype=np.uint64)
+
+
+def sidecar_key(df: pd.DataFrame, template, decimals=2, rounding=HALF_EVEN,
+                dms_decimals=None) -> str:
+    """O XML guardado só vale para as mesmas colunas, tipos, células do modelo
+    e formatação da Distância e das coordenadas."""
+    parts = [
+        str(SIDECAR_VERSION),
+        json.dumps([str(column) for column in df.columns]),
+        json.dumps([str(dtype) for dtype in df.dtypes]),
+        repr(template.prototypes),
+        f"{decimals}:{rounding}:{dms_decimals}",
+    ]
+    return hashlib.blake2b("|".join(parts).encode(), digest_size=16).hexdigest()
+
+
+class RowStore:
+    """Arquivo auxiliar da exportação anterior, com o XML mapeado em memória."""
+
+    def __init__(self, hashes, offsets, file, blob):
+        self.hashes = hashes
+        self.offsets = offsets
+        self._file = file
+        self.blob = blob
+
+    @classmethod
+    def open(cls, path, key):
+        """Abre ``path``; ``None`` se não existir, estiver corrompido ou for de outra chave."""
+        try:
+            f = open(path, "rb")
+        except OSError:
+            return None
+        try:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError("assinatura")
+            size = int.from_bytes(f.read(8), "little")
+            meta = json.loads(f.read(size))
+            if meta.get("key") != key:
+                raise ValueError("chave")
+            n = meta["rows"]
+            hashes = np.frombuffer(f.read(8 * n), dtype=np.uint64)
+            offsets = np.frombuffer(f.read(8 * (n + 1)), dtype=np.int64)
+            start = f.tell()
+            if len(hashes) != n or len(offsets) != n + 1 \
+                    or os.fstat(f.fileno()).st_size - start != offsets[-1]:
+                raise ValueError("tamanho")
+            blob = b""
+            if offsets[-1]:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                blob = memoryview(mapped)[start:]
+        except (ValueError, KeyError, TypeError):
+            f.close()
+            return None
+        return cls(hashes, offsets, f, blob)
+
+    def close(self):
+        if isinstance(self.blob, memoryview):
+            mapped = self.blob.obj
+            self.blob.release()
+            mapped.close()
+        self.blob = b""
+        self._file.close()
+
+
+def _split_rows(xml: bytes) -> np.ndarray:
+    """Deslocamentos do início de cada ``<w:tr>`` em ``xml`` (mais o fim)."""
+    # Os textos das células vêm escapados, então "</w:tr>" só aparece no fim da linha
+    ends = []
+    position = xml.find(_ROW_END)
+    while position >= 0:
+        position += len(_ROW_END)
+        ends.append(position)
+        position = xml.find(_ROW_END, position)
+    return np.array([0] + ends, dtype=np.int64)
+
+
+def _segments(sources, starts, ends, chunk_size):
+    """Trechos contíguos ``(fonte, início, fim, linhas até aqui)`` para copiar de uma vez."""
+    n = len(starts)
+    if not n:
+        return
+    breaks = np.flatnonzero((sources[1:] != sources[:-1]) | (starts[1:] != ends[:-1])) + 1
+    # Quebra também a cada lote, para o progresso e os parágrafos dos lotes
+    breaks = np.union1d(breaks, np.arange(chunk_size, n, chunk_size))
+    bounds = np.concatenate(([0], breaks, [n]))
+    for first, last in zip(bounds[:-1], bounds[1:]):
+        yield int(sources[first]), int(starts[first]), int(ends[last - 1]), int(last)
+
+
+def _removed_rows(old_hashes, new_hashes) -> int:
+    """Linhas da exportação anterior sem correspondente na nova.
+
+    Linhas repetidas contam uma a uma: três cópias antes e uma agora são
+    duas removidas.
+    """
+    old_unique, old_counts = np.unique(old_hashes, return_counts=True)
+    new_unique, new_counts = np.unique(new_hashes, return_counts=True)
+    _, old_index, new_index = np.intersect1d(old_unique, new_unique, assume_unique=True,
+                                             return_indices=True)
+    kept = np.minimum(old_counts[old_index], new_counts[new_index]).sum()
+    return int(len(old_hashes) - kept)
+
+
+def export_docx_incremental(df: pd.DataFrame, template_path, output_path, chunk_size=1000,
+                            table_index=1, progress=None, decimals=2,
+                            rounding=HALF_EVEN, dms_decimals=None) -> IncrementalResult:
+    """Exporta ``df`` para ``output_path`` reaproveitando a exportação anterior.
+
+    Gera o mesmo documento que :func:`~qtexpotool.docx_stream.export_docx_stream`
+    e atualiza o arquivo auxiliar. ``progress`` recebe o total de linhas
+    escritas, lote a lote; ``decimals`` e ``rounding`` são os da Distância e
+    ``dms_decimals`` o das coordenadas.
+    """
+    output_path = Path(output_path)
+    with metrics.span("template"):
+        template = get_template(template_path, [str(c) for c in df.columns], table_index)
+    key = sidecar_key(df, template, decimals, rounding, dms_decimals)
+    formatters = report_formatters(decimals, rounding, dms_decimals)
+    with metrics.span("hash"):
+        hashes = row_hashes(df)
+
+    n = len(df)
+    side_path = sidecar_path(output_path)
+    tmp_sidecar = side_path.with_name(side_path.name + ".tmp")
+    store = RowStore.open(side_path, key)
+    try:
+        with metrics.span("diff"):
+            found = np.zeros(n, dtype=bool)
+            old_rows = np.zeros(n, dtype=np.int64)
+            if store is not None and len(store.hashes):
+                unique, first = np.unique(store.hashes, return_index=True)
+                position = np.searchsorted(unique, hashes).clip(max=len(unique) - 1)
+                found = unique[position] == hashes
+                old_rows = first[position]
+
+        # O XML das linhas alteradas é feito lote a lote, junto com a escrita:
+        # numa primeira exportação a tabela inteira nunca fica na memória
+        lengths = np.zeros(n, dtype=np.int64)
+        old_blob = store.blob if store is not None else b""
+
+        def chunk_xml(first, last):
+            """Origem, início e fim do XML de cada linha do lote, e o XML novo."""
+            kept = found[first:last]
+            changed = np.flatnonzero(~kept) + first
+            new_xml = b""
+            new_offsets = np.zeros(1, dtype=np.int64)
+            if len(changed):
+                with metrics.span("render"):
+                    rendered = render_frame(df.take(changed), formatters)
+                with metrics.span("rows"):
+                    new_xml = rows_xml(rendered.values.tolist(), template.prototypes).encode("utf-8")
+                    new_offsets = _split_rows(new_xml)
+            # Origem de cada linha: 0 = XML anterior, 1 = XML novo
+            sources = (~kept).astype(np.int8)
+            starts = np.empty(last - first, dtype=np.int64)
+            ends = np.empty(last - first, dtype=np.int64)
+            if store is not None:
+                old = old_rows[first:last][kept]
+                starts[kept] = store.offsets[old]
+                ends[kept] = store.offsets[old + 1]
+            starts[~kept] = new_offsets[:-1]
+            ends[~kept] = new_offsets[1:]
+            return sources, starts, ends, memoryview(new_xml)
+
+        try:
+            with open(tmp_sidecar, "wb") as side:
+                meta = json.dumps({"key": key, "rows": n}).encode()
+                side.write(_MAGIC + len(meta).to_bytes(8, "little") + meta)
+                side.write(hashes.tobytes())
+                # Os deslocamentos só são conhecidos no fim: reserva o espaço
+                offsets_at = side.tell()
+                side.write(bytes(8 * (n + 1)))
+
+                def write_rows(dst):
+                    for first in range(0, n, chunk_size):
+                        last = min(first + chunk_size, n)
+                        sources, starts, ends, new_xml = chunk_xml(first, last)
+                        lengths[first:last] = ends - starts
+                        buffers = (old_blob, new_xml)
+                        for source, start, end, _ in _segments(sources, starts, ends,
+                                                                last - first):
+                            piece = buffers[source][start:end]
+                            dst.write(piece)
+                            side.write(piece)
+                        if progress is not None:
+                            progress(last)
+                    return -(-n // chunk_size)
+
+                write_document(template, output_path, write_rows)
+                side.seek(offsets_at)
+                side.write(np.concatenate(([0], np.cumsum(lengths))).astype(np.int64).tobytes())
+        except BaseException:
+            tmp_sidecar.unlink(missing_ok=True)
+            raise
+    finally:
+        if store is not None:
+            store.close()
+    os.replace(tmp_sidecar, side_path)
+
+    result = IncrementalResult(
+        rows=n,
+        reused=int(found.sum()),
+        rendered=int(n - found.sum()),
+        removed=_removed_rows(store.hashes, hashes) if store is not None else 0,
+    )
+    metrics.count("rows", n)
+    metrics.count("rows_reused", result.reused)
+    metrics.count("bytes", os.path.getsize(output_path))
+    return result
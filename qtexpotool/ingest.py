@@ -0,0 +1,225 @@
+"""Leitura tipada das planilhas Excel.
+
+Em vez de ``pd.read_excel(...).astype(str)``, cada coluna conhecida recebe um
+tipo explícito e as distâncias (``"123,45 m"``) já chegam como float64, de
+modo que o restante do programa não precisa converter texto de novo.
+"""
+
+import importlib.util
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+# Tipos de coluna aceitos no esquema
+TEXT = "text"
+FLOAT = "float"
+DISTANCE = "distance"
+COORDINATE = "coordinate"  # texto DMS, conferido por qtexpotool.coords
+CATEGORY = "category"  # texto com poucos valores distintos
+SCHEMA_KINDS = (TEXT, FLOAT, DISTANCE, COORDINATE, CATEGORY)
+
+# Colunas do roteiro perimétrico (modelo.docx)
+DEFAULT_SCHEMA = {
+    "De": TEXT,
+    "Para": TEXT,
+    "Coord. N(Y)": FLOAT,
+    "Coord. E(X)": FLOAT,
+    "Azimute": TEXT,
+    "Distância": DISTANCE,
+    "Fator K": FLOAT,
+    "Latitude": COORDINATE,
+    "Longitude": COORDINATE,
+}
+
+
+def available_engines():
+    """Motores de leitura instalados, na ordem de preferência."""
+    engines = []
+    if importlib.util.find_spec("python_calamine") is not None:
+        engines.append("calamine")
+    engines.append("openpyxl")
+    return engines
+
+
+def default_engine():
+    """Motor mais rápido instalado; ``None`` deixa o pandas escolher pela extensão."""
+    return "calamine" if "calamine" in available_engines() else None
+
+
+def parse_number(values: pd.Series, errors="raise") -> np.ndarray:
+    """Converte textos como ``"123,45 m"`` ou ``"9720565,46"`` em float64.
+
+    Com ``errors="coerce"`` o texto que não é número vira NaN, em vez de
+    ``ValueError``.
+    """
+    if values.dtype.kind in "fiub":
+        return values.to_numpy(dtype=np.float64)
+    text = (
+        values.astype(str)
+        .str.replace(",", ".", regex=False)
+        .str.replace(" m", "", regex=False)
+    )
+    if errors == "coerce":
+        return pd.to_numeric(text, errors="coerce").to_numpy(dtype=np.float64)
+    return text.astype(np.float64).to_numpy()
+
+
+def apply_schema(df: pd.DataFrame, schema=None, invalid=None) -> pd.DataFrame:
+    """Converte as colunas de ``df`` para os tipos do ``schema`` (no lugar).
+
+    Colunas fora do esquema ficam como foram lidas. Numa coluna ``float`` o
+    texto que não é número vira NaN (a coluna fica float64 em todos os
+    lotes) e, se ``invalid`` for um dict, a quantidade é somada em
+    ``invalid[coluna]``; uma ``distance`` inválida gera ``ValueError``.
+    """
+    if schema is None:
+        schema = DEFAULT_SCHEMA
+
+    for column, kind in schema.items():
+        if column not in df.columns:
+            continue
+        if kind == DISTANCE:
+            try:
+                df[column] = parse_number(df[column])
+            except ValueError as e:
+                raise ValueError(f'Coluna "{column}" com distância inválida: {e}')
+        elif kind == FLOAT:
+            numbers = parse_number(df[column], errors="coerce")
+            bad = int((np.isnan(numbers) & df[column].notna().to_numpy()).sum())
+            if bad and invalid is not None:
+                invalid[column] = invalid.get(column, 0) + bad
+            df[column] = numbers
+        elif kind in (TEXT, COORDINATE):
+            # Mantém o NaN, como o read_excel(dtype=str)
+            df[column] = df[column].where(df[column].isna(), df[column].astype(str))
+        elif kind == CATEGORY:
+            df[column] = df[column].where(df[column].isna(), df[column].astype(str))
+            df[column] = df[column].astype("category")
+    return df
+
+
+def read_excel_typed(file_path, engine=None, schema=None, sheet_name=0,
+                     invalid=None) -> pd.DataFrame:
+    """Lê a planilha com o motor mais rápido disponível e aplica o esquema."""
+    if engine is None:
+        engine = default_engine()
+    df = pd.read_excel(file_path, sheet_name=sheet_name, engine=engine)
+    return apply_schema(df, schema, invalid)
+
+
+@contextmanager
+def _sheet_rows(file_path, engine, sheet_name):
+    """Abre a aba e fornece ``(total de linhas, iterador de linhas)``."""
+    if engine == "calamine":
+        from python_calamine import CalamineWorkbook
+
+        wb = CalamineWorkbook.from_path(str(file_path))
+        if isinstance(sheet_name, int):
+            sheet = wb.get_sheet_by_index(sheet_name)
+        else:
+            sheet = wb.get_sheet_by_name(sheet_name)
+        # O calamine devolve "" para células vazias; _typed_frame as troca por NaN
+        yield sheet.height, sheet.iter_rows()
+        return
+
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[sheet_name] if isinstance(sheet_name, int) else wb[sheet_name]
+        yield ws.max_row, ws.iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def iter_excel_chunks(file_path, chunk_size=10000, schema=None, sheet_name=0,
+                      engine=None, first_chunk_size=None, on_total=None, invalid=None):
+    """Lê a planilha aos poucos, gerando DataFrames tipados de ``chunk_size`` linhas.
+
+    Com o openpyxl usa o modo ``read_only``, que percorre o XML da aba sem
+    carregar a pasta de trabalho inteira. ``first_chunk_size`` permite um
+    primeiro lote menor, para mostrar dados logo; ``on_total`` recebe a
+    estimativa de linhas de dados antes do primeiro lote; ``invalid`` soma os
+    números inválidos de cada coluna (ver :func:`apply_schema`).
+    """
+    if engine is None:
+        engine = default_engine() or "openpyxl"
+    if engine == "openpyxl" and str(file_path).lower().endswith(".xls"):
+        # O openpyxl não lê .xls: a planilha vem inteira, em um único lote
+        df = read_excel_typed(file_path, engine=None, schema=schema, sheet_name=sheet_name,
+                              invalid=invalid)
+        if on_total is not None:
+            on_total(len(df))
+        yield df
+        return
+
+    with _sheet_rows(file_path, engine, sheet_name) as (total, rows):
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = _column_names(header)
+        width = len(columns)
+        if on_total is not None and total:
+            on_total(max(total - 1, 0))
+
+        size = first_chunk_size or chunk_size
+        buffer = []
+        pending_blank = []
+        for row in rows:
+            if len(row) != width:
+                row = list(row[:width])
+                row.extend([None] * (width - len(row)))
+            # Linhas vazias só contam se houver dados depois delas
+            if row.count(None) + row.count("") == width:
+                pending_blank.append(row)
+                continue
+            buffer.extend(pending_blank)
+            pending_blank.clear()
+            buffer.append(row)
+            if len(buffer) >= size:
+                yield apply_schema(_typed_frame(buffer[:size], columns), schema, invalid)
+                del buffer[:size]
+                size = chunk_size
+        if buffer:
+            yield apply_schema(_typed_frame(buffer, columns), schema, invalid)
+
+
+def _column_names(header):
+    # Mesmos nomes que o pandas daria a cabeçalhos vazios ou repetidos
+    names = []
+    for i, name in enumerate(header):
+        name = f"Unnamed: {i}" if name is None else name
+        if name in names:
+            base, count = name, 1
+            while f"{base}.{count}" in names:
+                count += 1
+            name = f"{base}.{count}"
+        names.append(name)
+    return names
+
+
+def _typed_frame(rows, columns):
+    # Igual ao leitor do pandas: floats inteiros viram int, vazios viram NaN.
+    # A conversão é feita coluna a coluna sobre o lote inteiro.
+    df = pd.DataFrame(rows, columns=columns)
+    for i in range(df.shape[1]):
+        values = df.iloc[:, i]
+        if values.dtype.kind == "f":
+            if values.notna().all() and (values % 1 == 0).all():
+                df.isetitem(i, values.astype(np.int64))
+        elif values.dtype == object:
+            text = pd.api.types.infer_dtype(values, skipna=True) == "string"
+            if not text:
+                floats = values.map(type) == float
+                if floats.any():
+                    numbers = pd.to_numeric(values.where(floats), errors="coerce")
+                    whole = floats & (numbers % 1 == 0)
+                    if whole.any():
+                        values = values.mask(whole, numbers[whole].astype(np.int64).astype(object))
+            empty = values.isna() | values.eq("")
+            if empty.any():
+                values = values.mask(empty, np.nan)
+                text = text and not empty.all()
+            df.isetitem(i, values if text else values.infer_objects())
+    return df
@@ -0,0 +1,318 @@
+"""Instrumentação leve das etapas de importação e exportação.
+
+Desligada por padrão: enquanto ``metrics.enabled`` for falso, ``span`` devolve
+um contexto vazio compartilhado e ``count`` retorna na primeira linha. Ligada
+(pela interface ou por ``QTEXPOTOOL_METRICS=1``), mede o tempo de cada etapa
+nomeada, soma contadores (linhas, bytes) e grava uma linha por execução
+(``begin``/``end`` ou ``run``) num log JSONL. Cada execução tem as suas
+medidas: execuções simultâneas (uma importação e uma exportação, vários
+trabalhos do serviço) não se misturam. ``QTEXPOTOOL_METRICS=cprofile``
+ou ``=tracemalloc`` também liga o perfilador correspondente e
+``QTEXPOTOOL_METRICS_LOG`` troca o arquivo do log.
+
+    from qtexpotool.instrument import metrics
+
+    with metrics.run("export_docx", rows=len(df)):
+        with metrics.span("render"):
+            ...
+        metrics.count("rows", len(rows))
+"""
+
+import cProfile
+import functools
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+
+PROFILERS = ("cprofile", "tracemalloc")
+
+logger = logging.getLogger(__name__)
+
+_NULL_SPAN = nullcontext()
+
+
+def default_log_path() -> Path:
+    base = os.environ.get("LOCALAPPDATA") or Path.home() / ".cache"
+    return Path(base) / "qtexpotool" / "metrics.jsonl"
+
+
+class _Span:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics._add_span(self.name, time.perf_counter() - self.start)
+
+
+class Run:
+    """Uma execução (``begin``/``end``), com os seus tempos e contadores."""
+
+    def __init__(self, name, extra):
+        self.name = name
+        self.extra = extra
+        self.start = time.perf_counter()
+        self.spans = {}
+        self.counters = {}
+        self.profile = None
+        self.tracing = False
+
+
+class Metrics:
+    """Tempos por etapa e contadores de cada execução.
+
+    ``span`` e ``count`` vão para a execução ligada à thread atual (ver
+    :meth:`profiled`) ou, sem ela, para as medidas soltas, fora de qualquer
+    execução (:meth:`snapshot` sem argumento).
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.profiler = None
+        self.log_path = default_log_path()
+        self.last = None  # resumo da última execução concluída
+        self._open = []  # execuções começadas e ainda não encerradas
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._spans = {}
+        self._counters = {}
+        # Execuções abertas com o tracemalloc; ele para quando a última termina
+        self._tracers = 0
+        self._started_tracing = False
+
+    def enable(self, log_path=None, profiler=None):
+        if profiler not in (None, *PROFILERS):
+            raise ValueError(f"Perfilador desconhecido: {profiler}")
+        self.enabled = True
+        self.profiler = profiler
+        if log_path is not None:
+            self.log_path = Path(log_path)
+
+    def disable(self):
+        self.enabled = False
+        self.profiler = None
+
+    def span(self, name):
+        """Contexto que soma o tempo gasto em ``name``."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def _target(self):
+        """(tempos, contadores) onde as medidas da thread atual são somadas."""
+        run = getattr(self._local, "run", None)
+        if run is None:
+            return self._spans, self._counters
+        return run.spans, run.counters
+
+    def _add_span(self, name, seconds):
+        with self._lock:
+            spans, _ = self._target()
+            calls, total = spans.get(name, (0, 0.0))
+            spans[name] = (calls + 1, total + seconds)
+
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            _, counters = self._target()
+            counters[name] = counters.get(name, 0) + value
+
+    def timed(self, name=None):
+        """Decorador: cada chamada vira um ``span`` com o nome da função."""
+
+        def decorator(func):
+            span_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def snapshot(self, run=None) -> dict:
+        """Medidas de ``run`` (ou as soltas, fora de qualquer execução)."""
+        spans, counters = (run.spans, run.counters) if run else (self._spans, self._counters)
+        with self._lock:
+            return {
+                "spans": {
+                    name: {"calls": calls, "seconds": round(total, 6)}
+                    for name, (calls, total) in spans.items()
+                },
+                "counters": dict(counters),
+            }
+
+    def begin(self, name, **extra):
+        """Começa uma execução e devolve o ``Run`` (``None`` se desligado).
+
+        Na interface o ``begin`` e o ``end`` ficam na thread principal e o
+        trabalho pesado na thread do worker, que usa ``profiled(run)``.
+        """
+        if not self.enabled:
+            return None
+        run = Run(name, extra)
+        with self._lock:
+            if self.profiler == "tracemalloc":
+                if self._tracers == 0 and not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    self._started_tracing = True
+                self._tracers += 1
+                run.tracing = True
+            self._open.append(run)
+        return run
+
+    @contextmanager
+    def bind(self, run):
+        """Soma as medidas da thread atual em ``run`` durante o bloco."""
+        previous = getattr(self._local, "run", None)
+        self._local.run = run
+        try:
+            yield
+        finally:
+            self._local.run = previous
+
+    @contextmanager
+    def profiled(self, run=None):
+        """``bind(run)`` com o cProfile, se pedido; sem ``run`` não faz nada."""
+        if not self.enabled or run is None:
+            yield
+            return
+        profile = cProfile.Profile() if self.profiler == "cprofile" else None
+        with self.bind(run):
+            if profile is not None:
+                try:
+                    profile.enable()
+                except ValueError:
+                    # Já há um perfilador nesta thread (execução aninhada)
+                    profile = None
+            try:
+                yield
+            finally:
+                if profile is not None:
+                    profile.disable()
+                    run.profile = profile
+
+    def end(self, run, error=None):
+        """Fecha ``run`` e grava uma linha no log (``None`` se já estava fechada)."""
+        with self._lock:
+            if run is None or run not in self._open:
+                return None
+            self._open.remove(run)
+        memory = self._stop_tracing(run)
+        if not self.enabled:
+            return None
+        record = {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "run": run.name,
+            "seconds": round(time.perf_counter() - run.start, 6),
+            **run.extra,
+            **self.snapshot(run),
+        }
+        if error:
+            record["error"] = error
+        if run.profile is not None:
+            record["profile"] = self._save_profile(run.profile, run.name)
+        if memory is not None:
+            record["memory"] = memory
+        self.last = record
+        self._write(record)
+        return record
+
+    @contextmanager
+    def run(self, name, **extra):
+        """``begin`` + ``profiled`` + ``end`` numa thread só (scripts e linha de comando)."""
+        run = self.begin(name, **extra)
+        error = None
+        try:
+            with self.profiled(run):
+                yield run
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self.end(run, error)
+
+    def _save_profile(self, profile, name):
+        stamp = f"{datetime.now():%Y%m%d_%H%M%S}_{os.getpid()}"
+        path = self.log_path.with_name(f"{name}_{stamp}.prof")
+        top = io.StringIO()
+        stats = pstats.Stats(profile, stream=top)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            stats.dump_stats(path)
+        except OSError:
+            path = None
+        stats.sort_stats("cumulative").print_stats(10)
+        return {"path": str(path) if path else None, "top": top.getvalue().splitlines()[-14:]}
+
+    def _stop_tracing(self, run):
+        """Relatório de memória de ``run``; para o tracemalloc com a última execução."""
+        if not run.tracing:
+            return None
+        with self._lock:
+            report = self._memory_report() if tracemalloc.is_tracing() else None
+            self._tracers -= 1
+            if self._tracers == 0 and self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+        return report
+
+    @staticmethod
+    def _memory_report():
+        current, peak = tracemalloc.get_traced_memory()
+        top = tracemalloc.take_snapshot().statistics("lineno")[:5]
+        return {
+            "current_mb": round(current / 2**20, 3),
+            "peak_mb": round(peak / 2**20, 3),
+            "top": [str(stat) for stat in top],
+        }
+
+    def _write(self, record):
+        try:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.log_path, "a", encoding="utf-8") as log:
+                log.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        except OSError as e:
+            logger.warning("Log de métricas indisponível: %s", e)
+
+    def summary(self, record=None) -> str:
+        """Resumo de uma linha (para a barra de status)."""
+        record = record or self.last
+        if not record:
+            return ""
+        spans = sorted(record["spans"].items(), key=lambda item: -item[1]["seconds"])
+        parts = [f"{name} {value['seconds']:.2f}s" for name, value in spans[:5]]
+        rows = record["counters"].get("rows")
+        if rows and record["seconds"]:
+            parts.append(f"{rows / record['seconds']:,.0f} linhas/s".replace(",", "."))
+        size = record["counters"].get("bytes")
+        if size:
+            parts.append(f"{size / 2**20:.1f} MiB")
+        return f"{record['run']}: {record['seconds']:.2f}s (" + ", ".join(parts) + ")"
+
+
+metrics = Metrics()
+
+_setting = os.environ.get("QTEXPOTOOL_METRICS", "").strip().lower()
+if _setting and _setting not in ("0", "false", "no"):
+    metrics.enable(
+        log_path=os.environ.get("QTEXPOTOOL_METRICS_LOG") or None,
+        profiler=_setting if _setting in PROFILERS else None,
+    )
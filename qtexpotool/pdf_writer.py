@@ -0,0 +1,337 @@
+"""Exportação PDF nativa, sem Word, COM ou LibreOffice.
+
+A tabela é escrita direto no PDF, página a página: cada página é montada,
+comprimida e gravada no arquivo assim que fica cheia, e só a posição dos
+objetos é guardada até o ``xref`` final. O uso de memória não depende da
+quantidade de linhas.
+
+O visual segue o ``modelo.docx``: Times, A4 paisagem, cabeçalho em negrito
+com fundo cinza repetido em todas as páginas e textos centralizados. São
+usadas as fontes padrão do PDF (Times-Roman/Times-Bold, WinAnsiEncoding),
+que não precisam ser embutidas.
+"""
+
+import os
+import unicodedata
+import zlib
+
+import numpy as np
+
+from qtexpotool.instrument import metrics
+from qtexpotool.render import RenderedTable, render_frame
+
+# Tamanhos de página em pontos (1/72 pol.)
+A4 = (595.28, 841.89)
+A4_LANDSCAPE = (841.89, 595.28)
+
+# Larguras dos caracteres 32..126 (1/1000 do tamanho da fonte), das AFM padrão
+_TIMES_ROMAN = (
+    250, 333, 408, 500, 500, 833, 778, 180, 333, 333, 500, 564, 250, 333, 250, 278,
+    500, 500, 500, 500, 500, 500, 500, 500, 500, 500, 278, 278, 564, 564, 564, 444,
+    921, 722, 667, 667, 722, 611, 556, 722, 722, 333, 389, 722, 611, 889, 722, 722,
+    556, 722, 667, 556, 611, 722, 722, 944, 722, 722, 611, 333, 278, 333, 469, 500,
+    333, 444, 500, 444, 500, 444, 333, 500, 500, 278, 278, 500, 278, 778, 500, 500,
+    500, 500, 333, 389, 278, 500, 500, 722, 500, 500, 444, 480, 200, 480, 541,
+)
+_TIMES_BOLD = (
+    250, 333, 555, 500, 500, 1000, 833, 278, 333, 333, 500, 570, 250, 333, 250, 278,
+    500, 500, 500, 500, 500, 500, 500, 500, 500, 500, 333, 333, 570, 570, 570, 500,
+    930, 722, 667, 722, 722, 667, 611, 778, 778, 389, 500, 778, 667, 944, 722, 778,
+    611, 778, 722, 556, 667, 722, 722, 1000, 722, 722, 667, 333, 278, 333, 581, 500,
+    333, 500, 556, 444, 556, 444, 333, 500, 556, 278, 333, 556, 278, 833, 556, 500,
+    556, 556, 444, 389, 333, 556, 500, 722, 500, 500, 444, 394, 220, 394, 520,
+)
+# Símbolos comuns nas planilhas que não vêm de uma letra acentuada
+_LATIN1_EXTRA = {"°": (400, 400), "º": (310, 330), "ª": (276, 300), "·": (250, 250)}
+
+# Escape dos literais de texto do PDF
+_PDF_ESCAPES = (("\\", "\\\\"), ("(", "\\("), (")", "\\)"),
+                ("\r", " "), ("\n", " "), ("\t", " "))
+
+
+def _width_table(ascii_widths, bold):
+    """Largura de cada byte WinAnsi, com acentuadas medidas pela letra base."""
+    table = np.full(256, 500, dtype=np.int64)
+    table[32:127] = ascii_widths
+    for code in range(160, 256):
+        char = bytes([code]).decode("cp1252")
+        if char in _LATIN1_EXTRA:
+            table[code] = _LATIN1_EXTRA[char][bold]
+            continue
+        base = unicodedata.normalize("NFD", char)[0]
+        if " " <= base <= "~":
+            table[code] = ascii_widths[ord(base) - 32]
+    return table
+
+
+_WIDTHS = (_width_table(_TIMES_ROMAN, 0), _width_table(_TIMES_BOLD, 1))
+
+
+def encode_text(text) -> bytes:
+    """Texto em WinAnsi; caracteres fora da página de código viram ``?``."""
+    return text.encode("cp1252", "replace")
+
+
+def escape_texts(texts):
+    """Escapa os literais de uma página inteira de uma vez (``str.replace`` em C)."""
+    if not texts:
+        return []
+    joined = "\0".join(texts)
+    for old, new in _PDF_ESCAPES:
+        if old in joined:
+            joined = joined.replace(old, new)
+    escaped = joined.split("\0")
+    if len(escaped) != len(texts):
+        # Algum texto tinha NUL: escapa um por um, descartando o NUL
+        return escape_texts([text.replace("\0", "") for text in texts])
+    return escaped
+
+
+def text_widths(strings, bold=False) -> np.ndarray:
+    """Larguras de ``strings`` em 1/1000 do tamanho da fonte, de uma vez só."""
+    if not strings:
+        return np.zeros(0, dtype=np.int64)
+    codes = np.frombuffer(encode_text("".join(strings)), dtype=np.uint8)
+    lengths = np.fromiter(map(len, strings), dtype=np.int64, count=len(strings))
+    cumulative = np.concatenate(([0], np.cumsum(_WIDTHS[bold][codes])))
+    ends = np.cumsum(lengths)
+    return cumulative[ends] - cumulative[ends - lengths]
+
+
+class PdfTableWriter:
+    """Escreve uma tabela em PDF, uma página por vez.
+
+    As larguras das colunas saem do cabeçalho e do primeiro lote recebido
+    (ou de ``column_widths``, em pontos), ajustadas à largura útil da página.
+    Textos que não cabem na coluna têm a fonte reduzida só naquela célula.
+    """
+
+    def __init__(self, output_path, columns, page_size=A4_LANDSCAPE, margin=36,
+                 font_size=10, title=None, column_widths=None):
+        self.columns = [str(column) for column in columns]
+        self.page_width, self.page_height = page_size
+        self.margin = margin
+        self.font_size = font_size
+        self.title = title
+        self.column_widths = column_widths
+        self.padding = font_size * 0.3
+        self.row_height = font_size * 1.6
+        self.header_height = font_size * 2.2
+
+        top = self.page_height - margin
+        if title:
+            top -= font_size * 2.4
+        self.table_top = top
+        self.table_bottom = margin + font_size * 1.8  # espaço do número da página
+        self.rows_per_page = max(
+            1, int((self.table_top - self.header_height - self.table_bottom) // self.row_height)
+        )
+
+        self._file = open(output_path, "wb")
+        self._offsets = {}
+        self._page_ids = []
+        self._next_id = 5  # 1 catálogo, 2 páginas, 3 e 4 fontes
+        self._pending = []  # linhas da página atual
+        self._x = None
+        self.rows_written = 0
+
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._write_object(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Times-Roman "
+                              b"/Encoding /WinAnsiEncoding >>")
+        self._write_object(4, b"<< /Type /Font /Subtype /Type1 /BaseFont /Times-Bold "
+                              b"/Encoding /WinAnsiEncoding >>")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+
+    def _write(self, data):
+        self._file.write(data)
+
+    def _write_object(self, object_id, body):
+        self._offsets[object_id] = self._file.tell()
+        self._write(b"%d 0 obj\n" % object_id)
+        self._write(body)
+        self._write(b"\nendobj\n")
+
+    def _new_id(self):
+        object_id = self._next_id
+        self._next_id += 1
+        return object_id
+
+    def _layout(self, sample_rows):
+        available = self.page_width - 2 * self.margin
+        if self.column_widths is not None:
+            widths = np.asarray(self.column_widths, dtype=float)
+        else:
+            widths = text_widths(self.columns, bold=True).astype(float)
+            for j in range(len(self.columns)):
+                cells = [row[j] for row in sample_rows]
+                if cells:
+                    widths[j] = max(widths[j], text_widths(cells).max())
+            widths = widths * self.font_size / 1000 + 2 * self.padding
+        total = widths.sum()
+        if total > 0:
+            widths = widths * (available / total)
+        elif len(widths):
+            # Tabela sem texto (ou larguras zeradas): colunas iguais
+            widths = np.full(len(widths), available / len(widths))
+        self._widths = widths.tolist()
+        self._x = (self.margin + np.concatenate(([0.0], np.cumsum(widths)))).tolist()
+
+    def _cells(self, rows, first_baseline, step, bold):
+        """Operadores de texto das linhas ``rows``, centralizados em cada coluna.
+
+        As larguras de todos os textos são medidas de uma vez por página.
+        """
+        size = self.font_size
+        font = "/F2" if bold else "/F1"
+        n_columns = len(self.columns)
+        texts = [text for row in rows for text in row]
+        measured = (text_widths(texts, bold) * (size / 1000)).tolist()
+        columns = [
+            (self._x[j], self._widths[j], self._widths[j] - 2 * self.padding)
+            for j in range(n_columns)
+        ]
+        ops = []
+        for k, text in enumerate(escape_texts(texts)):
+            i, j = divmod(k, n_columns)
+            x, column_width, room = columns[j]
+            width = measured[k]
+            cell_size = size
+            if width > room:
+                cell_size = size * room / width
+                width = room
+            ops.append("%s %.2f Tf 1 0 0 1 %.2f %.2f Tm (%s) Tj" % (
+                font, cell_size, x + (column_width - width) / 2,
+                first_baseline - i * step, text,
+            ))
+        return ops
+
+    def _flush_page(self):
+        rows = self._pending
+        self._pending = []
+        size = self.font_size
+        left, right = self._x[0], self._x[-1]
+        top = self.table_top
+        header_bottom = top - self.header_height
+        bottom = header_bottom - len(rows) * self.row_height
+
+        ops = ["0.851 g %.2f %.2f %.2f %.2f re f 0 g" % (
+            left, header_bottom, right - left, self.header_height
+        )]
+        ops.append("BT")
+        if self.title:
+            title_size = size * 1.4
+            width = text_widths([self.title], bold=True)[0] * title_size / 1000
+            ops.append("/F2 %.2f Tf 1 0 0 1 %.2f %.2f Tm (%s) Tj" % (
+                title_size, (self.page_width - width) / 2, top + size,
+                escape_texts([self.title])[0],
+            ))
+        ops += self._cells(
+            [self.columns], header_bottom + (self.header_height - size * 0.7) / 2, 0, True
+        )
+        ops += self._cells(
+            rows,
+            header_bottom - self.row_height + (self.row_height - size * 0.7) / 2,
+            self.row_height,
+            False,
+        )
+
+        page_number = "Página %d" % (len(self._page_ids) + 1)
+        width = text_widths([page_number])[0] * (size * 0.8) / 1000
+        ops.append("/F1 %.2f Tf 1 0 0 1 %.2f %.2f Tm (%s) Tj" % (
+            size * 0.8, right - width, self.margin, page_number
+        ))
+        ops.append("ET")
+
+        # Grade: linhas horizontais de cada linha e verticais de cada coluna
+        ops.append("0.5 w")
+        for k in range(len(rows) + 2):
+            y = top if k == 0 else header_bottom - (k - 1) * self.row_height
+            ops.append("%.2f %.2f m %.2f %.2f l" % (left, y, right, y))
+        for x in self._x:
+            ops.append("%.2f %.2f m %.2f %.2f l" % (x, top, x, bottom))
+        ops.append("S")
+
+        content = zlib.compress(encode_text("\n".join(ops)))
+        content_id = self._new_id()
+        self._write_object(
+            content_id,
+            b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream"
+            % (len(content), content),
+        )
+        page_id = self._new_id()
+        self._write_object(page_id, (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f] "
+            b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>"
+        ) % (self.page_width, self.page_height, content_id))
+        self._page_ids.append(page_id)
+
+    def write_rows(self, rows):
+        """Acrescenta ``rows`` (sequências de str); páginas cheias vão para o disco."""
+        if self._x is None:
+            self._layout(rows)
+        for row in rows:
+            self._pending.append(row)
+            if len(self._pending) == self.rows_per_page:
+                self._flush_page()
+        self.rows_written += len(rows)
+
+    def close(self):
+        if self._x is None:
+            self._layout([])
+        if self._pending or not self._page_ids:
+            self._flush_page()
+
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self._page_ids)
+        self._write_object(2, b"<< /Type /Pages /Kids [%s] /Count %d >>"
+                           % (kids, len(self._page_ids)))
+        self._write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        info_id = self._new_id()
+        info = b"<< /Producer (QtExpoTool)"
+        if self.title:
+            info += b" /Title (%s)" % encode_text(escape_texts([self.title])[0])
+        self._write_object(info_id, info + b" >>")
+
+        xref = self._file.tell()
+        self._write(b"xref\n0 %d\n0000000000 65535 f \n" % self._next_id)
+        for object_id in range(1, self._next_id):
+            self._write(b"%010d 00000 n \n" % self._offsets[object_id])
+        self._write(b"trailer\n<< /Size %d /Root 1 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                    % (self._next_id, info_id, xref))
+        self._file.close()
+
+
+def write_pdf_stream(output_path, columns, chunks, progress=None, **options):
+    """Escreve o PDF a partir de ``chunks`` (lotes de linhas de str).
+
+    Mesmo contrato de :func:`qtexpotool.docx_stream.write_docx_stream`:
+    ``progress`` recebe o total de linhas escritas após cada lote e o total é
+    devolvido. ``options`` vão para :class:`PdfTableWriter`.
+    """
+    with PdfTableWriter(output_path, columns, **options) as writer:
+        for rows in chunks:
+            if not rows:
+                continue
+            with metrics.span("rows"):
+                writer.write_rows(rows)
+            if progress is not None:
+                progress(writer.rows_written)
+    metrics.count("rows", writer.rows_written)
+    metrics.count("bytes", os.path.getsize(output_path))
+    return writer.rows_written
+
+
+def export_pdf_stream(rendered, output_path, chunk_size=1000, progress=None, **options):
+    """Atalho de :func:`write_pdf_stream` para uma tabela já renderizada (ou DataFrame)."""
+    if not isinstance(rendered, RenderedTable):
+        rendered = render_frame(rendered)
+    return write_pdf_stream(
+        output_path, rendered.columns, rendered.iter_chunks(chunk_size), progress, **options
+    )
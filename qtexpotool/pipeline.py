@@ -0,0 +1,103 @@
+"""Fluxo completo de uma planilha: leitura tipada -> formatação -> DOCX.
+
+Usado pela exportação em lote e por quem precisar exportar sem a interface.
+"""
+
+import hashlib
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+
+from qtexpotool.docx_stream import export_docx_stream
+from qtexpotool.incremental import export_docx_incremental
+from qtexpotool.ingest import read_excel_typed
+from qtexpotool.fixedpoint import HALF_EVEN
+from qtexpotool.instrument import metrics
+from qtexpotool.render import report_formatters
+
+
+@dataclass
+class ExportResult:
+    source: str
+    output: str = ""
+    rows: int = 0
+    seconds: float = 0.0
+    error: str = ""
+
+    @property
+    def ok(self):
+        return not self.error
+
+
+def output_stems(workbooks) -> list:
+    """Nome de saída de cada planilha, sem repetição na mesma pasta de saída.
+
+    ``a/x.xlsx`` e ``b/x.xlsx`` viram ``a_x`` e ``b_x``; se ainda assim
+    repetir, entra um hash curto do caminho.
+    """
+    paths = [Path(path) for path in workbooks]
+    stems = [path.stem for path in paths]
+
+    def repeated(names):
+        counts = Counter(name.lower() for name in names)
+        return [counts[name.lower()] > 1 for name in names]
+
+    stems = [f"{path.parent.name}_{stem}" if dup and path.parent.name else stem
+             for path, stem, dup in zip(paths, stems, repeated(stems))]
+    return [
+        f"{stem}_{hashlib.blake2b(str(path.resolve()).encode(), digest_size=3).hexdigest()}"
+        if dup else stem
+        for path, stem, dup in zip(paths, stems, repeated(stems))
+    ]
+
+
+def docx_output_path(xlsx_path, output_dir, stem=None) -> Path:
+    return Path(output_dir) / f"DOCUMENTO_{stem or Path(xlsx_path).stem}.docx"
+
+
+def export_workbook(xlsx_path, template_path, output_dir, chunk_size=1000,
+                    on_total=None, progress=None, incremental=False,
+                    stem=None, decimals=2, rounding=HALF_EVEN,
+                    dms_decimals=None) -> ExportResult:
+    """Exporta ``xlsx_path`` para um DOCX em ``output_dir``.
+
+    ``stem`` troca o nome da planilha no nome do documento (ver
+    :func:`output_stems`). ``decimals`` e ``rounding`` são os da Distância e
+    ``dms_decimals`` o das coordenadas (ver
+    :func:`~qtexpotool.render.report_formatters`).
+
+    ``on_total`` recebe a quantidade de linhas logo após a leitura e
+    ``progress`` o total de linhas já escritas, lote a lote. Com
+    ``incremental``, só as linhas alteradas desde a última exportação para o
+    mesmo arquivo são refeitas (ver :mod:`qtexpotool.incremental`).
+    """
+    start = time.perf_counter()
+    with metrics.span("import"):
+        df = read_excel_typed(xlsx_path)
+    if on_total is not None:
+        on_total(len(df))
+
+    output = docx_output_path(xlsx_path, output_dir, stem)
+    if incremental:
+        result = export_docx_incremental(
+            df, template_path, output, chunk_size=chunk_size, progress=progress,
+            decimals=decimals, rounding=rounding, dms_decimals=dms_decimals,
+        )
+        return ExportResult(
+            source=str(xlsx_path),
+            output=str(output),
+            rows=result.rows,
+            seconds=time.perf_counter() - start,
+        )
+
+    rows = export_docx_stream(
+        df, template_path, output, chunk_size=chunk_size, progress=progress,
+        formatters=report_formatters(decimals, rounding, dms_decimals),
+    )
+    return ExportResult(
+        source=str(xlsx_path),
+        output=str(output),
+        rows=rows,
+        seconds=time.perf_counter() - start,
+    )
@@ -0,0 +1,88 @@
+"""Progresso com limite de frequência, compartilhado pelos workers.
+
+Os laços de leitura e escrita chamam :meth:`ProgressReporter.update` quantas
+vezes quiserem; o callback só é chamado quando o percentual avança pelo
+menos ``step`` pontos *e* já passou ``interval`` segundos desde o último
+aviso (o 100% sempre passa). Assim o número de sinais entre threads fica
+limitado pelo tempo e não pela quantidade de linhas.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class ProgressInfo:
+    done: int
+    total: int
+    percent: int
+    rate: float  # unidades por segundo desde o início
+    eta: Optional[float]  # segundos restantes (None enquanto não dá para estimar)
+
+
+def format_eta(seconds) -> str:
+    """``75`` -> ``"01:15"``; acima de uma hora, ``"1:02:03"``."""
+    if seconds is None:
+        return "--:--"
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes:02d}:{secs:02d}"
+
+
+def format_info(info: ProgressInfo, unit="linhas") -> str:
+    """Texto curto do progresso: taxa (se houver unidade) e tempo restante."""
+    parts = []
+    if unit and info.rate:
+        parts.append(f"{info.rate:,.0f} {unit}/s".replace(",", "."))
+    if info.done < info.total:
+        parts.append(f"faltam {format_eta(info.eta)}")
+    return " — ".join(parts)
+
+
+class ProgressReporter:
+    """Agrupa as atualizações de progresso por passo percentual e intervalo."""
+
+    def __init__(self, total, callback, step=1, interval=0.1, clock=time.monotonic):
+        self.total = total
+        self.callback = callback
+        self.step = step
+        self.interval = interval
+        self.clock = clock
+        self.done = 0
+        self.emitted = 0
+        self._start = clock()
+        self._last_time = None
+        self._last_percent = None
+
+    def set_total(self, total):
+        self.total = total
+
+    def advance(self, amount):
+        return self.update(self.done + amount)
+
+    def update(self, done, force=False):
+        """Registra ``done`` unidades prontas; devolve True se o callback foi chamado."""
+        self.done = done
+        total = self.total
+        percent = min(int(done * 100 / total), 100) if total else 0
+        now = self.clock()
+        finished = bool(total) and done >= total
+        if not (force or finished):
+            if self._last_percent is not None and (
+                percent - self._last_percent < self.step
+                or now - self._last_time < self.interval
+            ):
+                return False
+        elif finished and self._last_percent == 100:
+            return False
+
+        elapsed = now - self._start
+        rate = done / elapsed if elapsed > 0 else 0.0
+        eta = (total - done) / rate if rate and total else None
+        self._last_time = now
+        self._last_percent = percent
+        self.emitted += 1
+        self.callback(ProgressInfo(done, total, percent, rate, eta))
+        return True
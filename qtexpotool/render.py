@@ -0,0 +1,121 @@
+"""Conversão vetorizada do DataFrame nos textos finais exibidos/exportados.
+
+Cada coluna é formatada uma única vez, inteira, e o resultado é uma matriz
+2-D de ``str`` compartilhada pelo DOCX, pelo XLSX e pela pré-visualização.
+"""
+
+import numpy as np
+import pandas as pd
+
+from qtexpotool.coords import dms
+from qtexpotool.ingest import parse_number
+from qtexpotool.fixedpoint import HALF_EVEN, ROUNDING_MODES, format_units, to_units
+from qtexpotool.instrument import metrics
+
+# Casas decimais aceitas para a Distância no relatório
+DISTANCE_DECIMALS = (2, 3)
+# Casas decimais aceitas nos segundos das coordenadas em DMS
+DMS_DECIMALS = (2, 3, 4, 5, 6)
+
+
+def decimal_comma(decimals=2, suffix="", rounding=HALF_EVEN, thousands_sep=""):
+    """Formatador de números com vírgula decimal (e sufixo opcional).
+
+    Arredonda em ponto fixo (:mod:`qtexpotool.fixedpoint`), com o modo
+    ``rounding``, e formata direto dos inteiros.
+    """
+
+    def formatter(values: pd.Series) -> np.ndarray:
+        units, valid = to_units(parse_number(values), decimals, rounding)
+        return format_units(units, decimals, ",", suffix, thousands_sep, valid)
+
+    return formatter
+
+
+# "67,752 m" -> "67,75 m"
+format_distance = decimal_comma(2, " m")
+
+
+def format_text(values: pd.Series) -> np.ndarray:
+    """Formatação padrão: o mesmo texto de ``astype(str)``."""
+    return values.astype(str).to_numpy(dtype=object)
+
+
+# Latitude e Longitude saem como estão na planilha, a não ser que o
+# relatório peça o DMS normalizado (report_formatters)
+DEFAULT_FORMATTERS = {
+    "Distância": format_distance,
+}
+
+
+def report_formatters(decimals=2, rounding=HALF_EVEN, dms_decimals=None) -> dict:
+    """Formatadores do relatório com a Distância em ``decimals`` casas (2 ou 3).
+
+    Com ``dms_decimals`` (ver :data:`DMS_DECIMALS`), Latitude e Longitude
+    saem em DMS normalizado com essa quantidade de casas nos segundos, como
+    ``02°31'34,244785"S``; sem ele, o texto das coordenadas não muda.
+    """
+    if decimals not in DISTANCE_DECIMALS:
+        raise ValueError(f"Casas decimais da distância: {DISTANCE_DECIMALS}, não {decimals!r}")
+    if rounding not in ROUNDING_MODES:
+        raise ValueError(f"Modo de arredondamento desconhecido: {rounding!r}")
+    if dms_decimals is not None and dms_decimals not in DMS_DECIMALS:
+        raise ValueError(f"Casas decimais dos segundos: {DMS_DECIMALS}, não {dms_decimals!r}")
+    if decimals == 2 and rounding == HALF_EVEN and dms_decimals is None:
+        return DEFAULT_FORMATTERS
+    formatters = {**DEFAULT_FORMATTERS, "Distância": decimal_comma(decimals, " m", rounding)}
+    if dms_decimals is not None:
+        formatters["Latitude"] = dms(dms_decimals, "NS")
+        formatters["Longitude"] = dms(dms_decimals, "EW")
+    return formatters
+
+
+class RenderedTable:
+    """Matriz de textos finais (``values``) e os nomes das colunas."""
+
+    def __init__(self, columns, values):
+        self.columns = list(columns)
+        self.values = values
+
+    def __len__(self):
+        return self.values.shape[0]
+
+    @property
+    def empty(self):
+        return len(self) == 0
+
+    def iter_chunks(self, chunk_size=1000):
+        """Gera lotes de linhas como listas de ``str``."""
+        for start in range(0, len(self), chunk_size):
+            yield self.values[start : start + chunk_size].tolist()
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.values, columns=self.columns)
+
+
+def render_frame(df: pd.DataFrame, formatters=None) -> RenderedTable:
+    """Formata cada coluna de ``df`` uma única vez.
+
+    ``formatters`` mapeia nome da coluna -> função ``Series -> array de str``;
+    colunas sem formatador usam :func:`format_text`.
+    """
+    if formatters is None:
+        formatters = DEFAULT_FORMATTERS
+
+    values = np.empty(df.shape, dtype=object)
+    for j, column in enumerate(df.columns):
+        formatter = formatters.get(column, format_text)
+        values[:, j] = formatter(df.iloc[:, j])
+    return RenderedTable(df.columns, values)
+
+
+def render_chunks(df: pd.DataFrame, chunk_size=1000, formatters=None):
+    """Gera os lotes de ``df`` já formatados, como listas de linhas de ``str``.
+
+    Cada fatia de ``chunk_size`` linhas é formatada só quando pedida, então a
+    matriz de textos da tabela inteira nunca fica em memória.
+    """
+    for start in range(0, len(df), chunk_size):
+        with metrics.span("render"):
+            rows = render_frame(df.iloc[start : start + chunk_size], formatters).values.tolist()
+        yield rows
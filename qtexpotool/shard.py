@@ -0,0 +1,214 @@
+"""Relatório DOCX dividido em partes, por grupo ou por quantidade de linhas.
+
+Uma tabela com centenas de milhares de linhas num único documento pesa para
+o Word abrir. Aqui as linhas são divididas em partes — uma por valor de uma
+coluna (``MUNICIPIO``, ``SITUAÇÃO``...), a cada ``max_rows`` linhas, ou os
+dois — e cada parte é formatada e escrita num documento próprio, em paralelo
+(um processo por núcleo). Um documento de índice opcional lista as partes.
+"""
+
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from multiprocessing import get_context
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from qtexpotool.docx_stream import export_docx_stream
+from qtexpotool.fixedpoint import HALF_EVEN
+from qtexpotool.instrument import metrics
+from qtexpotool.pipeline import ExportResult
+from qtexpotool.render import report_formatters
+
+
+@dataclass
+class Shard:
+    name: str  # valor do grupo e/ou faixa de linhas
+    rows: np.ndarray  # posições das linhas no DataFrame
+    group: object = None  # valor de group_by (None: sem grupo ou vazio)
+
+
+def _split_rows(name, rows, max_rows, group=None):
+    if not max_rows or len(rows) <= max_rows:
+        return [Shard(name, rows, group)]
+    shards = []
+    for start in range(0, len(rows), max_rows):
+        stop = min(start + max_rows, len(rows))
+        row_range = f"linhas {start + 1}-{stop}"
+        shards.append(Shard(f"{name} ({row_range})" if name else row_range, rows[start:stop],
+                            group))
+    return shards
+
+
+def plan_shards(df: pd.DataFrame, group_by=None, max_rows=None):
+    """Divide as linhas de ``df`` em partes, na ordem dos grupos e das linhas."""
+    if group_by is None:
+        return _split_rows("", np.arange(len(df)), max_rows)
+
+    codes, labels = pd.factorize(df[group_by], sort=True, use_na_sentinel=False)
+    # Ordenação estável: dentro de cada grupo as linhas mantêm a ordem original
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(labels) + 1))
+    shards = []
+    for code, label in enumerate(labels):
+        empty = pd.isna(label)
+        shards.extend(_split_rows("(vazio)" if empty else str(label),
+                                  order[bounds[code] : bounds[code + 1]], max_rows,
+                                  None if empty else label))
+    return shards
+
+
+def shard_output_path(output_dir, stem, number, name) -> Path:
+    slug = re.sub(r"[^\w-]+", "_", name).strip("_")[:40]
+    return Path(output_dir) / (f"{stem}_{number:03d}_{slug}.docx" if slug
+                               else f"{stem}_{number:03d}.docx")
+
+
+def _export_shard(name, frame, template_path, output, chunk_size, decimals=2,
+                  rounding=HALF_EVEN, dms_decimals=None):
+    start = time.perf_counter()
+    try:
+        rows = export_docx_stream(frame, template_path, output, chunk_size=chunk_size,
+                                  formatters=report_formatters(decimals, rounding, dms_decimals))
+    except Exception as e:
+        return ExportResult(source=name, error=f"{type(e).__name__}: {e}")
+    return ExportResult(source=name, output=str(output), rows=rows,
+                        seconds=time.perf_counter() - start)
+
+
+def _export_shard_task(name, frame, template_path, output, chunk_size, decimals, rounding,
+                       dms_decimals):
+    # Nos processos do pool cada parte é uma execução própria no log de métricas
+    with metrics.run("export_shard", shard=name):
+        return _export_shard(name, frame, template_path, output, chunk_size, decimals,
+                             rounding, dms_decimals)
+
+
+def write_index(output_path, results, title="Índice"):
+    """Documento com uma linha por parte: nome, arquivo e quantidade de linhas."""
+    from docx import Document
+
+    doc = Document()
+    doc.add_heading(title, level=1)
+    table = doc.add_table(rows=1, cols=3)
+    table.style = "Table Grid"
+    for cell, text in zip(table.rows[0].cells, ("Parte", "Arquivo", "Linhas")):
+        cell.text = text
+        cell.paragraphs[0].runs[0].bold = True
+    for result in results:
+        cells = table.add_row().cells
+        cells[0].text = result.source
+        cells[1].text = Path(result.output).name if result.ok else f"ERRO: {result.error}"
+        cells[2].text = str(result.rows)
+    doc.save(output_path)
+
+
+def export_shards(df, template_path, output_dir, group_by=None, max_rows=None,
+                  stem="DOCUMENTO", index=True, max_workers=None, chunk_size=1000,
+                  progress=None, cancelled=None, keep_group=True, decimals=2,
+                  rounding=HALF_EVEN, columns=None, dms_decimals=None):
+    """Exporta ``df`` em vários documentos e devolve um ``ExportResult`` por parte.
+
+    ``progress`` recebe o total de linhas das partes já concluídas;
+    ``cancelled``, se informado, cancela as partes que ainda não começaram.
+    Com ``index``, grava também ``{stem}_INDICE.docx``. Sem ``keep_group``
+    a coluna ``group_by`` fica fora dos documentos. ``columns`` mapeia valor
+    do grupo -> colunas da parte: com a coluna da aba, cada documento leva só
+    as colunas da sua aba (:func:`qtexpotool.sheets.sheet_columns`), mesmo as
+    que estiverem vazias. ``decimals`` e ``rounding`` são os da Distância e
+    ``dms_decimals`` o das coordenadas.
+    """
+    output_dir = Path(output_dir)
+    with metrics.span("plan"):
+        shards = plan_shards(df, group_by, max_rows)
+
+    def part(shard):
+        frame = df.take(shard.rows)
+        if group_by is not None and not keep_group:
+            frame = frame.drop(columns=[group_by])
+        if columns is not None and shard.group in columns:
+            frame = frame[[column for column in columns[shard.group] if column in frame.columns]]
+        return frame
+
+    outputs = [
+        shard_output_path(output_dir, stem, number, shard.name)
+        for number, shard in enumerate(shards, start=1)
+    ]
+    max_workers = max_workers or min(len(shards), os.cpu_count() or 1)
+
+    results = [None] * len(shards)
+    rows_done = 0
+    if max_workers <= 1 or len(shards) == 1:
+        # Uma parte só: no próprio processo, sem copiar os dados para o pool
+        for i, shard in enumerate(shards):
+            if cancelled is not None and cancelled():
+                results[i] = ExportResult(source=shard.name, error="Cancelado")
+                continue
+            results[i] = _export_shard(
+                shard.name, part(shard), str(template_path), outputs[i], chunk_size,
+                decimals, rounding, dms_decimals,
+            )
+            rows_done += len(shard.rows)
+            if progress is not None:
+                progress(rows_done)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers,
+                                 mp_context=get_context("spawn")) as pool:
+            # No máximo max_workers partes em voo: cada parte é montada (take)
+            # só quando é enviada, então a memória não cresce com o número de
+            # partes
+            queued = iter(enumerate(shards))
+            futures = {}
+
+            def submit_next():
+                for i, shard in queued:
+                    if cancelled is not None and cancelled():
+                        results[i] = ExportResult(source=shard.name, error="Cancelado")
+                        continue
+                    try:
+                        future = pool.submit(
+                            _export_shard_task, shard.name, part(shard), str(template_path),
+                            outputs[i], chunk_size, decimals, rounding, dms_decimals,
+                        )
+                    except Exception as e:
+                        # Pool quebrado por um processo morto: as demais partes falham
+                        results[i] = ExportResult(source=shard.name,
+                                                  error=f"{type(e).__name__}: {e}")
+                        continue
+                    futures[future] = i
+                    return
+
+            for _ in range(max_workers):
+                submit_next()
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = futures.pop(future)
+                    if future.cancelled():
+                        results[i] = ExportResult(source=shards[i].name, error="Cancelado")
+                    else:
+                        try:
+                            results[i] = future.result()
+                        except Exception as e:
+                            # Processo morto (BrokenProcessPool) ou resultado perdido
+                            results[i] = ExportResult(source=shards[i].name,
+                                                      error=f"{type(e).__name__}: {e}")
+                    rows_done += len(shards[i].rows)
+                    submit_next()
+                pending = set(futures)
+                if done and progress is not None:
+                    progress(rows_done)
+                if cancelled is not None and cancelled():
+                    for future in pending:
+                        future.cancel()
+
+    metrics.count("rows", sum(result.rows for result in results))
+    if index:
+        with metrics.span("index"):
+            write_index(output_dir / f"{stem}_INDICE.docx", results)
+    return results
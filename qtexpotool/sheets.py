@@ -0,0 +1,198 @@
+"""Importação de todas as abas de uma planilha, em paralelo.
+
+As pastas de trabalho reais trazem uma aba por parcela ou município. Cada aba
+é lida num processo próprio (a leitura do XML é Python puro e não escala com
+threads) e recebe o seu esquema de colunas. O resultado pode ser juntado num
+único DataFrame com a coluna :data:`SHEET_COLUMN` (categoria, na ordem das
+abas) ou mantido como um DataFrame por aba, para exportar cada uma no seu
+documento.
+
+Esquemas por aba (``--sheet-schema`` ou ``<planilha>.esquema.json``)::
+
+    {
+        "Parcela*": {"Distância": "distance", "Latitude": "coordinate"},
+        "Resumo": {"MUNICIPIO": "category"},
+        "*": {}
+    }
+
+A chave é o nome da aba ou um padrão (``fnmatch``); abas sem esquema usam o
+do roteiro (:data:`qtexpotool.ingest.DEFAULT_SCHEMA`).
+"""
+
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from fnmatch import fnmatchcase
+from multiprocessing import get_context
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from qtexpotool.ingest import SCHEMA_KINDS, default_engine, read_excel_typed
+from qtexpotool.instrument import metrics
+
+SHEET_COLUMN = "Aba"
+# Chave de ``DataFrame.attrs`` com as colunas de cada aba (ver merge_sheets)
+SHEET_COLUMNS_ATTR = "colunas_por_aba"
+SCHEMA_SUFFIX = ".esquema.json"
+
+
+def sheet_names(file_path, engine=None) -> list:
+    """Nomes das abas, na ordem da pasta de trabalho."""
+    if engine is None:
+        engine = default_engine()
+    if engine == "calamine":
+        from python_calamine import CalamineWorkbook
+
+        return list(CalamineWorkbook.from_path(str(file_path)).sheet_names)
+    with pd.ExcelFile(file_path) as workbook:
+        return list(workbook.sheet_names)
+
+
+def load_schemas(path) -> dict:
+    """Lê o JSON de esquemas por aba e confere os tipos das colunas."""
+    with open(path, encoding="utf-8") as f:
+        schemas = json.load(f)
+    if not isinstance(schemas, dict):
+        raise ValueError("O arquivo de esquemas deve ser um objeto JSON")
+    for pattern, schema in schemas.items():
+        if not isinstance(schema, dict):
+            raise ValueError(f'Esquema da aba "{pattern}" deve ser um objeto')
+        unknown = set(schema.values()) - set(SCHEMA_KINDS)
+        if unknown:
+            raise ValueError(
+                f'Aba "{pattern}": tipos desconhecidos {sorted(unknown)} '
+                f"(válidos: {', '.join(SCHEMA_KINDS)})"
+            )
+    return schemas
+
+
+def workbook_schemas(file_path):
+    """Esquemas de ``<planilha>.esquema.json``, se existir ao lado da planilha."""
+    path = Path(file_path)
+    path = path.with_name(path.stem + SCHEMA_SUFFIX)
+    return load_schemas(path) if path.is_file() else None
+
+
+def schema_for(sheet, schemas=None):
+    """Esquema da aba: nome exato, depois o primeiro padrão que casar."""
+    if not schemas:
+        return None
+    if sheet in schemas:
+        return schemas[sheet]
+    for pattern, schema in schemas.items():
+        if fnmatchcase(sheet, pattern):
+            return schema
+    return None
+
+
+def _read_sheet(file_path, sheet, schema, engine):
+    with metrics.run("read_sheet", sheet=sheet):
+        return read_excel_typed(file_path, engine=engine, schema=schema, sheet_name=sheet)
+
+
+def _sheet_error(errors) -> RuntimeError:
+    return RuntimeError("; ".join(f"aba {sheet!r}: {error}" for sheet, error in errors.items()))
+
+
+def read_sheets(file_path, sheets=None, schemas=None, max_workers=None, engine=None,
+                progress=None, cancelled=None) -> dict:
+    """Lê as abas de ``file_path`` (todas, ou só ``sheets``) em paralelo.
+
+    Devolve ``{aba: DataFrame}`` na ordem da pasta de trabalho. ``progress``
+    recebe a quantidade de abas já lidas; ``cancelled``, se informado,
+    cancela as abas que ainda não começaram (e elas ficam de fora). Se alguma
+    aba falhar (inclusive com o processo morto), as outras ainda são lidas e
+    depois sai um ``RuntimeError`` com o nome e o erro de cada aba.
+    """
+    if engine is None:
+        engine = default_engine()
+    if sheets is None:
+        sheets = sheet_names(file_path, engine)
+    file_path = str(file_path)
+    max_workers = max_workers or min(len(sheets), os.cpu_count() or 1)
+
+    frames = {}
+    errors = {}
+    if max_workers <= 1 or len(sheets) <= 1:
+        for sheet in sheets:
+            if cancelled is not None and cancelled():
+                break
+            try:
+                frames[sheet] = read_excel_typed(
+                    file_path, engine=engine, schema=schema_for(sheet, schemas), sheet_name=sheet
+                )
+            except Exception as e:
+                errors[sheet] = f"{type(e).__name__}: {e}"
+            if progress is not None:
+                progress(len(frames) + len(errors))
+        if errors:
+            raise _sheet_error(errors)
+        return frames
+
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=get_context("spawn")) as pool:
+        futures = {
+            pool.submit(_read_sheet, file_path, sheet, schema_for(sheet, schemas), engine): sheet
+            for sheet in sheets
+        }
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.cancelled():
+                    continue
+                try:
+                    frames[futures[future]] = future.result()
+                except Exception as e:
+                    # Erro da leitura ou processo morto (BrokenProcessPool)
+                    errors[futures[future]] = f"{type(e).__name__}: {e}"
+            if done and progress is not None:
+                progress(len(frames) + len(errors))
+            if cancelled is not None and cancelled():
+                for future in pending:
+                    future.cancel()
+    if errors:
+        raise _sheet_error({sheet: errors[sheet] for sheet in sheets if sheet in errors})
+    return {sheet: frames[sheet] for sheet in sheets if sheet in frames}
+
+
+def merge_sheets(frames: dict, key=SHEET_COLUMN) -> pd.DataFrame:
+    """Junta as abas num DataFrame só, com a coluna ``key`` no fim.
+
+    As colunas que faltam numa aba ficam vazias. ``key`` é categoria, com
+    as abas na ordem original (ordenar e dividir por ela segue essa ordem).
+    As colunas de cada aba ficam em ``attrs`` (ver :func:`sheet_columns`).
+    """
+    frames = {sheet: df for sheet, df in frames.items() if not df.empty}
+    if not frames:
+        return pd.DataFrame()
+    sheets = list(frames)
+    # Inteiros de uma coluna que falta em outra aba viram Int64 (com <NA>),
+    # e não float: cada aba, separada de novo, mostra "1" e não "1.0"
+    everywhere = set.intersection(*(set(df.columns) for df in frames.values()))
+    for sheet, df in frames.items():
+        partial = [column for column in df.columns
+                   if column not in everywhere and df[column].dtype.kind in "iu"]
+        if partial:
+            frames[sheet] = df.astype({column: "Int64" for column in partial})
+    merged = pd.concat(frames.values(), ignore_index=True)
+    codes = np.repeat(np.arange(len(sheets)), [len(df) for df in frames.values()])
+    merged[key] = pd.Categorical.from_codes(codes, categories=sheets)
+    merged.attrs[SHEET_COLUMNS_ATTR] = {sheet: list(df.columns) for sheet, df in frames.items()}
+    return merged
+
+
+def sheet_columns(df: pd.DataFrame):
+    """``{aba: colunas}`` guardado por :func:`merge_sheets`, ou ``None``."""
+    return df.attrs.get(SHEET_COLUMNS_ATTR)
+
+
+def split_sheets(df: pd.DataFrame, key=SHEET_COLUMN) -> dict:
+    """Inverso de :func:`merge_sheets`: ``{aba: DataFrame}``, sem a coluna ``key``.
+
+    Colunas que só existiam em outras abas voltam vazias.
+    """
+    groups = df.groupby(key, observed=True, sort=True)
+    return {str(sheet): group.drop(columns=[key]).reset_index(drop=True)
+            for sheet, group in groups}
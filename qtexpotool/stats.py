@@ -0,0 +1,69 @@
+"""Estatísticas das colunas numéricas (perímetro, coordenadas...).
+
+Cada coluna é convertida em float64 uma única vez e todas as medidas saem do
+mesmo array, com operações vetorizadas do NumPy. As somas são feitas em
+ponto fixo (:mod:`qtexpotool.fixedpoint`), então são exatas e não dependem
+da ordem das linhas.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from qtexpotool.fixedpoint import EXACT_DECIMALS, HALF_EVEN, exact_units, rescale, units_sum
+from qtexpotool.ingest import parse_number
+
+
+@dataclass
+class ColumnStats:
+    count: int
+    raw_sum: float
+    rounded_sum: float  # soma dos valores como aparecem no relatório
+    drift: float  # rounded_sum - raw_sum
+    min: float
+    max: float
+    decimals: int = 2
+
+
+def column_stats(values, decimals=2, rounding=HALF_EVEN) -> ColumnStats:
+    """Medidas de um array numérico; valores NaN são ignorados."""
+    values = np.asarray(values, dtype=np.float64)
+    units, valid = exact_units(values)
+    if not valid.any():
+        return ColumnStats(0, 0.0, 0.0, 0.0, np.nan, np.nan, decimals)
+
+    raw = units_sum(units, valid)
+    rounded = units_sum(rescale(units, EXACT_DECIMALS, decimals, rounding), valid)
+    # Diferença em milionésimos, sem passar por float
+    drift = rounded * 10 ** (EXACT_DECIMALS - decimals) - raw
+    scale = 10**EXACT_DECIMALS
+    return ColumnStats(
+        count=int(valid.sum()),
+        raw_sum=raw / scale,
+        rounded_sum=rounded / 10**decimals,
+        drift=drift / scale,
+        min=float(values[valid].min()),
+        max=float(values[valid].max()),
+        decimals=decimals,
+    )
+
+
+def frame_stats(df: pd.DataFrame, columns=("Distância",), decimals=2,
+                rounding=HALF_EVEN) -> dict:
+    """Estatísticas das ``columns`` de ``df`` que existirem, por nome."""
+    return {
+        column: column_stats(parse_number(df[column]), decimals, rounding)
+        for column in columns
+        if column in df.columns
+    }
+
+
+def format_number(value, decimals=2) -> str:
+    """``1234.5`` -> ``"1234,50"``."""
+    return f"{value:.{decimals}f}".replace(".", ",")
+
+
+def numeric_columns(df: pd.DataFrame) -> list:
+    """Colunas de ``df`` que já são numéricas e podem ser marcadas."""
+    return [column for column in df.columns if df[column].dtype.kind in "fiu"]
@@ -0,0 +1,116 @@
+"""Modelos Word pré-compilados, guardados em memória.
+
+Abrir o ``.docx`` com o python-docx, achar a tabela de destino, aplicar o
+estilo e o cabeçalho cinza e montar os protótipos das células custa o mesmo
+a cada exportação. :func:`get_template` faz esse trabalho uma vez e devolve o
+mesmo :class:`CompiledTemplate` enquanto o arquivo não mudar; a chave é o
+caminho, a data de modificação e o tamanho do modelo, mais as colunas do
+cabeçalho.
+"""
+
+import io
+import threading
+import zipfile
+from collections import OrderedDict
+from pathlib import Path
+
+from docx import Document
+from docx.opc.oxml import serialize_part_xml
+from lxml import etree
+
+from qtexpotool.docx_writer import cell_prototypes, style_header_row
+from qtexpotool.instrument import metrics
+
+DOCUMENT_PART = "word/document.xml"
+MAX_TEMPLATES = 8
+
+_ROWS_MARKER = "QTEXPOTOOL-LINHAS"
+_TAIL_MARKER = "QTEXPOTOOL-FIM"
+
+
+class CompiledTemplate:
+    """Modelo pronto para exportar: cabeçalho aplicado e ``document.xml`` dividido."""
+
+    def __init__(self, path, columns, table_index, package, parts, head, middle, tail,
+                 prototypes):
+        self.path = path
+        self.columns = columns
+        self.table_index = table_index
+        self.package = package  # .docx inteiro já com o cabeçalho (caminho em memória)
+        self.parts = parts  # [(ZipInfo, bytes)] do pacote; None no lugar do document.xml
+        self.head = head  # até o fim das linhas existentes da tabela
+        self.middle = middle  # do </w:tbl> até onde entram os parágrafos dos lotes
+        self.tail = tail  # sectPr e fechamento do documento
+        self.prototypes = prototypes
+
+    def new_document(self):
+        """``Document`` novo do python-docx, já com o cabeçalho da tabela."""
+        return Document(io.BytesIO(self.package))
+
+    def table(self, doc):
+        return doc.tables[self.table_index]
+
+
+def compile_template(template_path, columns, table_index=1) -> CompiledTemplate:
+    """Prepara o cabeçalho da tabela ``table_index`` e divide o ``document.xml``."""
+    columns = tuple(columns)
+    doc = Document(template_path)
+    table = doc.tables[table_index]
+    style_header_row(table, columns)
+    prototypes = cell_prototypes(table)
+
+    package = io.BytesIO()
+    doc.save(package)
+
+    table._tbl.append(etree.Comment(_ROWS_MARKER))
+    body = doc.element.body
+    tail_marker = etree.Comment(_TAIL_MARKER)
+    if body.sectPr is not None:
+        body.sectPr.addprevious(tail_marker)
+    else:
+        body.append(tail_marker)
+
+    xml = serialize_part_xml(doc.element)
+    head, rest = xml.split(f"<!--{_ROWS_MARKER}-->".encode(), 1)
+    middle, tail = rest.split(f"<!--{_TAIL_MARKER}-->".encode(), 1)
+
+    with zipfile.ZipFile(template_path) as zin:
+        parts = [
+            (info, zin.read(info)) if info.filename != DOCUMENT_PART else (info, None)
+            for info in zin.infolist()
+        ]
+    return CompiledTemplate(
+        str(template_path), columns, table_index, package.getvalue(), parts,
+        head, middle, tail, prototypes,
+    )
+
+
+_templates = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_template(template_path, columns, table_index=1) -> CompiledTemplate:
+    """:func:`compile_template` com cache LRU (até ``MAX_TEMPLATES`` modelos)."""
+    path = Path(template_path).resolve()
+    stat = path.stat()
+    key = (str(path), stat.st_mtime_ns, stat.st_size, tuple(columns), table_index)
+    with _lock:
+        compiled = _templates.get(key)
+        if compiled is not None:
+            _templates.move_to_end(key)
+            metrics.count("template_hits")
+            return compiled
+
+        compiled = compile_template(path, columns, table_index)
+        # Versões antigas do mesmo arquivo não voltam mais
+        for old in [k for k in _templates if k[0] == key[0] and k[1:3] != key[1:3]]:
+            del _templates[old]
+        _templates[key] = compiled
+        while len(_templates) > MAX_TEMPLATES:
+            _templates.popitem(last=False)
+        return compiled
+
+
+def clear_templates():
+    with _lock:
+        _templates.clear()
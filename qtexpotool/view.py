@@ -0,0 +1,170 @@
+"""Ordenação e filtros da pré-visualização calculados com NumPy.
+
+Em vez do ``QSortFilterProxyModel``, que chama Python para cada comparação,
+a ordenação é um ``argsort`` por coluna e cada filtro é uma máscara booleana.
+O resultado é um array com as posições das linhas, na ordem de exibição.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from qtexpotool.render import DEFAULT_FORMATTERS, format_text
+
+_RANGE = re.compile(r"^\s*(-?[\d.,]*)\s*\.\.\s*(-?[\d.,]*)\s*$")
+
+
+def _factorize(values: pd.Series):
+    """Códigos inteiros na ordem dos valores (``-1`` para vazio) e os únicos."""
+    try:
+        return pd.factorize(values, sort=True)
+    except TypeError:
+        # Colunas com tipos misturados (texto e número) são comparadas como texto
+        return pd.factorize(values.astype(str), sort=True)
+
+
+def sort_positions(values: pd.Series, ascending=True) -> np.ndarray:
+    """Posições que ordenam ``values``; ordenação estável, vazios por último."""
+    if values.dtype.kind in "fiub":
+        keys = values.to_numpy(dtype=np.float64)
+        # O argsort deixa NaN no fim, inclusive com a chave negada
+        return np.argsort(keys if ascending else -keys, kind="stable")
+
+    codes, _ = _factorize(values)
+    codes = codes.astype(np.int64)
+    if not ascending:
+        codes = codes.max(initial=0) - codes
+    codes[values.isna().to_numpy()] = np.iinfo(np.int64).max
+    return np.argsort(codes, kind="stable")
+
+
+def text_mask(values: pd.Series, text: str, factors=None, formatter=None) -> np.ndarray:
+    """Linhas cujo texto exibido contém ``text`` (sem diferenciar maiúsculas).
+
+    A busca é feita só nos valores distintos da coluna, formatados com
+    ``formatter`` (o mesmo da tabela; padrão :func:`format_text`), e
+    espalhada pelos códigos, o que é bem mais rápido em colunas com
+    repetição. ``factors`` reaproveita um ``_factorize`` já feito.
+    """
+    codes, uniques = factors if factors is not None else _factorize(values)
+    shown = (formatter or format_text)(pd.Series(uniques, dtype=values.dtype))
+    hits = pd.Series(shown, dtype=object).str.contains(text, case=False, regex=False)
+    hits = np.append(hits.to_numpy(dtype=bool), False)  # código -1 (vazio) -> False
+    return hits[codes]
+
+
+def range_mask(values: pd.Series, low=None, high=None) -> np.ndarray:
+    """Linhas com ``low <= valor <= high`` (limites ``None`` ficam abertos)."""
+    numbers = pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64)
+    mask = ~np.isnan(numbers)
+    if low is not None:
+        mask &= numbers >= low
+    if high is not None:
+        mask &= numbers <= high
+    return mask
+
+
+def parse_range(text: str):
+    """``"10..20"``, ``"..5,5"`` ou ``"100.."`` -> ``(low, high)``; ``None`` se não for intervalo."""
+    match = _RANGE.match(text)
+    if match is None:
+        return None
+
+    def number(part):
+        if not part:
+            return None
+        return float(part.replace(".", "").replace(",", ".") if "," in part else part)
+
+    try:
+        low, high = number(match.group(1)), number(match.group(2))
+    except ValueError:
+        return None
+    if low is None and high is None:
+        return None
+    return low, high
+
+
+class RowView:
+    """Estado de ordenação/filtro de um DataFrame.
+
+    ``formatters`` são os da tabela exibida (``render_frame``): o filtro de
+    texto procura no texto formatado, como o usuário o vê.
+    """
+
+    def __init__(self, df: pd.DataFrame, formatters=None):
+        self.df = df
+        self.formatters = DEFAULT_FORMATTERS if formatters is None else formatters
+        self.sort_column = None
+        self.ascending = True
+        self.filters = {}  # nome -> máscara booleana
+        self._orders = {}  # (coluna, ascending) -> argsort já calculado
+        self._factors = {}  # coluna -> (códigos, únicos), para os filtros de texto
+
+    @property
+    def active(self):
+        return self.sort_column is not None or bool(self.filters)
+
+    def set_sort(self, column, ascending=True):
+        self.sort_column = column
+        self.ascending = ascending
+
+    def set_filter(self, name, mask):
+        if mask is None:
+            self.filters.pop(name, None)
+        else:
+            self.filters[name] = mask
+
+    def filter_text(self, text, column=None):
+        """Filtro de texto/intervalo numa coluna, ou em todas se ``column`` for ``None``."""
+        text = text.strip()
+        if not text:
+            self.set_filter("texto", None)
+            return
+
+        interval = parse_range(text)
+        if column is not None:
+            values = self.df[column]
+            if interval is not None and values.dtype.kind in "fiu":
+                mask = range_mask(values, *interval)
+            else:
+                mask = self._text_mask(column, text)
+        else:
+            mask = np.zeros(len(self.df), dtype=bool)
+            for name in self.df.columns:
+                values = self.df[name]
+                if interval is not None and values.dtype.kind in "fiu":
+                    mask |= range_mask(values, *interval)
+                mask |= self._text_mask(name, text)
+        self.set_filter("texto", mask)
+
+    def _text_mask(self, column, text):
+        factors = self._factors.get(column)
+        if factors is None:
+            factors = self._factors[column] = _factorize(self.df[column])
+        return text_mask(self.df[column], text, factors, self.formatters.get(column))
+
+    def clear(self):
+        self.sort_column = None
+        self.filters.clear()
+
+    def rows(self):
+        """Posições das linhas visíveis, em ordem; ``None`` se não houver ordenação/filtro."""
+        if not self.active:
+            return None
+
+        mask = None
+        for filter_mask in self.filters.values():
+            mask = filter_mask if mask is None else mask & filter_mask
+
+        if self.sort_column is None:
+            return np.flatnonzero(mask)
+
+        key = (self.sort_column, self.ascending)
+        order = self._orders.get(key)
+        if order is None:
+            order = sort_positions(self.df[self.sort_column], self.ascending)
+            self._orders[key] = order
+        if mask is not None:
+            order = order[mask[order]]
+        return order
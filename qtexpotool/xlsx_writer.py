@@ -0,0 +1,293 @@
+"""Exportação XLSX em fluxo, só de escrita.
+
+A planilha é gravada direto na entrada ``xl/worksheets/sheet1.xml`` do zip,
+lote a lote, com textos em ``inlineStr`` (sem tabela de strings compartilhadas
+em memória). Cada lote é convertido coluna a coluna: os números vão como
+números de verdade, com o formato nativo do Excel (``0.00 "m"`` para as
+distâncias), e não como texto já formatado. As distâncias são gravadas já
+arredondadas em ponto fixo, com as casas e o modo do relatório, para que a
+planilha tenha os mesmos valores do DOCX e do PDF.
+"""
+
+import os
+import re
+import zipfile
+from xml.sax.saxutils import escape, quoteattr
+
+import numpy as np
+import pandas as pd
+
+from qtexpotool.fixedpoint import HALF_EVEN, to_units
+from qtexpotool.ingest import parse_number
+from qtexpotool.instrument import metrics
+
+# Formatos numéricos nativos por coluna (código de formato do Excel)
+DEFAULT_NUMBER_FORMATS = {
+    "Distância": '0.00 "m"',
+}
+
+# Arredondamento por coluna: (casas, modo), como em report_formatters
+DEFAULT_ROUNDING = {
+    "Distância": (2, HALF_EVEN),
+}
+
+
+def report_number_formats(decimals=2) -> dict:
+    """Formatos nativos com a Distância em ``decimals`` casas, como no relatório."""
+    return {**DEFAULT_NUMBER_FORMATS, "Distância": f'0.{"0" * decimals} "m"'}
+
+
+def report_rounding(decimals=2, rounding=HALF_EVEN) -> dict:
+    """Arredondamento da Distância em ``decimals`` casas com o modo ``rounding``."""
+    return {**DEFAULT_ROUNDING, "Distância": (decimals, rounding)}
+
+
+# Caracteres de controle que o XML não aceita
+_INVALID_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_ESCAPES = (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"))
+_EMPTY_CELL = "<c/>"
+
+# Estilos fixos: 0 padrão, 1 cabeçalho em negrito; os formatos vêm depois
+_FIRST_NUMBER_STYLE = 2
+_FIRST_CUSTOM_FORMAT = 164
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    "</Types>"
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    "</Relationships>"
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name={name} sheetId="1" r:id="rId1"/></sheets>'
+    "</workbook>"
+)
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetViews><sheetView workbookViewId="0">'
+    '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+    "</sheetView></sheetViews>"
+    "{cols}<sheetData>"
+)
+_SHEET_TAIL = "</sheetData></worksheet>"
+
+
+def styles_xml(format_codes):
+    """``styles.xml`` com o cabeçalho em negrito e um estilo por formato numérico."""
+    num_fmts = "".join(
+        f'<numFmt numFmtId="{_FIRST_CUSTOM_FORMAT + i}" formatCode={quoteattr(code)}/>'
+        for i, code in enumerate(format_codes)
+    )
+    number_xfs = "".join(
+        f'<xf numFmtId="{_FIRST_CUSTOM_FORMAT + i}" fontId="0" fillId="0" borderId="0" '
+        f'xfId="0" applyNumberFormat="1"/>'
+        for i in range(len(format_codes))
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        + (f'<numFmts count="{len(format_codes)}">{num_fmts}</numFmts>' if format_codes else "")
+        + '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+        '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        f'<cellXfs count="{_FIRST_NUMBER_STYLE + len(format_codes)}">'
+        '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+        + number_xfs
+        + "</cellXfs>"
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        "</styleSheet>"
+    )
+
+
+def escape_texts(texts):
+    """Escapa um lote de textos de uma vez (``str.replace`` em C sobre o lote)."""
+    joined = "\0".join(texts)
+    for old, new in _ESCAPES:
+        if old in joined:
+            joined = joined.replace(old, new)
+    escaped = joined.split("\0")
+    if len(escaped) != len(texts):
+        # Algum texto tinha NUL, que o XML também não aceita
+        raise ValueError("Texto com caracteres de controle não suportados pelo XML")
+    return escaped
+
+
+def _text_cells(values, style=0):
+    style_attr = f' s="{style}"' if style else ""
+    missing = pd.isna(values)
+    texts = escape_texts([str(value) for value in values[~missing]])
+    cells = np.full(len(values), _EMPTY_CELL, dtype=object)
+    cells[~missing] = [
+        f'<c t="inlineStr"{style_attr}><is><t xml:space="preserve">{text}</t></is></c>'
+        for text in texts
+    ]
+    return cells
+
+
+def _number_cells(values, style=0):
+    style_attr = f' s="{style}"' if style else ""
+    if values.dtype.kind in "iu":
+        # Inteiros saem exatos; o repr de float perderia dígitos acima de 2**53
+        return np.array(
+            [f"<c{style_attr}><v>{value}</v></c>" for value in values.tolist()], dtype=object
+        )
+    values = values.astype(np.float64, copy=False)
+    finite = np.isfinite(values)
+    cells = np.full(len(values), _EMPTY_CELL, dtype=object)
+    cells[finite] = [
+        f"<c{style_attr}><v>{value!r}</v></c>" for value in values[finite].tolist()
+    ]
+    return cells
+
+
+def rounded_values(series: pd.Series, decimals, rounding) -> np.ndarray:
+    """Valores de ``series`` arredondados em ponto fixo, como float64.
+
+    O inteiro arredondado dividido por ``10**decimals`` é o float mais
+    próximo do decimal exibido no DOCX; valores inválidos viram NaN.
+    """
+    units, valid = to_units(parse_number(series, errors="coerce"), decimals, rounding)
+    values = units / 10**decimals
+    values[~valid] = np.nan
+    return values
+
+
+def column_cells(series: pd.Series, style=0) -> np.ndarray:
+    """Células ``<c>`` de uma coluna: números como números, o resto como texto."""
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return _number_cells(series.to_numpy(), style)
+    return _text_cells(series.to_numpy(dtype=object), style)
+
+
+def _column_widths(frame):
+    """Larguras aproximadas (em caracteres) a partir do cabeçalho e do primeiro lote."""
+    widths = []
+    for column in frame.columns:
+        sample = frame[column].dropna().astype(str)
+        longest = sample.str.len().max() if len(sample) else 0
+        widths.append(min(max(len(str(column)), longest) + 2, 60))
+    return "<cols>" + "".join(
+        f'<col min="{j}" max="{j}" width="{width}" customWidth="1"/>'
+        for j, width in enumerate(widths, start=1)
+    ) + "</cols>"
+
+
+def rows_xml(frame, styles, first_row, rounding=None) -> str:
+    """``<row>`` de cada linha de ``frame``, a partir da linha ``first_row`` da planilha.
+
+    As colunas de ``rounding`` (coluna -> ``(casas, modo)``) saem arredondadas.
+    """
+    rounding = rounding or {}
+    cells = []
+    for j, column in enumerate(frame.columns):
+        style = styles.get(column, 0)
+        if column in rounding:
+            cells.append(_number_cells(rounded_values(frame.iloc[:, j], *rounding[column]), style))
+        else:
+            cells.append(column_cells(frame.iloc[:, j], style))
+    xml = "".join(
+        f'<row r="{first_row + i}">{"".join(row)}</row>'
+        for i, row in enumerate(zip(*cells))
+    )
+    if _INVALID_XML_CHARS.search(xml):
+        raise ValueError("Texto com caracteres de controle não suportados pelo XML")
+    return xml
+
+
+def write_xlsx_stream(output_path, frames, number_formats=None, sheet_name="Planilha1",
+                      progress=None, rounding=None):
+    """Escreve ``frames`` (DataFrames com as mesmas colunas) numa planilha.
+
+    ``number_formats`` mapeia coluna -> código de formato do Excel e vale para
+    colunas numéricas. ``rounding`` mapeia coluna -> ``(casas, modo)`` (ver
+    :func:`report_rounding`). ``progress`` recebe o total de linhas escritas
+    após cada lote; o total é devolvido.
+    """
+    if number_formats is None:
+        number_formats = DEFAULT_NUMBER_FORMATS
+    if rounding is None:
+        rounding = DEFAULT_ROUNDING
+    format_codes = list(dict.fromkeys(number_formats.values()))
+    styles = {
+        column: _FIRST_NUMBER_STYLE + format_codes.index(code)
+        for column, code in number_formats.items()
+    }
+
+    rows_written = 0
+    with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as zout:
+        zout.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        zout.writestr("_rels/.rels", _ROOT_RELS)
+        zout.writestr("xl/workbook.xml", _WORKBOOK.format(name=quoteattr(sheet_name[:31])))
+        zout.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        zout.writestr("xl/styles.xml", styles_xml(format_codes))
+
+        with zout.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            columns = None
+            for frame in frames:
+                if columns is None:
+                    columns = list(frame.columns)
+                    header = "".join(
+                        f'<c t="inlineStr" s="1"><is><t>{escape(str(column))}</t></is></c>'
+                        for column in columns
+                    )
+                    sheet.write(_SHEET_HEAD.format(cols=_column_widths(frame)).encode("utf-8"))
+                    sheet.write(f'<row r="1">{header}</row>'.encode("utf-8"))
+                if frame.empty:
+                    continue
+
+                with metrics.span("rows"):
+                    sheet.write(rows_xml(frame, styles, rows_written + 2, rounding).encode("utf-8"))
+                rows_written += len(frame)
+                if progress is not None:
+                    progress(rows_written)
+
+            if columns is None:
+                sheet.write(_SHEET_HEAD.format(cols="").encode("utf-8"))
+            sheet.write(_SHEET_TAIL.encode("utf-8"))
+
+    metrics.count("rows", rows_written)
+    metrics.count("bytes", os.path.getsize(output_path))
+    return rows_written
+
+
+def export_xlsx_stream(df: pd.DataFrame, output_path, chunk_size=10000, number_formats=None,
+                       progress=None, rounding=None):
+    """Atalho de :func:`write_xlsx_stream` que fatia ``df`` em lotes, sem copiá-lo."""
+    frames = (df.iloc[start : start + chunk_size] for start in range(0, len(df), chunk_size))
+    if df.empty:
+        frames = iter([df])
+    return write_xlsx_stream(output_path, frames, number_formats, progress=progress,
+                             rounding=rounding)
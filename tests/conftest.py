@@ -0,0 +1,46 @@
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import codFkxlsx  # noqa: E402
+from qtexpotool.ingest import apply_schema  # noqa: E402
+
+DOCS = ROOT / "src" / "docs"
+TEMPLATE = DOCS / "modelo.docx"
+TABELA = DOCS / "tabela.xlsx"
+PLANILHA_3_DECIMAL = DOCS / "planilha_3_decimal.xlsx"
+
+
+@pytest.fixture
+def template():
+    return TEMPLATE
+
+
+@pytest.fixture
+def roteiro():
+    """Roteiro sintético de 250 linhas, já tipado como na importação."""
+    return apply_schema(codFkxlsx.generate_roteiro(250, seed=7))
+
+
+@pytest.fixture
+def roteiro_xlsx(tmp_path, roteiro):
+    path = tmp_path / "roteiro.xlsx"
+    codFkxlsx.write_workbook(codFkxlsx.generate_roteiro(250, seed=7), path)
+    return path
+
+
+def baseline_frame(path) -> pd.DataFrame:
+    """A tabela como o main.py original a montava: tudo texto, distância com 2 casas."""
+    df = pd.read_excel(path).astype(str)
+    df["Distância"] = (
+        df["Distância"].str.replace(",", ".").str.replace(" m", "")
+        .astype(float).round(2).apply(lambda x: f"{x:.2f} m".replace(".", ","))
+    )
+    return df
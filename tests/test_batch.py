@@ -0,0 +1,38 @@
+import os
+import shutil
+
+from qtexpotool import batch
+from qtexpotool.batch import run_batch
+from qtexpotool.pipeline import output_stems
+
+
+def _crash(*args):
+    # Processo que morre sem devolver nada: o pool fica quebrado
+    os._exit(1)
+
+
+def test_output_stems(tmp_path):
+    assert output_stems(["a/x.xlsx", "b/y.xlsx"]) == ["x", "y"]
+    assert output_stems(["a/x.xlsx", "b/X.xls"]) == ["a_x", "b_X"]
+    stems = output_stems(["1/a/x.xlsx", "2/a/x.xlsx", "c/y.xlsx"])
+    assert stems[0] != stems[1] and stems[0].startswith("a_x_") and stems[2] == "y"
+
+
+def test_same_name_in_different_folders(tmp_path, template, roteiro_xlsx):
+    workbooks = []
+    for folder in ("a", "b"):
+        (tmp_path / folder).mkdir()
+        workbooks.append(shutil.copy(roteiro_xlsx, tmp_path / folder / "x.xlsx"))
+    (tmp_path / "saida").mkdir()
+    results = run_batch(workbooks, template, tmp_path / "saida", max_workers=1)
+    assert all(result.ok for result in results), results
+    assert sorted(p.name for p in (tmp_path / "saida").iterdir()) == [
+        "DOCUMENTO_a_x.docx", "DOCUMENTO_b_x.docx",
+    ]
+
+
+def test_dead_process_fails_only_its_workbooks(tmp_path, template, roteiro_xlsx, monkeypatch):
+    monkeypatch.setattr(batch, "_export_task", _crash)
+    results = run_batch([roteiro_xlsx, roteiro_xlsx], template, tmp_path, max_workers=1)
+    assert len(results) == 2
+    assert all("BrokenProcessPool" in result.error for result in results)
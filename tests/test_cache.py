@@ -0,0 +1,91 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pandas.testing as tm
+
+from qtexpotool.cache import WorkbookCache
+
+
+def sample_frame():
+    return pd.DataFrame({
+        "De": ["M-001", "M-002", np.nan],
+        "Distância": [67.75, np.nan, 7.67],
+        "ANO": np.array([2018, 2019, 2020], dtype=np.int16),
+        "Fator K": np.array([1.0, 1.5, 2.0], dtype=np.float32),
+        "Aba": pd.Categorical.from_codes([1, 0, 1], categories=["P2", "P1"]),
+        "ID": pd.array([1, None, 3], dtype="Int64"),
+    })
+
+
+def test_round_trip(tmp_path):
+    source = tmp_path / "planilha.xlsx"
+    source.write_bytes(b"conteudo")
+    cache = WorkbookCache(tmp_path / "cache")
+    df = sample_frame()
+    assert cache.get(source) is None
+    cache.put(source, df)
+    cached = cache.get(source)
+    tm.assert_frame_equal(cached, df)
+    # A ordem das categorias (a das abas) não vira ordem alfabética
+    assert list(cached["Aba"].cat.categories) == ["P2", "P1"]
+
+
+def test_changed_file_and_variant_miss(tmp_path):
+    source = tmp_path / "planilha.xlsx"
+    source.write_bytes(b"conteudo")
+    cache = WorkbookCache(tmp_path / "cache")
+    cache.put(source, sample_frame())
+    assert cache.get(source, "abas") is None
+
+    source.write_bytes(b"outro conteudo")
+    assert cache.get(source) is None
+
+
+def test_load_and_evict(tmp_path):
+    cache = WorkbookCache(tmp_path / "cache")
+    calls = []
+
+    def loader(path):
+        calls.append(path)
+        return sample_frame()
+
+    first, second = tmp_path / "a.xlsx", tmp_path / "b.xlsx"
+    first.write_bytes(b"a")
+    second.write_bytes(b"b")
+    cache.load(first, loader)
+    cache.load(first, loader)
+    assert calls == [first]
+
+    # Cabe uma entrada só (com folga para o meta.json): a usada há mais tempo sai
+    cache.max_bytes = cache.size() * 3 // 2
+    os.utime(cache.directory / cache.key(first) / "meta.json", (0, 0))
+    cache.load(second, loader)
+    assert cache.get(first) is None
+    tm.assert_frame_equal(cache.get(second), sample_frame())
+
+
+def test_unreadable_entry_is_a_miss(tmp_path):
+    source = tmp_path / "planilha.xlsx"
+    source.write_bytes(b"conteudo")
+    cache = WorkbookCache(tmp_path / "cache")
+    cache.put(source, sample_frame())
+    entry = cache.directory / cache.key(source)
+    column = entry / "1.npy"
+    column.write_bytes(column.read_bytes()[:-8])
+    assert cache.get(source) is None
+
+    cache.put(source, sample_frame())
+    (entry / "0.npy").write_bytes(b"")
+    assert cache.get(source) is None
+
+
+def test_numeric_columns_do_not_use_pickle(tmp_path):
+    source = tmp_path / "planilha.xlsx"
+    source.write_bytes(b"conteudo")
+    cache = WorkbookCache(tmp_path / "cache")
+    cache.put(source, sample_frame())
+    entry = cache.directory / cache.key(source)
+    # Uma coluna numérica trocada por um array de objetos não é lida
+    np.save(entry / "1.npy", np.array([1.0, None, 2.0], dtype=object), allow_pickle=True)
+    assert cache.get(source) is None
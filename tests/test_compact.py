@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as tm
+
+from qtexpotool.compact import ChunkCompactor, compact_frame
+
+
+def chunks():
+    return [
+        pd.DataFrame({"MUNICIPIO": ["Belém", "Acará"] * 3, "ID": np.arange(6),
+                      "Texto": [f"t{i}" for i in range(6)]}),
+        pd.DataFrame({"MUNICIPIO": ["Breves", "Belém"] * 3, "ID": np.arange(6, 12) * 1000,
+                      "Texto": [f"t{i}" for i in range(6, 12)]}),
+    ]
+
+
+def test_chunk_compactor_matches_whole_frame():
+    compactor = ChunkCompactor()
+    for chunk in chunks():
+        compactor.add(chunk)
+    df, report = compactor.frame()
+
+    whole = pd.concat(chunks(), ignore_index=True)
+    expected, _ = compact_frame(whole)
+    # Categorias dos dois lotes unidas, e não texto solto
+    assert isinstance(df["MUNICIPIO"].dtype, pd.CategoricalDtype)
+    assert list(df["MUNICIPIO"].cat.categories) == ["Acará", "Belém", "Breves"]
+    tm.assert_frame_equal(df.astype(str), whole.astype(str))
+    assert df["ID"].dtype == expected["ID"].dtype
+    assert report.before > report.after and "MUNICIPIO" in report.columns
+
+
+def test_too_many_categories_overall_stay_text():
+    compactor = ChunkCompactor(category_ratio=0.5)
+    # Em cada lote há repetição, mas no total quase todos os valores são distintos
+    compactor.add(pd.DataFrame({"A": ["x", "x", "y"]}))
+    compactor.add(pd.DataFrame({"A": ["p", "q", "r", "s", "t"]}))
+    df, _ = compactor.frame()
+    assert df["A"].dtype == object
+    assert df["A"].tolist() == ["x", "x", "y", "p", "q", "r", "s", "t"]
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from qtexpotool.coords import dms, format_dms, parse_dms, parse_dms_pair
+
+PAIRS = {
+    "S 01° 55' 44\" W 048° 29' 55\"": (-1, -1),
+    "N 01° 55' 44\" E 048° 29' 55\"": (1, 1),
+    "S 01° 55' 44\" E 048° 29' 55\"": (-1, 1),
+    "N 01° 55' 44\" W 048° 29' 55\"": (1, -1),
+}
+
+
+@pytest.mark.parametrize("text, signs", PAIRS.items())
+def test_pair_hemispheres(text, signs):
+    # Muitas células iguais: gabarito em NumPy; a de desenho diferente vai
+    # pela expressão regular
+    other = text.replace("° ", "°", 1).replace("\" ", "\"  ", 1)
+    latitude, longitude = parse_dms_pair(pd.Series([text] * 40 + [other]))
+    expected_lat, expected_lon = signs[0] * (1 + 55 / 60 + 44 / 3600), signs[1] * (48 + 29 / 60 + 55 / 3600)
+    np.testing.assert_allclose(latitude, expected_lat)
+    np.testing.assert_allclose(longitude, expected_lon)
+
+
+def test_pair_with_hemisphere_after():
+    latitude, longitude = parse_dms_pair(pd.Series(["01°55'44\"S 048°29'55\"W",
+                                                    "01°55'44\"N, 048°29'55\"E"]))
+    assert latitude[0] < 0 and longitude[0] < 0
+    assert latitude[1] > 0 and longitude[1] > 0
+
+
+def test_format_round_trip():
+    values = pd.Series(["02°31'34,244785\"S", "S 02°31'34\"", "100°00'59,9999996\"W", "x", None])
+    degrees = parse_dms(values)
+    assert np.isnan(degrees[3:]).all()
+    text = format_dms(degrees[:3], 6, "EW")
+    assert text.tolist() == ["02°31'34,244785\"W", "02°31'34,000000\"W", "100°01'00,000000\"W"]
+    assert format_dms([np.nan, 1.5], 0, "", degree_digits=3).tolist() == ["", "001°30'00\""]
+
+
+def test_dms_formatter_normalizes_only_what_changes():
+    values = pd.Series(["02°31'34,244785\"S", "2°31'34,244785\"S", "02°31'34.244785\"S",
+                        "02°31'34,244785\"E", "02°61'34,244785\"S", "texto", None])
+    assert dms(6, "NS")(values).tolist() == [
+        "02°31'34,244785\"S", "02°31'34,244785\"S", "02°31'34,244785\"S",
+        "02°31'34,244785\"N", "02°61'34,244785\"S", "texto", "None",
+    ]
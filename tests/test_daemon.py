@@ -0,0 +1,121 @@
+import http.client
+import json
+import os
+import stat
+import time
+from pathlib import Path
+
+import pytest
+
+from qtexpotool import daemon as daemon_module
+from qtexpotool.daemon import TOKEN_HEADER, DaemonClient, DaemonError, ExportDaemon
+
+
+def _crash(*args):
+    os._exit(1)
+
+
+def _first_attempt_dies(job_id, spec, *args):
+    # Na primeira vez o "morto" derruba o pool com o "vivo" ainda rodando
+    markers = Path(spec["output_dir"])
+    marker = markers / f"{spec['stem']}.tentativa"
+    if not marker.exists():
+        marker.touch()
+        if spec["stem"] == "morto":
+            while not (markers / "vivo.tentativa").exists():
+                time.sleep(0.05)
+            os._exit(1)
+        time.sleep(30)
+    return daemon_module._run_job(job_id, spec, *args)
+
+
+@pytest.fixture(scope="module")
+def daemon(tmp_path_factory):
+    token_path = tmp_path_factory.mktemp("servico") / "servico.token"
+    with ExportDaemon(None, max_workers=1, port=0, token_path=token_path) as daemon:
+        yield daemon
+
+
+@pytest.fixture
+def client(daemon):
+    return DaemonClient(daemon.url, token_path=daemon.token_path)
+
+
+def job(output_dir, **options):
+    return {"columns": ["De", "Distância"], "rows": [["M-001", "1,5 m"], ["M-002", "2 m"]],
+            "output_dir": str(output_dir), "formats": ["xlsx"], **options}
+
+
+def raw_request(daemon, method, path, body=None, headers=None):
+    connection = http.client.HTTPConnection(daemon.host, daemon.port, timeout=5)
+    connection.request(method, path, body=body, headers=headers or {})
+    response = connection.getresponse()
+    return response.status, json.loads(response.read())
+
+
+def test_token_file_is_private(daemon):
+    assert stat.S_IMODE(daemon.token_path.stat().st_mode) == 0o600
+    assert daemon.token_path.read_text() == daemon.token
+
+
+def test_submit_and_status(client, tmp_path):
+    assert client.health()["workers"] == 1
+    job_id = client.submit(job(tmp_path, stem="roteiro"))
+    status = client.wait(job_id, timeout=60)
+    assert status["state"] == "done" and status["rows"] == 2
+    assert (tmp_path / "PLANILHA_roteiro.xlsx").is_file()
+
+
+def test_priority_and_cancel(daemon, client, tmp_path):
+    # Com a fila travada, os três entram antes de o primeiro começar
+    with daemon._cond:
+        low = daemon.submit(job(tmp_path, stem="baixa"))
+        dropped = daemon.submit(job(tmp_path, stem="cancelada", priority=1))
+        high = daemon.submit(job(tmp_path, stem="alta", priority=5))
+        assert daemon.cancel(dropped)
+    low, high = client.wait(low, timeout=60), client.wait(high, timeout=60)
+    assert low["state"] == high["state"] == "done"
+    assert high["finished"] <= low["started"]
+    assert client.status(dropped)["state"] == "cancelled"
+    assert not (tmp_path / "PLANILHA_cancelada.xlsx").exists()
+    assert not client.cancel(dropped)
+
+
+def test_rejects_requests(daemon, client, tmp_path):
+    token = {TOKEN_HEADER: daemon.token}
+    assert raw_request(daemon, "GET", "/status")[0] == 401
+    assert raw_request(daemon, "GET", "/status", headers={TOKEN_HEADER: "x"})[0] == 401
+    assert raw_request(daemon, "GET", "/status", headers={**token, "Host": "evil.example"})[0] == 403
+    body = json.dumps(job(tmp_path))
+    assert raw_request(daemon, "POST", "/jobs", body, {**token, "Content-Type": "text/plain"})[0] == 415
+    assert raw_request(daemon, "GET", "/status", headers=token)[0] == 200
+    with pytest.raises(DaemonError, match="stem"):
+        client.submit(job(tmp_path, stem="../fora"))
+    with pytest.raises(DaemonError, match="Token"):
+        DaemonClient(daemon.url, token_path=tmp_path / "outro.token").health()
+
+
+def test_refuses_other_hosts():
+    with pytest.raises(ValueError):
+        ExportDaemon(None, host="0.0.0.0")
+
+
+def test_pool_recovers_from_dead_process(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(daemon_module, "_run_job", _crash)
+    failed = client.wait(client.submit(job(tmp_path, stem="morto")), timeout=60)
+    assert failed["state"] == "failed" and "BrokenProcessPool" in failed["error"]
+    assert failed["attempts"] == daemon_module.MAX_ATTEMPTS
+    monkeypatch.undo()
+    done = client.wait(client.submit(job(tmp_path, stem="depois")), timeout=60)
+    assert done["state"] == "done"
+
+
+def test_jobs_of_a_broken_pool_are_requeued(tmp_path, monkeypatch):
+    monkeypatch.setattr(daemon_module, "_run_job", _first_attempt_dies)
+    with ExportDaemon(None, max_workers=2, port=0, token_path=tmp_path / "token") as daemon:
+        client = DaemonClient(daemon.url, token_path=daemon.token_path)
+        alive = client.submit(job(tmp_path, stem="vivo"))
+        dead = client.submit(job(tmp_path, stem="morto"))
+        alive, dead = client.wait(alive, timeout=60), client.wait(dead, timeout=60)
+    assert alive["state"] == dead["state"] == "done"
+    assert alive["attempts"] == dead["attempts"] == 2
@@ -0,0 +1,107 @@
+import zipfile
+
+import pytest
+from docx import Document
+from docx.shared import Pt
+from lxml import etree
+
+from qtexpotool.docx_stream import export_docx_stream
+from qtexpotool.docx_writer import BulkTableWriter, rows_xml, style_header_row
+from qtexpotool.render import DEFAULT_FORMATTERS, format_text, render_frame
+from qtexpotool.template import DOCUMENT_PART, get_template
+
+
+def python_docx_document(template, rendered, chunk_size):
+    """O caminho antigo do Worker: add_row + cell.text + Pt(8) célula a célula."""
+    doc = Document(template)
+    table = doc.tables[1]
+    style_header_row(table, rendered.columns)
+    for rows in rendered.iter_chunks(chunk_size):
+        for row in rows:
+            cells = table.add_row().cells
+            for cell, value in zip(cells, row):
+                cell.text = value
+                for paragraph in cell.paragraphs:
+                    for run in paragraph.runs:
+                        run.font.size = Pt(8)
+                    paragraph.alignment = 1
+        doc.add_paragraph("")
+    return doc
+
+
+def canonical(xml: bytes) -> bytes:
+    return etree.tostring(etree.fromstring(xml), method="c14n")
+
+
+def test_bulk_writer_matches_python_docx(template, roteiro):
+    rendered = render_frame(roteiro)
+    expected = python_docx_document(template, rendered, 100)
+
+    compiled = get_template(template, rendered.columns)
+    doc = compiled.new_document()
+    writer = BulkTableWriter(compiled.table(doc), compiled.prototypes)
+    for rows in rendered.iter_chunks(100):
+        assert writer.append_rows(rows) == len(rows)
+        doc.add_paragraph("")
+    assert doc.element.xml == expected.element.xml
+
+
+def test_stream_matches_python_docx(tmp_path, template, roteiro):
+    rendered = render_frame(roteiro)
+    expected = tmp_path / "esperado.docx"
+    python_docx_document(template, rendered, 100).save(expected)
+
+    output = tmp_path / "fluxo.docx"
+    done = []
+    assert export_docx_stream(rendered, template, output, chunk_size=100,
+                              progress=done.append) == len(roteiro)
+    assert done == [100, 200, 250]
+    with zipfile.ZipFile(expected) as a, zipfile.ZipFile(output) as b:
+        assert canonical(b.read(DOCUMENT_PART)) == canonical(a.read(DOCUMENT_PART))
+        assert sorted(b.namelist()) == sorted(a.namelist())
+    assert len(Document(output).tables[1].rows) == len(roteiro) + 1
+
+
+def test_stream_renders_frame_chunk_by_chunk(tmp_path, template, roteiro):
+    expected = tmp_path / "esperado.docx"
+    export_docx_stream(render_frame(roteiro), template, expected, chunk_size=100)
+
+    sizes = []
+
+    def text(values):
+        sizes.append(len(values))
+        return format_text(values)
+
+    formatters = {**DEFAULT_FORMATTERS, roteiro.columns[0]: text}
+    output = tmp_path / "lotes.docx"
+    assert export_docx_stream(roteiro, template, output, chunk_size=100,
+                              formatters=formatters) == len(roteiro)
+    assert sizes == [100, 100, 50]
+    with zipfile.ZipFile(expected) as a, zipfile.ZipFile(output) as b:
+        assert b.read(DOCUMENT_PART) == a.read(DOCUMENT_PART)
+
+
+def test_special_characters_match_python_docx(template):
+    rows = [["a & b", "<c>", " espaço ", "tab\taqui", "linha\nnova", "", "x", "y", "z"]]
+    compiled = get_template(template, [str(j) for j in range(9)])
+    doc = compiled.new_document()
+    BulkTableWriter(compiled.table(doc), compiled.prototypes).append_rows(rows)
+
+    expected = Document(template)
+    style_header_row(expected.tables[1], [str(j) for j in range(9)])
+    cells = expected.tables[1].add_row().cells
+    for cell, value in zip(cells, rows[0]):
+        cell.text = value
+        for paragraph in cell.paragraphs:
+            for run in paragraph.runs:
+                run.font.size = Pt(8)
+            paragraph.alignment = 1
+    assert doc.element.xml == expected.element.xml
+
+
+def test_rows_xml_rejects_control_characters(template):
+    compiled = get_template(template, [str(j) for j in range(9)])
+    with pytest.raises(ValueError):
+        rows_xml([["\x01"]], compiled.prototypes)
+    with pytest.raises(IndexError):
+        rows_xml([["x"] * 10], compiled.prototypes)
@@ -0,0 +1,30 @@
+import os
+
+from qtexpotool import fanout
+from qtexpotool.fanout import export_targets
+
+
+def _crash(*args):
+    os._exit(1)
+
+
+def test_export_targets(tmp_path, template, roteiro):
+    outputs = {"docx": tmp_path / "a.docx", "xlsx": tmp_path / "a.xlsx"}
+    results = export_targets(roteiro, outputs, template, max_workers=2, min_parallel_rows=0)
+    assert list(results) == ["docx", "xlsx"]
+    assert all(result.ok and result.rows == len(roteiro) for result in results.values())
+
+
+def test_dead_process_fails_only_its_formats(tmp_path, template, roteiro, monkeypatch):
+    monkeypatch.setattr(fanout, "_target_task", _crash)
+    outputs = {"docx": tmp_path / "a.docx", "pdf": tmp_path / "a.pdf"}
+    results = export_targets(roteiro, outputs, template, max_workers=2, min_parallel_rows=0)
+    assert list(results) == ["docx", "pdf"]
+    assert all("BrokenProcessPool" in result.error for result in results.values())
+
+
+def test_small_table_skips_the_pool(tmp_path, template, roteiro, monkeypatch):
+    monkeypatch.setattr(fanout, "ProcessPoolExecutor", None)
+    outputs = {"docx": tmp_path / "a.docx", "pdf": tmp_path / "a.pdf"}
+    results = export_targets(roteiro, outputs, template, max_workers=2)
+    assert all(result.ok and result.rows == len(roteiro) for result in results.values())
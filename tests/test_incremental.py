@@ -0,0 +1,84 @@
+import zipfile
+
+import pandas as pd
+
+from qtexpotool.docx_stream import export_docx_stream
+from qtexpotool.incremental import export_docx_incremental, sidecar_path
+from qtexpotool.render import report_formatters
+from qtexpotool.template import DOCUMENT_PART
+
+
+def document_xml(path):
+    with zipfile.ZipFile(path) as z:
+        return z.read(DOCUMENT_PART)
+
+
+def test_first_run_matches_stream(tmp_path, template, roteiro):
+    output = tmp_path / "DOCUMENTO.docx"
+    result = export_docx_incremental(roteiro, template, output, chunk_size=100)
+    assert (result.rows, result.reused, result.rendered, result.removed) == (250, 0, 250, 0)
+    assert sidecar_path(output).is_file()
+
+    expected = tmp_path / "fluxo.docx"
+    export_docx_stream(roteiro, template, expected, chunk_size=100)
+    assert document_xml(output) == document_xml(expected)
+
+
+def test_reuses_unchanged_rows(tmp_path, template, roteiro):
+    output = tmp_path / "DOCUMENTO.docx"
+    export_docx_incremental(roteiro, template, output, chunk_size=100)
+
+    edited = roteiro.drop(index=[3, 4]).reset_index(drop=True)
+    edited.loc[10, "De"] = "M-ALTERADO"
+    edited = pd.concat([edited, roteiro.head(1)], ignore_index=True)
+    done = []
+    result = export_docx_incremental(edited, template, output, chunk_size=100,
+                                     progress=done.append)
+    assert result.rows == 249
+    assert result.rendered == 1
+    assert result.reused == 248
+    assert result.removed == 3
+    assert done[-1] == 249
+
+    expected = tmp_path / "fluxo.docx"
+    export_docx_stream(edited, template, expected, chunk_size=100)
+    assert document_xml(output) == document_xml(expected)
+
+
+def test_other_columns_ignore_sidecar(tmp_path, template, roteiro):
+    output = tmp_path / "DOCUMENTO.docx"
+    export_docx_incremental(roteiro, template, output)
+    result = export_docx_incremental(roteiro.astype({"Fator K": str}), template, output)
+    assert result.full and result.rendered == 250
+
+
+def test_other_decimals_ignore_sidecar(tmp_path, template, roteiro):
+    output = tmp_path / "DOCUMENTO.docx"
+    export_docx_incremental(roteiro, template, output)
+    result = export_docx_incremental(roteiro, template, output, decimals=3)
+    assert result.full and result.rendered == 250
+    text = report_formatters(3)["Distância"](roteiro["Distância"].head(1))[0]
+    assert f">{text}<".encode() in document_xml(output)
+    assert export_docx_incremental(roteiro, template, output, decimals=3).rendered == 0
+
+
+def test_removed_counts_repeated_rows(tmp_path, template, roteiro):
+    output = tmp_path / "DOCUMENTO.docx"
+    repeated = pd.concat([roteiro, roteiro.head(2)], ignore_index=True)
+    export_docx_incremental(repeated, template, output, chunk_size=100)
+    # As duas cópias continuam: nada saiu
+    assert export_docx_incremental(repeated, template, output).removed == 0
+    result = export_docx_incremental(roteiro, template, output)
+    assert (result.rows, result.reused, result.removed) == (250, 250, 2)
+
+
+def test_first_run_renders_chunk_by_chunk(tmp_path, template, roteiro, monkeypatch):
+    from qtexpotool import incremental
+
+    sizes = []
+    render = incremental.render_frame
+    monkeypatch.setattr(incremental, "render_frame",
+                        lambda df, formatters: sizes.append(len(df)) or render(df, formatters))
+    output = tmp_path / "DOCUMENTO.docx"
+    export_docx_incremental(roteiro, template, output, chunk_size=100)
+    assert sizes == [100, 100, 50]
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from qtexpotool.ingest import apply_schema, iter_excel_chunks, parse_number
+
+
+def test_parse_number():
+    values = pd.Series(["123,45 m", "9720565,46", np.nan])
+    np.testing.assert_array_equal(parse_number(values), [123.45, 9720565.46, np.nan])
+    with pytest.raises(ValueError):
+        parse_number(pd.Series(["1,5", "x"]))
+    np.testing.assert_array_equal(parse_number(pd.Series(["1,5", "x"]), errors="coerce"),
+                                  [1.5, np.nan])
+
+
+def test_float_column_is_float_in_every_chunk(tmp_path):
+    # O texto inválido só aparece no segundo lote
+    df = pd.DataFrame({"Fator K": ["1,5", "2", "3", "abc", None, "4"]})
+    path = tmp_path / "planilha.xlsx"
+    df.to_excel(path, index=False)
+
+    invalid = {}
+    chunks = list(iter_excel_chunks(path, chunk_size=3, engine="openpyxl", invalid=invalid))
+    assert [chunk["Fator K"].dtype for chunk in chunks] == [np.float64, np.float64]
+    merged = pd.concat(chunks, ignore_index=True)["Fator K"]
+    np.testing.assert_array_equal(merged, [1.5, 2, 3, np.nan, np.nan, 4])
+    assert invalid == {"Fator K": 1}
+
+
+def test_invalid_distance_fails():
+    with pytest.raises(ValueError, match="Distância"):
+        apply_schema(pd.DataFrame({"Distância": ["1,5 m", "abc"]}))
+
+
+@pytest.mark.parametrize("engine", ["openpyxl", "calamine"])
+def test_chunks_match_read_excel(tmp_path, engine):
+    # Colunas mistas, floats inteiros, vazios e uma linha em branco no meio
+    df = pd.DataFrame({
+        "De": ["P1", 2.0, None, "P4", "P5", None],
+        "Fator K": [1.0, 2.0, None, 3.5, 4.0, None],
+        "Inteiro": [1.0, 2.0, None, 3.0, 4.0, None],
+        "Vazio": [None] * 6,
+        "Obs": ["a", None, None, 1.5, "b", "c"],
+    })
+    path = tmp_path / "planilha.xlsx"
+    df.to_excel(path, index=False)
+
+    chunks = list(iter_excel_chunks(path, chunk_size=2, schema={}, engine=engine))
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True),
+                                  pd.read_excel(path, engine=engine), check_dtype=False)
+    assert chunks[0]["De"].tolist() == ["P1", 2]
+    assert chunks[0]["Fator K"].dtype == np.int64
+    assert chunks[1]["Fator K"].dtype == np.float64
+    assert chunks[1]["Vazio"].dtype == np.float64
+    assert chunks[1]["Obs"].tolist()[1] == 1.5
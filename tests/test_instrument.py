@@ -0,0 +1,77 @@
+import threading
+import tracemalloc
+
+from qtexpotool.instrument import Metrics
+
+
+def test_overlapping_runs_keep_their_own_measures(tmp_path):
+    metrics = Metrics()
+    metrics.enable(log_path=tmp_path / "metrics.jsonl")
+    first = metrics.begin("import")
+    second = metrics.begin("export_docx")
+    ready = threading.Barrier(2)
+
+    def work(run, rows):
+        with metrics.profiled(run):
+            ready.wait()
+            with metrics.span("etapa"):
+                metrics.count("rows", rows)
+
+    threads = [threading.Thread(target=work, args=(run, rows))
+               for run, rows in ((first, 10), (second, 20))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    record = metrics.end(first)
+    assert record["run"] == "import" and record["counters"] == {"rows": 10}
+    assert record["spans"]["etapa"]["calls"] == 1
+    assert metrics.end(first) is None
+    assert metrics.end(second)["counters"] == {"rows": 20}
+    assert len((tmp_path / "metrics.jsonl").read_text().splitlines()) == 2
+
+
+def test_run_and_unbound_measures(tmp_path):
+    metrics = Metrics()
+    metrics.enable(log_path=tmp_path / "metrics.jsonl")
+    with metrics.run("cli") as run:
+        metrics.count("rows", 5)
+    assert metrics.last["counters"] == {"rows": 5} and run.name == "cli"
+    # Fora de uma execução as medidas não somem nem vão para a próxima
+    metrics.count("rows", 1)
+    run = metrics.begin("outra")
+    assert metrics.end(run)["counters"] == {}
+
+    metrics.disable()
+    assert metrics.begin("desligado") is None
+
+
+def test_unbound_thread_does_not_join_open_run(tmp_path):
+    metrics = Metrics()
+    metrics.enable(log_path=tmp_path / "metrics.jsonl")
+    run = metrics.begin("export_docx")
+    thread = threading.Thread(target=metrics.count, args=("rows", 7))
+    thread.start()
+    thread.join()
+    assert metrics.end(run)["counters"] == {}
+    assert metrics.snapshot()["counters"] == {"rows": 7}
+
+
+def test_tracemalloc_stops_with_the_last_run(tmp_path):
+    metrics = Metrics()
+    metrics.enable(log_path=tmp_path / "metrics.jsonl", profiler="tracemalloc")
+    first = metrics.begin("import")
+    second = metrics.begin("export_docx")
+    assert "memory" in metrics.end(first)
+    assert tracemalloc.is_tracing()
+    assert "memory" in metrics.end(second)
+    assert not tracemalloc.is_tracing()
+
+
+def test_unwritable_log_is_logged(tmp_path, caplog):
+    metrics = Metrics()
+    metrics.enable(log_path=tmp_path)  # uma pasta não abre como arquivo
+    with metrics.run("cli"):
+        pass
+    assert "Log de métricas indisponível" in caplog.text
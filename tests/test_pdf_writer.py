@@ -0,0 +1,66 @@
+import re
+import zlib
+
+from qtexpotool.pdf_writer import PdfTableWriter, encode_text, export_pdf_stream
+from qtexpotool.render import render_frame
+
+
+def read_pdf(path):
+    """Confere o xref e devolve ``(objetos, fluxos de conteúdo descomprimidos)``."""
+    data = path.read_bytes()
+    assert data.startswith(b"%PDF-1.4") and data.rstrip().endswith(b"%%EOF")
+    xref = int(re.search(rb"startxref\n(\d+)", data).group(1))
+    assert data[xref:].startswith(b"xref\n")
+    count = int(re.match(rb"xref\n0 (\d+)", data[xref:]).group(1))
+    entries = re.findall(rb"(\d{10}) 00000 n ", data[xref:])
+    assert len(entries) == count - 1
+    for object_id, offset in enumerate(entries, start=1):
+        assert data[int(offset):].startswith(b"%d 0 obj" % object_id)
+    streams = [zlib.decompress(body) for body in
+               re.findall(rb"stream\n(.*?)\nendstream", data, re.S)]
+    return data, streams
+
+
+def test_pdf_is_valid_and_paginated(tmp_path, roteiro):
+    rendered = render_frame(roteiro)
+    output = tmp_path / "saida.pdf"
+    done = []
+    assert export_pdf_stream(rendered, output, chunk_size=100, progress=done.append) == 250
+    assert done == [100, 200, 250]
+
+    data, streams = read_pdf(output)
+    pages = int(re.search(rb"/Type /Pages /Kids \[.*?\] /Count (\d+)", data).group(1))
+    assert pages == len(streams) > 1
+    text = b"".join(streams)
+    for value in (rendered.values[0, 0], rendered.values[-1, 5], "Distância"):
+        assert b"(" + encode_text(value) + b")" in text
+
+
+def test_pdf_escapes_text(tmp_path):
+    output = tmp_path / "saida.pdf"
+    with PdfTableWriter(output, ["A", "B"]) as writer:
+        writer.write_rows([["(x)", "a\\b"]])
+    _, streams = read_pdf(output)
+    assert b"(\\(x\\))" in streams[0] and b"(a\\\\b)" in streams[0]
+
+
+def test_pdf_header_fill(tmp_path):
+    output = tmp_path / "saida.pdf"
+    with PdfTableWriter(output, ["A"]) as writer:
+        writer.write_rows([["x"]])
+    _, streams = read_pdf(output)
+    # Mesmo cinza do cabeçalho do modelo.docx (D9D9D9)
+    assert streams[0].startswith(b"0.851 g ")
+
+
+def test_empty_and_blank_tables(tmp_path):
+    output = tmp_path / "vazio.pdf"
+    with PdfTableWriter(output, ["A", "B"]):
+        pass
+    read_pdf(output)
+
+    output = tmp_path / "sem_texto.pdf"
+    with PdfTableWriter(output, ["", ""], column_widths=[0, 0]) as writer:
+        writer.write_rows([["", ""]])
+    _, streams = read_pdf(output)
+    assert b"nan" not in streams[0] and b"inf" not in streams[0]
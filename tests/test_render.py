@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import TABELA, baseline_frame
+from qtexpotool.ingest import read_excel_typed
+from qtexpotool.fixedpoint import DOWN, HALF_UP
+from qtexpotool.render import format_distance, render_frame, report_formatters
+
+
+def test_render_matches_original_strings():
+    rendered = render_frame(read_excel_typed(TABELA))
+    expected = baseline_frame(TABELA)
+    assert rendered.columns == list(expected.columns)
+    assert rendered.values.tolist() == expected.to_numpy().tolist()
+
+
+def test_render_keeps_nan_and_text_columns():
+    df = pd.DataFrame({"De": ["M-001", np.nan], "Distância": [1.005, np.nan]})
+    assert render_frame(df).values.tolist() == [["M-001", "1,00 m"], ["nan", "nan m"]]
+
+
+def test_format_distance_rounds_ties_to_even():
+    values = pd.Series([67.755, 67.745, 0.125, -1.115, 1234.5])
+    assert format_distance(values).tolist() == [
+        "67,76 m", "67,74 m", "0,12 m", "-1,12 m", "1234,50 m"
+    ]
+
+
+def test_report_formatters_decimals_and_rounding():
+    df = pd.DataFrame({"Distância": [67.7555, 0.0125, 2.5]})
+    column = lambda formatters: render_frame(df, formatters).values[:, 0].tolist()
+    assert column(report_formatters(3)) == ["67,756 m", "0,012 m", "2,500 m"]
+    assert column(report_formatters(3, HALF_UP)) == ["67,756 m", "0,013 m", "2,500 m"]
+    assert column(report_formatters(2, DOWN)) == ["67,75 m", "0,01 m", "2,50 m"]
+    with pytest.raises(ValueError):
+        report_formatters(4)
+    with pytest.raises(ValueError):
+        report_formatters(2, "banker")
+
+
+def test_report_formatters_dms_is_opt_in():
+    df = pd.DataFrame({
+        "Latitude": ["2°31'34.2447851\"S", "texto"],
+        "Longitude": ["48°45'48,25\"W", ""],
+    })
+    assert render_frame(df, report_formatters()).values.tolist() == df.to_numpy().tolist()
+    assert render_frame(df, report_formatters(dms_decimals=3)).values.tolist() == [
+        ["02°31'34,245\"S", "48°45'48,250\"W"], ["texto", ""]
+    ]
+    with pytest.raises(ValueError):
+        report_formatters(dms_decimals=7)
+
+
+def test_iter_chunks(roteiro):
+    rendered = render_frame(roteiro)
+    chunks = list(rendered.iter_chunks(100))
+    assert [len(chunk) for chunk in chunks] == [100, 100, 50]
+    assert sum(chunks, []) == rendered.values.tolist()
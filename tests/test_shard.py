@@ -0,0 +1,72 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from docx import Document
+
+from qtexpotool import shard
+from qtexpotool.shard import export_shards, plan_shards, shard_output_path
+
+
+def _crash(*args):
+    os._exit(1)
+
+
+def test_plan_by_group_and_rows():
+    df = pd.DataFrame({"G": ["b", "a", "b", np.nan, "a", "b"]})
+    shards = plan_shards(df, "G", max_rows=2)
+    assert [(s.name, s.rows.tolist()) for s in shards] == [
+        ("a", [1, 4]),
+        ("b (linhas 1-2)", [0, 2]),
+        ("b (linhas 3-3)", [5]),
+        ("(vazio)", [3]),
+    ]
+    assert [s.rows.tolist() for s in plan_shards(df, max_rows=4)] == [[0, 1, 2, 3], [4, 5]]
+
+
+def test_output_names():
+    assert shard_output_path("out", "DOC", 3, "Belém / Centro").name == "DOC_003_Belém_Centro.docx"
+    assert shard_output_path("out", "DOC", 1, "").name == "DOC_001.docx"
+
+
+def test_export_shards(tmp_path, template, roteiro):
+    # O modelo tem 9 colunas: o grupo vai numa delas
+    df = roteiro.assign(**{"Fator K": np.where(np.arange(len(roteiro)) % 3 == 0, "A", "B")})
+    done = []
+    results = export_shards(df, template, tmp_path, group_by="Fator K", max_rows=100,
+                            stem="DOC", max_workers=1, progress=done.append)
+    assert [r.source for r in results] == ["A", "B (linhas 1-100)", "B (linhas 101-166)"]
+    assert all(r.ok for r in results)
+    assert sum(r.rows for r in results) == len(df) == done[-1]
+    for result in results:
+        assert len(Document(result.output).tables[1].rows) == result.rows + 1
+    index = Document(tmp_path / "DOC_INDICE.docx").tables[0]
+    assert [row.cells[2].text for row in index.rows[1:]] == ["84", "100", "66"]
+
+
+def test_pool_keeps_at_most_max_workers_parts_in_flight(tmp_path, template, roteiro,
+                                                        monkeypatch):
+    submitted = []
+
+    class Pool(ThreadPoolExecutor):
+        def __init__(self, max_workers, mp_context=None):
+            super().__init__(max_workers)
+
+        def submit(self, fn, *args):
+            assert sum(not future.done() for future in submitted) < self._max_workers
+            submitted.append(super().submit(fn, *args))
+            return submitted[-1]
+
+    monkeypatch.setattr(shard, "ProcessPoolExecutor", Pool)
+    results = export_shards(roteiro, template, tmp_path, max_rows=50, max_workers=2)
+    assert len(submitted) == 5
+    assert [r.rows for r in results] == [50] * 5 and all(r.ok for r in results)
+
+
+def test_dead_process_fails_only_its_parts(tmp_path, template, roteiro, monkeypatch):
+    monkeypatch.setattr(shard, "_export_shard_task", _crash)
+    results = export_shards(roteiro, template, tmp_path, max_rows=100, max_workers=2)
+    assert len(results) == 3
+    assert all("BrokenProcessPool" in result.error for result in results)
+    assert (tmp_path / "DOCUMENTO_INDICE.docx").is_file()
@@ -0,0 +1,64 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from qtexpotool import shard, sheets
+from qtexpotool.cache import WorkbookCache
+from qtexpotool.pipeline import ExportResult
+from qtexpotool.shard import export_shards
+from qtexpotool.sheets import SHEET_COLUMN, merge_sheets, read_sheets, sheet_columns
+
+
+def _crash(*args):
+    os._exit(1)
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    path = tmp_path / "parcelas.xlsx"
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame({"De": ["M-001", "M-002"], "Distância": ["1,5 m", "2 m"],
+                      "Obs": [np.nan, np.nan]}).to_excel(writer, sheet_name="P1", index=False)
+        pd.DataFrame({"De": ["M-003"], "Extra": ["x"]}).to_excel(writer, sheet_name="P2",
+                                                                 index=False)
+    return path
+
+
+def test_each_part_keeps_its_sheet_columns(tmp_path, template, workbook, monkeypatch):
+    df = merge_sheets(read_sheets(workbook, max_workers=1))
+    assert sheet_columns(df) == {"P1": ["De", "Distância", "Obs"], "P2": ["De", "Extra"]}
+
+    parts = {}
+
+    def export(name, frame, *args):
+        parts[name] = frame
+        return ExportResult(source=name)
+
+    monkeypatch.setattr(shard, "_export_shard", export)
+    export_shards(df, template, tmp_path, group_by=SHEET_COLUMN, keep_group=False,
+                  columns=sheet_columns(df), index=False, max_workers=1)
+    # "Obs" é toda vazia, mas é da aba P1; "Extra" só existe na P2
+    assert list(parts["P1"].columns) == ["De", "Distância", "Obs"]
+    assert list(parts["P2"].columns) == ["De", "Extra"]
+
+
+def test_sheet_columns_survive_the_cache(tmp_path, workbook):
+    df = merge_sheets(read_sheets(workbook, max_workers=1))
+    cache = WorkbookCache(tmp_path / "cache")
+    cache.put(workbook, df)
+    assert sheet_columns(cache.get(workbook)) == sheet_columns(df)
+
+
+def test_failed_sheet_is_named(workbook):
+    schemas = {"P2": {"Extra": "distance"}}
+    with pytest.raises(RuntimeError, match="aba 'P2': ValueError"):
+        read_sheets(workbook, schemas=schemas, max_workers=1)
+
+
+def test_dead_process_names_its_sheets(workbook, monkeypatch):
+    monkeypatch.setattr(sheets, "_read_sheet", _crash)
+    with pytest.raises(RuntimeError, match="aba 'P1': BrokenProcessPool") as error:
+        read_sheets(workbook, max_workers=2)
+    assert "aba 'P2'" in str(error.value)
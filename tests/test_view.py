@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+from qtexpotool.view import RowView, parse_range, sort_positions
+
+
+def frame():
+    return pd.DataFrame({
+        "De": ["M-003", "M-001", np.nan, "M-002"],
+        "Distância": [34.6, 67.75, 7.67, np.nan],
+        "MUNICIPIO": pd.Categorical(["Belém", "Acará", "Belém", "Breves"]),
+    })
+
+
+def test_sort_positions_stable_with_empty_last():
+    df = frame()
+    assert sort_positions(df["De"]).tolist() == [1, 3, 0, 2]
+    assert sort_positions(df["De"], ascending=False).tolist() == [0, 3, 1, 2]
+    assert sort_positions(df["Distância"]).tolist() == [2, 0, 1, 3]
+    assert sort_positions(df["Distância"], ascending=False).tolist() == [1, 0, 2, 3]
+    assert sort_positions(df["MUNICIPIO"]).tolist() == [1, 0, 2, 3]
+
+
+def test_parse_range():
+    assert parse_range("10..20") == (10.0, 20.0)
+    assert parse_range("..5,5") == (None, 5.5)
+    assert parse_range("1.000,5..") == (1000.5, None)
+    assert parse_range("texto") is None
+    assert parse_range("..") is None
+
+
+def test_row_view_filter_and_sort():
+    view = RowView(frame())
+    assert view.rows() is None
+
+    view.filter_text("belém", "MUNICIPIO")
+    assert view.rows().tolist() == [0, 2]
+    view.set_sort("Distância", ascending=True)
+    assert view.rows().tolist() == [2, 0]
+
+    view.filter_text("30..70", "Distância")
+    assert view.rows().tolist() == [0, 1]
+
+    view.filter_text("m-00", None)
+    assert view.rows().tolist() == [0, 1, 3]
+
+    view.clear()
+    assert view.rows() is None
+
+
+def test_text_filter_uses_rendered_text():
+    view = RowView(frame())
+    # "67,75 m" é o que a tabela mostra para 67.75
+    view.filter_text("67,75 m", "Distância")
+    assert view.rows().tolist() == [1]
+    view.filter_text("7,67", None)
+    assert view.rows().tolist() == [2]
+    view.filter_text("34,60", None)
+    assert view.rows().tolist() == [0]
@@ -0,0 +1,124 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("PyQt5")
+
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+import main  # noqa: E402
+from qtexpotool.render import render_frame, report_formatters  # noqa: E402
+
+
+@pytest.fixture(scope="module", autouse=True)
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+def run_worker(worker):
+    """Roda o worker na thread do teste e devolve ``(done, failed)``."""
+    done, failed = [], []
+    worker.done.connect(done.append)
+    worker.failed.connect(failed.append)
+    worker.run()
+    return done, failed
+
+
+def test_export_worker_requires_export():
+    with pytest.raises(TypeError):
+        main.ExportWorker()
+
+
+@pytest.mark.parametrize("make", [
+    lambda rendered, df, model, out: main.StreamWorker(rendered, model, out / "a.docx"),
+    lambda rendered, df, model, out: main.Worker(model, rendered, docx_output=out / "a.docx"),
+    lambda rendered, df, model, out: main.IncrementalWorker(df, model, out / "a.docx"),
+    lambda rendered, df, model, out: main.PdfWorker(rendered, out / "falta" / "a.pdf"),
+    lambda rendered, df, model, out: main.XlsxWorker(df, out / "falta" / "a.xlsx"),
+])
+def test_export_worker_reports_failure(tmp_path, roteiro, make):
+    bad_model = tmp_path / "modelo.docx"
+    bad_model.write_bytes(b"isto nao e um docx")
+    done, failed = run_worker(make(render_frame(roteiro), roteiro, bad_model, tmp_path))
+    assert done == []
+    assert len(failed) == 1 and failed[0]
+
+
+def test_export_worker_reports_result(tmp_path, template, roteiro):
+    done, failed = run_worker(main.StreamWorker(render_frame(roteiro), template,
+                                                tmp_path / "a.docx"))
+    assert failed == []
+    assert done == [len(roteiro)]
+
+
+def test_export_worker_renders_frame(tmp_path, template, roteiro):
+    from docx import Document
+
+    output = tmp_path / "a.docx"
+    worker = main.StreamWorker(roteiro, template, output, formatters=report_formatters(3))
+    done, failed = run_worker(worker)
+    assert failed == [] and done == [len(roteiro)]
+    distance = list(roteiro.columns).index("Distância")
+    expected = report_formatters(3)["Distância"](roteiro["Distância"].head(1))[0]
+    assert Document(output).tables[1].rows[1].cells[distance].text == expected
+
+
+def test_export_all_worker_reports_failure(tmp_path, template, roteiro):
+    worker = main.ExportAllWorker(roteiro, {"odt": tmp_path / "a.odt"}, template)
+    done, failed = run_worker(worker)
+    assert done == [] and "ValueError" in failed[0]
+
+
+def test_batch_worker_reports_failure(tmp_path, template):
+    done, failed = run_worker(main.BatchWorker([tmp_path / "falta.xlsx"], template, tmp_path))
+    assert done == [] and "FileNotFoundError" in failed[0]
+
+
+def test_shard_worker_reports_failure(tmp_path, template, roteiro):
+    worker = main.ShardWorker(roteiro, template, tmp_path, "DOC", group_by="Falta")
+    done, failed = run_worker(worker)
+    assert done == [] and "KeyError" in failed[0]
+
+
+def test_import_cache_depends_on_compact(tmp_path):
+    from qtexpotool.cache import WorkbookCache
+
+    path = tmp_path / "cadastro.xlsx"
+    pd.DataFrame({"MUNICIPIO": ["Belém", "Acará", "Breves"] * 100,
+                  "ID": range(300)}).to_excel(path, index=False)
+    cache = WorkbookCache(tmp_path / "cache")
+    frames = []
+    for compact in (True, False, True):
+        worker = main.ImportWorker(str(path), cache, chunk_size=100, first_chunk_size=50,
+                                   compact=compact)
+        worker.loaded.connect(frames.append)
+        worker.run()
+    compacted, plain, cached = frames
+    assert isinstance(compacted["MUNICIPIO"].dtype, pd.CategoricalDtype)
+    assert plain["MUNICIPIO"].dtype == object
+    pd.testing.assert_frame_equal(cached, compacted)
+    pd.testing.assert_frame_equal(plain.astype(str), compacted.astype(str))
+
+
+def test_import_hashes_once_and_reports_cache_failure(tmp_path, monkeypatch):
+    from qtexpotool import cache as cache_module
+    from qtexpotool.cache import WorkbookCache
+
+    path = tmp_path / "cadastro.xlsx"
+    pd.DataFrame({"ID": range(10)}).to_excel(path, index=False)
+    digests = []
+    file_digest = cache_module.file_digest
+    monkeypatch.setattr(cache_module, "file_digest",
+                        lambda file_path: digests.append(file_path) or file_digest(file_path))
+
+    def broken_put(*args, **kwargs):
+        raise OSError("disco cheio")
+
+    cache = WorkbookCache(tmp_path / "cache")
+    monkeypatch.setattr(cache, "put", broken_put)
+    worker = main.ImportWorker(str(path), cache)
+    frames, errors = [], []
+    worker.loaded.connect(frames.append)
+    worker.cache_failed.connect(errors.append)
+    worker.run()
+    assert len(frames) == 1 and len(digests) == 1
+    assert errors == ["OSError: disco cheio"]
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from qtexpotool.fixedpoint import DOWN, HALF_EVEN, HALF_UP
+from qtexpotool.render import decimal_comma
+from qtexpotool.xlsx_writer import export_xlsx_stream, report_number_formats, report_rounding
+
+
+def test_xlsx_round_trip(tmp_path, roteiro):
+    output = tmp_path / "saida.xlsx"
+    done = []
+    assert export_xlsx_stream(roteiro, output, chunk_size=100, progress=done.append) == 250
+    assert done == [100, 200, 250]
+
+    ws = load_workbook(output).active
+    rows = list(ws.iter_rows(values_only=True))
+    assert list(rows[0]) == list(roteiro.columns)
+    assert len(rows) == 251
+    distance = list(roteiro.columns).index("Distância")
+    assert [row[distance] for row in rows[1:]] == (roteiro["Distância"] * 100).round().div(100).tolist()
+    assert ws.cell(row=2, column=distance + 1).number_format == '0.00 "m"'
+    assert [row[0] for row in rows[1:]] == roteiro["De"].tolist()
+
+
+def test_xlsx_three_decimals(tmp_path, roteiro):
+    output = tmp_path / "saida.xlsx"
+    export_xlsx_stream(roteiro, output, number_formats=report_number_formats(3))
+    ws = load_workbook(output).active
+    distance = list(roteiro.columns).index("Distância")
+    assert ws.cell(row=2, column=distance + 1).number_format == '0.000 "m"'
+
+
+@pytest.mark.parametrize("rounding", [HALF_EVEN, HALF_UP, DOWN])
+@pytest.mark.parametrize("decimals", [2, 3])
+def test_xlsx_values_match_report(tmp_path, decimals, rounding):
+    df = pd.DataFrame({"Distância": [67.755, 1.0005, 2.345, -0.125, 12.5, np.nan]})
+    output = tmp_path / "saida.xlsx"
+    export_xlsx_stream(df, output, number_formats=report_number_formats(decimals),
+                       rounding=report_rounding(decimals, rounding))
+    values = [row[0] for row in load_workbook(output).active.iter_rows(min_row=2, values_only=True)]
+    assert values[-1] is None
+    texts = [f"{value:.{decimals}f}".replace(".", ",") for value in values[:-1]]
+    expected = decimal_comma(decimals, rounding=rounding)(df["Distância"][:-1])
+    assert texts == expected.tolist()
+
+
+def test_xlsx_empty_cells_and_escaping(tmp_path):
+    df = pd.DataFrame({"Texto": ["a < b & c", np.nan], "Número": [np.nan, 2**60]})
+    output = tmp_path / "saida.xlsx"
+    export_xlsx_stream(df, output)
+    rows = list(load_workbook(output).active.iter_rows(values_only=True))
+    assert rows[1:] == [("a < b & c", None), (None, 2**60)]